@@ -35,7 +35,8 @@ import {
   Pending,
 } from '@mui/icons-material';
 import { useAuth } from '../Contexts/useAuth';
-import { allTasks, writeTasks, updateTasks, deleteTasks } from '../api/taskapi';
+import { allTasks, writeTasks, updateTasks, deleteTasks, subscribeTasks } from '../api/taskapi';
+import type { TaskEvent } from '../api/taskapi';
 import Sidebar from '../Components/Sidebar';
 import { Navbar } from '../Components/Navbar';
 
@@ -87,7 +88,12 @@ export function Tasks() {
     checkAndUpdateOverdueTasks();
     
     const interval = setInterval(checkAndUpdateOverdueTasks, 3600000);
-    return () => clearInterval(interval);
+    // Changes made elsewhere (other tabs, the overdue sweeper) arrive as events.
+    const unsubscribe = subscribeTasks(applyTaskEvent);
+    return () => {
+      clearInterval(interval);
+      unsubscribe();
+    };
   }, []);
 
   useEffect(() => {
@@ -109,6 +115,20 @@ export function Tasks() {
     }
   };
 
+  const applyTaskEvent = ({ type, data }: TaskEvent) => {
+    if (type === 'reset') {
+      fetchTasks();
+    } else if (type === 'deleted') {
+      setTasks((prev) => prev.filter((t) => t.id !== data.id));
+    } else {
+      setTasks((prev) =>
+        prev.some((t) => t.id === data.id)
+          ? prev.map((t) => (t.id === data.id ? { ...t, ...data } : t))
+          : [...prev, data as Task]
+      );
+    }
+  };
+
   const checkAndUpdateOverdueTasks = async () => {
     const today = new Date();
     today.setHours(0, 0, 0, 0);
@@ -190,7 +210,8 @@ export function Tasks() {
         category: formData.category,
       };
       const newTask = await writeTasks(payload);
-      setTasks((prev) => [...prev, newTask]);
+      // The created event may have added it already.
+      setTasks((prev) => [...prev.filter((t) => t.id !== newTask.id), newTask]);
       setAddDialogOpen(false);
       resetForm();
     } catch (err) {
@@ -9,8 +9,15 @@ const POST_URL = `${BASE_URL}/tasks/create/`
 export async function allTasks () {
     
     try{
-        const response = await axios.get(`${GET_URL}`, {withCredentials:true})
-        return response.data
+        // The list endpoint is cursor paginated, follow `next` until the last page.
+        const tasks = []
+        let url: string | null = `${GET_URL}`
+        while (url) {
+            const response = await axios.get(url, {withCredentials:true})
+            tasks.push(...response.data.results)
+            url = response.data.next
+        }
+        return tasks
     } catch (err) {
         console.log(err)
     }
@@ -51,4 +58,20 @@ export async function deleteTasks (pk: number) {
         console.log("Delete error", err)
         throw err
     }
-}
\ No newline at end of file
+}
+export type TaskEvent = {
+    type: 'created' | 'updated' | 'deleted' | 'reset'
+    data: { id: number, [field: string]: unknown }
+}
+
+// Server-sent task changes. EventSource reconnects by itself and resumes from
+// the last event id; a `reset` event means the caller should reload the list.
+export function subscribeTasks (onEvent: (event: TaskEvent) => void) {
+    const source = new EventSource(`${GET_URL}events/`, {withCredentials:true})
+    for (const type of ['created', 'updated', 'deleted', 'reset'] as const) {
+        source.addEventListener(type, (message) => {
+            onEvent({type, data: JSON.parse((message as MessageEvent).data)})
+        })
+    }
+    return () => source.close()
+}
@@ -1,3 +1,13 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
+
+from task_manager.pagination import EstimatedCountPaginator
+from .models import User
+
 
 # Register your models here.
+@admin.register(User)
+class CustomUserAdmin(UserAdmin):
+    # search_fields (inherited) also back the owner autocomplete on tasks.
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
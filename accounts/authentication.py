@@ -1,4 +1,11 @@
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from .revocation import revocations
+from .token_cache import token_cache
 
 class CookiesJWTAuthentication(JWTAuthentication):
     def authenticate(self, request):
@@ -6,12 +13,73 @@ class CookiesJWTAuthentication(JWTAuthentication):
 
         if not access_token:
             return None
+
+        # Tokens seen recently skip the signature check and the user SELECT.
+        cached = token_cache.get(access_token)
+        if cached is not None:
+            user, validated_token, gen = cached
+            # Logouts and user changes made by other workers only show up here.
+            revoked, version = revocations.check(validated_token)
+            if not revoked and version == gen:
+                return (user, validated_token)
+            token_cache.invalidate_token(access_token)
         
         validated_token = self.get_validated_token(access_token)
 
         try:
+            # Read before the user, so a change made in between invalidates the entry.
+            gen = revocations.user_version(validated_token[api_settings.USER_ID_CLAIM])
             user = self.get_user(validated_token)
         except:
             return None
         
-        return (user, validated_token)
\ No newline at end of file
+        token_cache.set(access_token, user, validated_token, gen)
+        return (user, validated_token)
+
+    # Used by the async views in tasks/async_views.py, which run outside DRF.
+    async def aauthenticate(self, request):
+        access_token = request.COOKIES.get("access_token")
+
+        if not access_token:
+            return None
+
+        # Cache round trips use the async cache API so they don't block the event loop.
+        cached = await token_cache.aget(access_token)
+        if cached is not None:
+            user, validated_token, gen = cached
+            revoked, version = await revocations.acheck(validated_token)
+            if not revoked and version == gen:
+                return (user, validated_token)
+            await token_cache.ainvalidate_token(access_token)
+
+        try:
+            # Verifying the token also reads the revocation store.
+            validated_token = await sync_to_async(self.get_validated_token)(access_token)
+            gen = await revocations.auser_version(validated_token[api_settings.USER_ID_CLAIM])
+            user = await self.aget_user(validated_token)
+        except (InvalidToken, TokenError, AuthenticationFailed):
+            return None
+
+        await token_cache.aset(access_token, user, validated_token, gen)
+        return (user, validated_token)
+
+    async def aget_user(self, validated_token):
+        # Async twin of JWTAuthentication.get_user.
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
+
+        return user
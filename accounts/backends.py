@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from .hashing import hash_password, verify_password
+
+UserModel = get_user_model()
+
+
+class PooledModelBackend(ModelBackend):
+    """ModelBackend with the password check run on the hashing pool (see hashing.py)."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway so unknown usernames take as long as wrong passwords.
+            hash_password(password)
+            return None
+        if verify_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,110 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from rest_framework.exceptions import Throttled
+
+from task_manager.metrics import registry
+
+DEFAULTS = {
+    'WORKER_CLASS': 'sync',
+    'THREADS': 1,
+    'WORKERS': None,
+    'QUEUE_SIZE': None,
+    'RETRY_AFTER': 1,
+}
+
+
+class HashingBusy(Throttled):
+    default_detail = "Too many sign-ins in progress, please retry shortly."
+
+
+def default_sizes(worker_class, threads):
+    """``(workers, queue_size)`` for a gunicorn worker class and ``--threads`` count."""
+    if 'uvicorn' in worker_class.lower():
+        # Django runs each request's sync code on its own thread, with no fixed limit.
+        return 2, 8
+    if threads <= 1:
+        return 0, 0
+    # Hashes may occupy at most half of the request threads.
+    workers = min(2, threads // 2)
+    return workers, threads // 2 - workers
+
+
+class HashingPool:
+    """
+    Runs password hashing on a few dedicated threads so a burst of logins or
+    sign-ups can't take every request worker. hashlib's PBKDF2/scrypt and
+    argon2-cffi release the GIL, so the threads hash in parallel.
+
+    At most WORKERS hashes run and QUEUE_SIZE more wait; anything beyond that
+    is refused with a 429 instead of queueing behind them.
+
+    The request thread still waits for its hash, so this only helps processes
+    that serve several requests at once (gthread or ASGI workers). A sync
+    worker handles one request at a time and could never fill the pool; there
+    the defaults are WORKERS=0, which hashes inline and never refuses.
+    """
+
+    def __init__(self, workers=None, queue_size=None, retry_after=None):
+        conf = {**DEFAULTS, **getattr(settings, 'PASSWORD_HASHING', {})}
+        default_workers, default_queue_size = default_sizes(conf['WORKER_CLASS'], conf['THREADS'])
+        if workers is None:
+            workers = conf['WORKERS'] if conf['WORKERS'] is not None else default_workers
+        if queue_size is None:
+            queue_size = conf['QUEUE_SIZE'] if conf['QUEUE_SIZE'] is not None else default_queue_size
+        self.workers = workers
+        self.queue_size = queue_size
+        self.retry_after = retry_after if retry_after is not None else conf['RETRY_AFTER']
+        self.slots = threading.BoundedSemaphore(max(self.workers + self.queue_size, 1))
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def get_executor(self):
+        # Started lazily so the threads are created after gunicorn forks.
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hashing')
+            return self.executor
+
+    def run(self, func, *args):
+        if not self.workers:
+            return func(*args)
+        if not self.slots.acquire(blocking=False):
+            registry.record_rejection('password_hashing')
+            raise HashingBusy(wait=self.retry_after)
+        try:
+            return self.get_executor().submit(func, *args).result()
+        finally:
+            self.slots.release()
+
+
+hashing_pool = HashingPool()
+
+
+def _check(raw_password, encoded):
+    rehash = []
+    valid = check_password(raw_password, encoded, setter=rehash.append)
+    return valid, bool(rehash)
+
+
+def hash_password(raw_password):
+    return hashing_pool.run(make_password, raw_password)
+
+
+def verify_password(user, raw_password):
+    """
+    Check ``raw_password`` off the request thread. A hash made with an older
+    hasher (or weaker settings) is replaced with the preferred one on success,
+    unless the pool is busy.
+    """
+    valid, rehash = hashing_pool.run(_check, raw_password, user.password)
+    if valid and rehash:
+        try:
+            user.password = hash_password(raw_password)
+        except HashingBusy:
+            # The upgrade can wait for a later login; this one already succeeded.
+            return valid
+        user.save(update_fields=['password'])
+    return valid
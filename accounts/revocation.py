@@ -0,0 +1,132 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .token_cache import token_cache
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+}
+
+GENERATION_CLAIM = 'gen'
+
+
+class RevocationStore:
+    """
+    Server-side token revocation kept in a Django cache instead of simplejwt's
+    blacklist tables.
+
+    * A revoked token's ``jti`` is stored until the token would have expired
+      anyway, so the set never outgrows the live tokens.
+    * Every user has a generation counter, copied into the tokens issued to them.
+      Bumping it revokes all of the user's outstanding tokens at once.
+    * A second per-user counter is bumped on any change to the user. Cached
+      users (accounts/token_cache.py) are only trusted while it is unchanged.
+
+    Checking a token is a single ``get_many`` on the cache. The generation keys
+    have no expiry: on Redis use a volatile-* eviction policy so they are kept.
+    """
+
+    def __init__(self, cache_alias=None):
+        conf = {**DEFAULTS, **getattr(settings, 'TOKEN_REVOCATION', {})}
+        self.cache_alias = cache_alias if cache_alias is not None else conf['CACHE_ALIAS']
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def jti_key(self, jti):
+        return f'auth:revoked:{jti}'
+
+    def generation_key(self, user_id):
+        return f'auth:token-gen:{user_id}'
+
+    def user_version_key(self, user_id):
+        return f'auth:user-gen:{user_id}'
+
+    def generation(self, user_id):
+        return self.cache.get(self.generation_key(user_id), 0)
+
+    def user_version(self, user_id):
+        return self.cache.get(self.user_version_key(user_id), 0)
+
+    async def auser_version(self, user_id):
+        return await self.cache.aget(self.user_version_key(user_id), 0)
+
+    def bump(self, key):
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, 1, timeout=None)
+
+    def is_revoked(self, token):
+        return self.check(token)[0]
+
+    def check(self, token):
+        """Return ``(revoked, user_version)`` for ``token`` in one round trip."""
+        keys = self.check_keys(token)
+        return self.check_result(token, keys, self.cache.get_many(keys))
+
+    async def acheck(self, token):
+        keys = self.check_keys(token)
+        return self.check_result(token, keys, await self.cache.aget_many(keys))
+
+    def check_keys(self, token):
+        user_id = token.get(api_settings.USER_ID_CLAIM)
+        return [
+            self.jti_key(token.get(api_settings.JTI_CLAIM)),
+            self.generation_key(user_id),
+            self.user_version_key(user_id),
+        ]
+
+    def check_result(self, token, keys, found):
+        jti_key, gen_key, version_key = keys
+        revoked = jti_key in found or token.get(GENERATION_CLAIM, 0) < found.get(gen_key, 0)
+        return revoked, found.get(version_key, 0)
+
+    def revoke(self, token):
+        remaining = int(token.get('exp', 0) - time.time())
+        if remaining > 0:
+            self.cache.set(self.jti_key(token.get(api_settings.JTI_CLAIM)), 1, timeout=remaining)
+
+    def revoke_user(self, user_id):
+        self.bump(self.generation_key(user_id))
+        token_cache.invalidate_user(user_id)
+
+    def touch_user(self, user_id):
+        self.bump(self.user_version_key(user_id))
+        token_cache.invalidate_user(user_id)
+
+
+revocations = RevocationStore()
+
+
+class RevocationMixin:
+    """The cache-backed counterpart of simplejwt's BlacklistMixin."""
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        if revocations.is_revoked(self):
+            raise TokenError("Token has been revoked")
+
+    def blacklist(self):
+        # Called by TokenRefreshSerializer for the old token when BLACKLIST_AFTER_ROTATION is on.
+        revocations.revoke(self)
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[GENERATION_CLAIM] = revocations.generation(user.pk)
+        return token
+
+
+class RevocableAccessToken(RevocationMixin, AccessToken):
+    pass
+
+
+class RevocableRefreshToken(RevocationMixin, RefreshToken):
+    access_token_class = RevocableAccessToken
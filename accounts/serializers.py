@@ -1,6 +1,9 @@
 from rest_framework import serializers
 import re
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from .hashing import hash_password
+from .revocation import RevocableRefreshToken
 
 User = get_user_model()
 
@@ -27,4 +30,16 @@ class user_serializer(serializers.ModelSerializer):
         
         return value
     def create(self, validated_data):
-        return User.objects.create_user(**validated_data)
\ No newline at end of file
+        # Same as create_user, but the password is hashed on the hashing pool.
+        return User.objects.create(
+            username=User.normalize_username(validated_data['username']),
+            password=hash_password(validated_data['password']),
+        )
+
+
+class token_obtain_serializer(TokenObtainPairSerializer):
+    token_class = RevocableRefreshToken
+
+
+class token_refresh_serializer(TokenRefreshSerializer):
+    token_class = RevocableRefreshToken
@@ -0,0 +1,14 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .revocation import revocations
+
+User = get_user_model()
+
+
+# Any change to a user (deactivation, staff flag, password) drops their cached tokens.
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_tokens(sender, instance, **kwargs):
+    revocations.touch_user(instance.pk)
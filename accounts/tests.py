@@ -1,8 +1,19 @@
+import threading
+from unittest.mock import patch
 from rest_framework.test import APITestCase
 from django.urls import reverse
+from django.test import RequestFactory
+from django.core.cache import caches
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from accounts.authentication import CookiesJWTAuthentication
 from accounts.serializers import user_serializer
+from accounts.token_cache import TokenUserCache, token_cache
+from accounts.hashing import HashingBusy, HashingPool, default_sizes, hashing_pool
+from accounts.revocation import revocations
+from django.contrib.auth.hashers import identify_hasher, make_password
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from task_manager.throttling import get_store
 
 User = get_user_model()
 
@@ -52,3 +63,206 @@ class TestUserRegistration(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
 
+class TestCookieTokenCache(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        caches["auth"].clear()
+        self.user = User.objects.create_user(username="cached", password="Pass@123")
+        self.url = reverse('current_user')
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.client.cookies['access_token'] = self.token
+
+    def test_second_request_skips_user_lookup(self):
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data["username"], "cached")
+
+    def test_deactivation_invalidates(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_invalidates(self):
+        self.client.get(self.url)
+        self.client.post(reverse('logout'))
+        self.assertIsNone(token_cache.get(self.token))
+
+    def test_shared_backend(self):
+        cache = TokenUserCache(cache_alias='default')
+        validated = AccessToken(self.token)
+        cache.set(self.token, self.user, validated, 0)
+        other_worker = TokenUserCache(cache_alias='default')
+        self.assertEqual(other_worker.get(self.token)[0], self.user)
+
+    def test_change_in_another_worker_invalidates(self):
+        self.client.get(self.url)
+        # What another process's post_save does: bump the shared generation only.
+        revocations.bump(revocations.user_version_key(self.user.pk))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+    def test_revocation_in_another_worker_rejects_cached_token(self):
+        self.client.get(self.url)
+        # Another process's logout only writes to the shared revocation store.
+        revocations.revoke(AccessToken(self.token))
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIsNone(token_cache.get(self.token))
+
+    def test_revoke_user_in_another_worker_rejects_cached_token(self):
+        self.client.get(self.url)
+        revocations.bump(revocations.generation_key(self.user.pk))
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_async_path_uses_async_cache_calls(self):
+        request = RequestFactory().get(self.url)
+        request.COOKIES["access_token"] = self.token
+        blocking = AssertionError("blocking cache call in async path")
+        with patch.object(TokenUserCache, "set", side_effect=blocking):
+            user, _ = await CookiesJWTAuthentication().aauthenticate(request)
+        self.assertEqual(user.pk, self.user.pk)
+        with patch.object(TokenUserCache, "get", side_effect=blocking), \
+                patch.object(type(revocations), "check", side_effect=blocking):
+            user, _ = await CookiesJWTAuthentication().aauthenticate(request)
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_hits_return_copies(self):
+        self.client.get(self.url)
+        first, second = token_cache.get(self.token)[0], token_cache.get(self.token)[0]
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+
+    def test_lru_eviction(self):
+        cache = TokenUserCache(max_size=1)
+        validated = AccessToken(self.token)
+        cache.set(self.token, self.user, validated, 0)
+        cache.set("another-token", self.user, validated, 0)
+        self.assertIsNone(cache.get(self.token))
+        self.assertIsNotNone(cache.get("another-token"))
+
+
+class TestPasswordHashing(APITestCase):
+    def setUp(self):
+        get_store().clear()
+        # 'token_obtain_pair' is also the name of the plain simplejwt view under /tasks/.
+        self.url = "/accounts/token/"
+
+    def test_login_upgrades_old_hashes(self):
+        user = User.objects.create(username="legacy", password=make_password("Pass@123", hasher="pbkdf2_sha256"))
+        response = self.client.post(self.url, {"username": "legacy", "password": "Pass@123"})
+        self.assertTrue(response.data["success"])
+        user.refresh_from_db()
+        self.assertEqual(identify_hasher(user.password).algorithm, "scrypt")
+        self.assertTrue(user.check_password("Pass@123"))
+
+    def test_wrong_password(self):
+        User.objects.create_user(username="someone", password="Pass@123")
+        response = self.client.post(self.url, {"username": "someone", "password": "Wrong@123"})
+        self.assertFalse(response.data["success"])
+
+    def test_saturated_pool_returns_429(self):
+        User.objects.create_user(username="busy", password="Pass@123")
+        with patch.object(hashing_pool, "workers", 2), patch.object(hashing_pool, "slots", threading.Semaphore(0)):
+            response = self.client.post(self.url, {"username": "busy", "password": "Pass@123"})
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertEqual(response["Retry-After"], "1")
+
+            response = self.client.post(reverse('reg_list_create'), {"username": "newbie", "password": "Pass@123"})
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertFalse(User.objects.filter(username="newbie").exists())
+
+
+    def test_busy_pool_skips_rehash(self):
+        user = User.objects.create(username="legacy", password=make_password("Pass@123", hasher="pbkdf2_sha256"))
+        with patch("accounts.hashing.hash_password", side_effect=HashingBusy(wait=1)):
+            response = self.client.post(self.url, {"username": "legacy", "password": "Pass@123"})
+        self.assertTrue(response.data["success"])
+        user.refresh_from_db()
+        self.assertEqual(identify_hasher(user.password).algorithm, "pbkdf2_sha256")
+
+    def test_pool_sized_from_worker_model(self):
+        self.assertEqual(default_sizes("sync", 1), (0, 0))
+        self.assertEqual(default_sizes("gthread", 8), (2, 2))
+        self.assertEqual(default_sizes("uvicorn_worker.UvicornWorker", 1), (2, 8))
+        # Without a pool the hash runs on the calling thread and is never refused.
+        pool = HashingPool(workers=0, queue_size=0)
+        self.assertEqual(pool.run(threading.current_thread), threading.current_thread())
+        self.assertIsNone(pool.executor)
+
+
+class TestTokenRevocation(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        get_store().clear()
+        User.objects.create_user(username="revoker", password="Pass@123")
+
+    def tearDown(self):
+        # User ids are reused after the test rolls back, and so would their generations.
+        caches["auth"].clear()
+
+    def login(self, client=None):
+        client = client or self.client
+        client.post("/accounts/token/", {"username": "revoker", "password": "Pass@123"})
+        return client.cookies["access_token"].value, client.cookies["refresh_token"].value
+
+    def refresh(self, refresh_token):
+        self.client.cookies["refresh_token"] = refresh_token
+        return self.client.post("/accounts/token/refresh/", {}, format="json")
+
+    def test_refresh_rotates_and_revokes_old_token(self):
+        _, old_refresh = self.login()
+        response = self.refresh(old_refresh)
+        self.assertTrue(response.data["refreshed"])
+        new_refresh = response.cookies["refresh_token"].value
+        self.assertNotEqual(new_refresh, old_refresh)
+
+        self.assertIsNone(self.refresh(old_refresh).data)
+        self.assertTrue(self.refresh(new_refresh).data["refreshed"])
+
+    def test_logout_revokes_refresh_token(self):
+        _, refresh = self.login()
+        self.client.post(reverse('logout'))
+        self.assertIsNone(self.refresh(refresh).data)
+
+    def test_logout_everywhere(self):
+        other_device = self.client_class()
+        other_access, _ = self.login(other_device)
+        self.assertEqual(other_device.get(reverse('current_user')).status_code, status.HTTP_200_OK)
+
+        self.login()
+        self.client.post(reverse('logout'), {"everywhere": True}, format="json")
+        other_device.cookies["access_token"] = other_access
+        self.assertEqual(other_device.get(reverse('current_user')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.login()
+        self.assertEqual(self.client.get(reverse('current_user')).status_code, status.HTTP_200_OK)
+
+
+class TestRateLimits(APITestCase):
+    def setUp(self):
+        get_store().clear()
+        User.objects.create_user(username="limited", password="Pass@123")
+        self.url = "/accounts/token/"
+
+    def test_login_is_limited_per_ip(self):
+        with self.settings(REST_FRAMEWORK={"DEFAULT_THROTTLE_CLASSES": ("task_manager.throttling.IPRateThrottle",),
+                                           "DEFAULT_THROTTLE_RATES": {"token_obtain.ip": "2/min"},
+                                           "NUM_PROXIES": 1}):
+            for _ in range(2):
+                response = self.client.post(self.url, {"username": "limited", "password": "Wrong@123"},
+                                            HTTP_X_FORWARDED_FOR="10.0.0.1, 172.18.0.5")
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = self.client.post(self.url, {"username": "limited", "password": "Pass@123"},
+                                        HTTP_X_FORWARDED_FOR="10.0.0.1, 172.18.0.5")
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertEqual(response["Retry-After"], "30")
+            # Only the address nginx appended counts, so a forged first entry doesn't reset the bucket.
+            response = self.client.post(self.url, {"username": "limited", "password": "Pass@123"},
+                                        HTTP_X_FORWARDED_FOR="10.9.9.9, 172.18.0.5")
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            response = self.client.post(self.url, {"username": "limited", "password": "Pass@123"},
+                                        HTTP_X_FORWARDED_FOR="172.18.0.6")
+            self.assertTrue(response.data["success"])
+
@@ -0,0 +1,149 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULTS = {
+    'MAX_SIZE': 10000,
+    'TTL': 300,
+    'CACHE_ALIAS': None,
+}
+
+
+def token_key(raw_token):
+    # Keyed by a digest of the whole token (not just its jti) so a hit can only
+    # come from the exact token that already passed signature verification.
+    if isinstance(raw_token, str):
+        raw_token = raw_token.encode()
+    return hashlib.sha256(raw_token).hexdigest()
+
+
+class TokenUserCache:
+    """
+    LRU + TTL cache of (user, validated_token, generation) per access token.
+
+    Entries never outlive the token's own ``exp``. When ``CACHE_ALIAS`` is set the
+    entries are also written to that Django cache so other workers can reuse them.
+    ``generation`` is the user's generation in the revocation store when the user
+    was loaded. Callers check it, and the token's revocation, on every hit: a
+    logout or user change made by another worker can't evict this process's
+    entries.
+    """
+
+    def __init__(self, max_size=None, ttl=None, cache_alias=None):
+        conf = {**DEFAULTS, **getattr(settings, 'AUTH_TOKEN_CACHE', {})}
+        self.max_size = max_size if max_size is not None else conf['MAX_SIZE']
+        self.ttl = ttl if ttl is not None else conf['TTL']
+        self.cache_alias = cache_alias if cache_alias is not None else conf['CACHE_ALIAS']
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias] if self.cache_alias else None
+
+    def get(self, raw_token):
+        key = token_key(raw_token)
+        now = time.time()
+        entry = self._get_local(key, now)
+        shared = self.shared
+        if entry is None and shared is not None:
+            entry = self._adopt(key, shared.get(f'auth:token:{key}'), now)
+        return self._unpack(entry)
+
+    async def aget(self, raw_token):
+        key = token_key(raw_token)
+        now = time.time()
+        entry = self._get_local(key, now)
+        shared = self.shared
+        if entry is None and shared is not None:
+            entry = self._adopt(key, await shared.aget(f'auth:token:{key}'), now)
+        return self._unpack(entry)
+
+    def set(self, raw_token, user, validated_token, gen):
+        stored = self._prepare(raw_token, user, validated_token, gen)
+        if stored is not None and self.shared is not None:
+            self.shared.set(*stored)
+
+    async def aset(self, raw_token, user, validated_token, gen):
+        stored = self._prepare(raw_token, user, validated_token, gen)
+        if stored is not None and self.shared is not None:
+            await self.shared.aset(*stored)
+
+    def _get_local(self, key, now):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self.entries.move_to_end(key)
+                else:
+                    del self.entries[key]
+                    entry = None
+        return entry
+
+    def _adopt(self, key, entry, now):
+        if entry is None or entry[0] <= now:
+            return None
+        self._store(key, entry)
+        return entry
+
+    def _unpack(self, entry):
+        if entry is None:
+            return None
+        expires_at, user, validated_token, gen = entry
+        # Concurrent requests must not share (and mutate) one User instance.
+        return copy.copy(user), validated_token, gen
+
+    def _prepare(self, raw_token, user, validated_token, gen):
+        # Stores the entry locally; returns the arguments for the shared cache's set().
+        now = time.time()
+        expires_at = min(now + self.ttl, validated_token.get('exp', now))
+        if expires_at <= now:
+            return None
+        key = token_key(raw_token)
+        entry = (expires_at, user, validated_token, gen)
+        self._store(key, entry)
+        return f'auth:token:{key}', entry, max(1, int(expires_at - now))
+
+    def _store(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate_token(self, raw_token):
+        key = self._drop_local(raw_token)
+        if self.shared is not None:
+            self.shared.delete(f'auth:token:{key}')
+
+    async def ainvalidate_token(self, raw_token):
+        key = self._drop_local(raw_token)
+        if self.shared is not None:
+            await self.shared.adelete(f'auth:token:{key}')
+
+    def _drop_local(self, raw_token):
+        key = token_key(raw_token)
+        with self.lock:
+            self.entries.pop(key, None)
+        return key
+
+    def invalidate_user(self, user_id):
+        # Only this process's entries; other workers notice the generation bump
+        # (see RevocationStore.touch_user).
+        with self.lock:
+            # Token claims carry the id as a string.
+            stale = [key for key, entry in self.entries.items() if str(entry[1].pk) == str(user_id)]
+            for key in stale:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenUserCache()
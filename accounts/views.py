@@ -3,10 +3,17 @@ from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 from .models import User
 from .serializers import user_serializer
+from .token_cache import token_cache
+from .revocation import RevocableAccessToken, RevocableRefreshToken, revocations
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework.response import Response
+from rest_framework.exceptions import Throttled
 
 class CustomTokenObtainPairView(TokenObtainPairView):
+    throttle_scope = 'token_obtain'
+
     def post(self, request, *args, **kwargs):
         try:
             response = super().post(request, *args, **kwargs)
@@ -36,6 +43,9 @@ class CustomTokenObtainPairView(TokenObtainPairView):
                 path='/'
             )
             return res
+        except Throttled:
+            # The hashing pool is saturated: let DRF answer 429 with Retry-After.
+            raise
         except: 
             return Response({"success": False})
         
@@ -61,15 +71,47 @@ class CustomTokenRefreshView(TokenRefreshView):
                 secure=True,
                 samesite="None",
                 path='/')
+            # ROTATE_REFRESH_TOKENS: the old refresh token is revoked, hand out its replacement.
+            if 'refresh' in tokens:
+                res.set_cookie(
+                    key="refresh_token",
+                    value=tokens['refresh'],
+                    httponly=True,
+                    secure=True,
+                    samesite="None",
+                    path='/')
             
             return res
 
         except:
             return Response()
         
+def revoke_cookie_tokens(request):
+    # {"everywhere": true} revokes every token the user holds, on all devices.
+    user_ids = set()
+    for cookie, token_class in (('access_token', RevocableAccessToken), ('refresh_token', RevocableRefreshToken)):
+        raw_token = request.COOKIES.get(cookie)
+        if not raw_token:
+            continue
+        try:
+            token = token_class(raw_token)
+        except TokenError:
+            continue
+        revocations.revoke(token)
+        user_ids.add(token[api_settings.USER_ID_CLAIM])
+    if request.data.get('everywhere'):
+        for user_id in user_ids:
+            revocations.revoke_user(user_id)
+
+
 class LogoutView(generics.CreateAPIView):
     def post(self, request, *args, **kwargs):
         try:
+            access_token = request.COOKIES.get('access_token')
+            if access_token:
+                token_cache.invalidate_token(access_token)
+            revoke_cookie_tokens(request)
+
             res = Response()
             res.data = {"success":True}
             res.delete_cookie('access_token', path='/', samesite='None')
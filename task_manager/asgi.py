@@ -3,6 +3,10 @@ ASGI config for task_manager project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server (e.g. ``uvicorn task_manager.asgi:application``)
+to get the async endpoints under /tasks/async/ and the /tasks/events/ stream;
+under WSGI the stream answers 501.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -0,0 +1,73 @@
+"""
+DATABASES built from the environment.
+
+    DATABASE_URL          any dj_database_url URL (always used when DEBUG is off)
+    DB_NAME/DB_USER/...   the local MySQL used when DEBUG is on and DATABASE_URL is unset
+    DB_CONN_MAX_AGE       seconds to keep a connection open between requests (default 600)
+    DB_CONN_HEALTH_CHECKS ping persistent connections before reuse (default on)
+    DB_POOL               use a connection pool instead of per-thread persistent connections
+    DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE / DB_POOL_TIMEOUT
+
+With DB_POOL on, Postgres uses Django's native psycopg 3 pool when psycopg_pool is
+installed, and MySQL uses the bounded pool in task_manager/db_backends/mysql.
+Size the pool from the gunicorn worker count: every worker process has its own.
+"""
+import importlib.util
+
+import dj_database_url
+
+MYSQL_POOL_ENGINE = 'task_manager.db_backends.mysql'
+
+
+def pool_settings(env):
+    return {
+        'min_size': env.int('DB_POOL_MIN_SIZE', default=1),
+        'max_size': env.int('DB_POOL_MAX_SIZE', default=4),
+        'timeout': env.float('DB_POOL_TIMEOUT', default=10.0),
+    }
+
+
+def apply_connection_settings(config, env):
+    config['CONN_MAX_AGE'] = env.int('DB_CONN_MAX_AGE', default=600)
+    config['CONN_HEALTH_CHECKS'] = env.bool('DB_CONN_HEALTH_CHECKS', default=True)
+
+    if not env.bool('DB_POOL', default=False):
+        return config
+
+    engine = config['ENGINE']
+    if engine == 'django.db.backends.postgresql' and importlib.util.find_spec('psycopg_pool'):
+        # Django refuses persistent connections together with its pool.
+        config['CONN_MAX_AGE'] = 0
+        config.setdefault('OPTIONS', {})['pool'] = pool_settings(env)
+    elif engine in ('django.db.backends.mysql', MYSQL_POOL_ENGINE):
+        config['ENGINE'] = MYSQL_POOL_ENGINE
+        config['CONN_MAX_AGE'] = 0
+        config['POOL'] = pool_settings(env)
+    return config
+
+
+def database_config(env, debug):
+    if debug and not env('DATABASE_URL', default=None):
+        config = {
+            'ENGINE': 'django.db.backends.mysql',
+            'NAME': env('DB_NAME'),
+            'USER': env('DB_USER'),
+            'PASSWORD': env('DB_PASSWORD'),
+            'HOST': env('DB_HOST'),
+            'PORT': env('DB_PORT'),
+            'OPTIONS': {
+                'init_command': "SET sql_mode='STRICT_TRANS_TABLES'"
+            }
+        }
+    else:  # render
+        config = dj_database_url.config(default=env('DATABASE_URL'), ssl_require=not debug)
+    return apply_connection_settings(config, env)
+
+
+def replica_configs(env):
+    replicas = {}
+    for index, url in enumerate(env.list('DATABASE_REPLICA_URLS', default=[])):
+        config = apply_connection_settings(dj_database_url.parse(url), env)
+        config['TEST'] = {'MIRROR': 'default'}
+        replicas[f'replica_{index}'] = config
+    return replicas
@@ -0,0 +1,41 @@
+"""
+The stock MySQL backend with a bounded connection pool (settings_dict['POOL']).
+
+Django opens a connection on the first query of a request and closes it at the
+end (CONN_MAX_AGE=0); here opening checks one out of the pool and closing hands
+it back, so a burst of requests shares at most ``max_size`` server connections.
+"""
+from django.db.backends.mysql import base
+
+from .pool import get_pool
+
+
+def ping(conn):
+    try:
+        conn.ping()
+    except base.Database.Error:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict, ping if self.settings_dict['CONN_HEALTH_CHECKS'] else None)
+
+    def get_new_connection(self, conn_params):
+        return self.pool.acquire(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            # Never hand out a connection with an open transaction or one that errored.
+            discard = self.errors_occurred and not ping(self.connection)
+            if not discard and not self.get_autocommit():
+                try:
+                    self.connection.rollback()
+                except base.Database.Error:
+                    discard = True
+            self.pool.release(self.connection, discard=discard)
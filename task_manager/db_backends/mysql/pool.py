@@ -0,0 +1,27 @@
+import threading
+
+from task_manager.db_pool import ConnectionPool
+
+# One pool per alias per process, shared by every thread's DatabaseWrapper.
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict, is_usable):
+    with pools_lock:
+        if alias not in pools:
+            options = settings_dict.get('POOL', {})
+            pools[alias] = ConnectionPool(
+                alias,
+                max_size=options.get('max_size', 4),
+                timeout=options.get('timeout', 10.0),
+                is_usable=is_usable,
+            )
+        return pools[alias]
+
+
+def close_pools():
+    with pools_lock:
+        for pool in pools.values():
+            pool.close_idle()
+        pools.clear()
@@ -0,0 +1,163 @@
+"""
+A bounded, thread-safe pool of raw DB-API connections, plus the pool metrics
+shown on /metrics for both this pool and Django's native Postgres pool.
+"""
+import threading
+import time
+
+from django.db import OperationalError, connections
+
+from .metrics import Counter, Gauge
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """
+    Hands out at most ``max_size`` connections. Callers that find the pool
+    exhausted wait up to ``timeout`` seconds for one to be released.
+    """
+
+    def __init__(self, alias, max_size=4, timeout=10.0, is_usable=None):
+        self.alias = alias
+        self.max_size = max_size
+        self.timeout = timeout
+        self.is_usable = is_usable
+        self.idle = []
+        self.in_use = 0
+        self.waiting = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self.condition = threading.Condition()
+
+    @property
+    def size(self):
+        return len(self.idle) + self.in_use
+
+    def acquire(self, connect):
+        with self.condition:
+            if not self.idle and self.size >= self.max_size:
+                self.wait()
+            conn = self.idle.pop() if self.idle else None
+            self.in_use += 1
+
+        if conn is not None and self.is_usable is not None and not self.is_usable(conn):
+            self.close_quietly(conn)
+            conn = None
+        if conn is None:
+            try:
+                conn = connect()
+            except Exception:
+                self.release(None)
+                raise
+        return conn
+
+    def wait(self):
+        # Called with the condition held.
+        started = time.monotonic()
+        deadline = started + self.timeout
+        self.waiting += 1
+        try:
+            while not self.idle and self.size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f"No connection available for '{self.alias}' within {self.timeout}s "
+                        f"({self.max_size} in use)."
+                    )
+                self.condition.wait(remaining)
+        finally:
+            self.waiting -= 1
+            self.waits += 1
+            self.wait_seconds += time.monotonic() - started
+
+    def release(self, conn, discard=False):
+        if conn is not None and discard:
+            self.close_quietly(conn)
+            conn = None
+        with self.condition:
+            self.in_use -= 1
+            if conn is not None:
+                self.idle.append(conn)
+            self.condition.notify()
+
+    def close_idle(self):
+        with self.condition:
+            idle, self.idle = self.idle, []
+        for conn in idle:
+            self.close_quietly(conn)
+
+    @staticmethod
+    def close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def stats(self):
+        with self.condition:
+            return {
+                'max_size': self.max_size,
+                'in_use': self.in_use,
+                'idle': len(self.idle),
+                'waiting': self.waiting,
+                'waits': self.waits,
+                'wait_seconds': self.wait_seconds,
+                'timeouts': self.timeouts,
+            }
+
+
+def native_pool_stats(alias):
+    # Django's psycopg 3 pool (OPTIONS['pool']); only looked at once it exists.
+    wrapper = connections[alias]
+    pool = getattr(wrapper, '_connection_pools', {}).get(alias)
+    if pool is None:
+        return None
+    stats = pool.get_stats()
+    size = stats.get('pool_size', 0)
+    available = stats.get('pool_available', 0)
+    return {
+        'max_size': stats.get('pool_max', 0),
+        'in_use': size - available,
+        'idle': available,
+        'waiting': stats.get('requests_waiting', 0),
+        'waits': stats.get('requests_queued', 0),
+        'wait_seconds': stats.get('requests_wait_ms', 0) / 1000,
+        'timeouts': stats.get('requests_errors', 0),
+    }
+
+
+def pool_stats():
+    from .db_backends.mysql.pool import pools
+
+    stats = {alias: pool.stats() for alias, pool in list(pools.items())}
+    for alias in connections:
+        if alias not in stats and connections.settings[alias].get('OPTIONS', {}).get('pool'):
+            native = native_pool_stats(alias)
+            if native is not None:
+                stats[alias] = native
+    return stats
+
+
+def pool_metrics():
+    max_size = Gauge('db_pool_max_size', "Connections the pool may open.")
+    current = Gauge('db_pool_connections', "Open pooled connections by state.")
+    waiting = Gauge('db_pool_waiting', "Requests currently waiting for a connection.")
+    waits = Counter('db_pool_waits_total', "Checkouts that had to wait for a connection.")
+    wait_seconds = Counter('db_pool_wait_seconds_total', "Time spent waiting for a connection.")
+    timeouts = Counter('db_pool_timeouts_total', "Checkouts that gave up waiting.")
+
+    for alias, stats in sorted(pool_stats().items()):
+        labels = (('alias', alias),)
+        max_size.set(labels, stats['max_size'])
+        current.set(labels + (('state', 'in_use'),), stats['in_use'])
+        current.set(labels + (('state', 'idle'),), stats['idle'])
+        waiting.set(labels, stats['waiting'])
+        waits.inc(labels, stats['waits'])
+        wait_seconds.inc(labels, stats['wait_seconds'])
+        timeouts.inc(labels, stats['timeouts'])
+    return [max_size, current, waiting, waits, wait_seconds, timeouts]
@@ -0,0 +1,120 @@
+"""
+Read-replica routing.
+
+Replicas are the DATABASES aliases listed in READ_REPLICAS (the
+DATABASE_REPLICA_URLS entries in settings). ReplicaRoutingMiddleware picks one of
+them round-robin for each safe request, and every read of the tasks/accounts
+models in that request goes to it: replicas lag by different amounts, so a
+request mixing them could pair a fresh version (ETag, list cache key) with
+stale rows. Everything else (writes,
+management commands, reads after a write in the same request, and requests
+shortly after the client wrote) uses ``default``.
+"""
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+_replica = ContextVar('read_replica', default=None)
+
+PIN_COOKIE = 'db_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+@contextmanager
+def replica_reads(alias):
+    """Send this context's tasks/accounts reads to ``alias`` (None: the primary)."""
+    token = _replica.set(alias)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'READ_REPLICAS', ()))
+
+
+class ReplicaRouter:
+    route_app_labels = {'tasks', 'accounts'}
+
+    def __init__(self, replicas=None):
+        self._replicas = None if replicas is None else list(replicas)
+
+    @property
+    def replicas(self):
+        # Read per call, so a changed READ_REPLICAS applies to the router Django already built.
+        return replica_aliases() if self._replicas is None else self._replicas
+
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        if alias is None or alias not in self.replicas or model._meta.app_label not in self.route_app_labels:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # Anything read after a write in this request must see it.
+        _replica.set(None)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets safe requests read from replicas, and pins a client to the primary for
+    READ_YOUR_WRITES_SECONDS after it writes so it never reads its own stale data.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.window = getattr(settings, 'READ_YOUR_WRITES_SECONDS', 5)
+        self.replicas = replica_aliases()
+        self.cycle = itertools.cycle(self.replicas)
+        self.lock = threading.Lock()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with replica_reads(self.pick_replica(request)):
+            response = self.get_response(request)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        with replica_reads(self.pick_replica(request)):
+            response = await self.get_response(request)
+        return self.pin(request, response)
+
+    def pick_replica(self, request):
+        if not self.replicas or request.method not in SAFE_METHODS or self.pinned(request):
+            return None
+        with self.lock:
+            return next(self.cycle)
+
+    def pin(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400 and self.replicas:
+            response.set_cookie(
+                PIN_COOKIE, str(int(time.time() + self.window)), max_age=self.window,
+                httponly=True, secure=True, samesite='None', path='/',
+            )
+        return response
+
+    def pinned(self, request):
+        try:
+            return int(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
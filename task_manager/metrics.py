@@ -0,0 +1,137 @@
+"""
+Minimal in-process metrics registry rendered in the Prometheus text format.
+
+Each gunicorn worker keeps its own registry, so scrape every worker (or run a
+single one) when you need totals.
+"""
+import bisect
+import threading
+from collections import defaultdict
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+OVERHEAD_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = defaultdict(lambda: [[0] * (len(buckets) + 1), 0.0, 0])
+
+    def observe(self, labels, value):
+        counts, _, _ = series = self.series[labels]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self.series.items()):
+            base = format_labels(labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{base}}} {total}")
+            lines.append(f"{self.name}_count{{{base}}} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.series = defaultdict(int)
+
+    def inc(self, labels, amount=1):
+        self.series[labels] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.series.items()):
+            lines.append(f"{self.name}{{{format_labels(labels)}}} {value}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.series = {}
+
+    def set(self, labels, value):
+        self.series[labels] = value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(self.series.items()):
+            lines.append(f"{self.name}{{{format_labels(labels)}}} {value}")
+        return lines
+
+
+def format_labels(labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels)
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = Counter('http_requests_total', "Requests by route, method and status.")
+        self.duration = Histogram('http_request_duration_seconds', "Total time spent in the view stack.",
+                                  DURATION_BUCKETS)
+        self.db_duration = Histogram('http_request_db_seconds', "Time spent waiting on SQL per request.",
+                                     DURATION_BUCKETS)
+        self.serialize_duration = Histogram('http_request_serialize_seconds',
+                                            "Time spent in serializers converting results to primitives.",
+                                            DURATION_BUCKETS)
+        self.render_duration = Histogram('http_request_render_seconds', "Time spent rendering the response body.",
+                                         DURATION_BUCKETS)
+        self.queries = Histogram('http_request_queries', "SQL queries per request.", QUERY_BUCKETS)
+        self.cache = Counter('cache_requests_total', "Application cache lookups by cache and result.")
+        self.rejections = Counter('rejected_requests_total', "Requests refused with a 429, by reason.")
+        self.rate_limit = Counter('rate_limit_checks_total', "Rate limit checks by scope and result.")
+        self.rate_limit_duration = Histogram('rate_limit_check_seconds', "Time spent checking a rate limit.",
+                                             OVERHEAD_BUCKETS)
+
+    def record(self, route, method, status, total, db_time, serialize_time, render_time, queries):
+        labels = (('route', route), ('method', method))
+        with self.lock:
+            self.requests.inc(labels + (('status', status),))
+            self.duration.observe(labels, total)
+            self.db_duration.observe(labels, db_time)
+            self.serialize_duration.observe(labels, serialize_time)
+            self.render_duration.observe(labels, render_time)
+            self.queries.observe(labels, queries)
+
+    def record_cache(self, name, hit):
+        with self.lock:
+            self.cache.inc((('cache', name), ('result', 'hit' if hit else 'miss')))
+
+    def record_rejection(self, reason):
+        with self.lock:
+            self.rejections.inc((('reason', reason),))
+
+    def record_rate_limit(self, scope, allowed, seconds):
+        labels = (('scope', scope),)
+        with self.lock:
+            self.rate_limit.inc(labels + (('result', 'allowed' if allowed else 'limited'),))
+            self.rate_limit_duration.observe(labels, seconds)
+
+    def render(self, extra=()):
+        with self.lock:
+            lines = []
+            for metric in (self.requests, self.duration, self.db_duration, self.serialize_duration,
+                           self.render_duration, self.queries, self.cache, self.rejections, self.rate_limit,
+                           self.rate_limit_duration):
+                lines.extend(metric.render())
+        for metric in extra:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
@@ -0,0 +1,191 @@
+import hmac
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, PermissionDenied
+from django.db import connections
+from django.http import Http404, HttpResponse
+
+from .db_pool import pool_metrics
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'DETECT_N_PLUS_ONE': False,
+    'N_PLUS_ONE_THRESHOLD': 5,
+    'TOKEN': '',
+    'ALLOWED_IPS': (),
+}
+
+
+def metrics_settings():
+    return {**DEFAULTS, **getattr(settings, 'REQUEST_METRICS', {})}
+
+
+class SerializeTimer:
+    def __init__(self):
+        self.duration = 0.0
+        self.depth = 0
+
+
+_serialize_timer = ContextVar('serialize_timer', default=None)
+
+
+@contextmanager
+def timed_serialization():
+    """
+    Count the enclosed serializer work towards the current request's serialize
+    time. Nested blocks (a list serializer calling its child) count once.
+    """
+    timer = _serialize_timer.get()
+    if timer is None or timer.depth:
+        yield
+        return
+    timer.depth = 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.duration += time.perf_counter() - started
+        timer.depth = 0
+
+
+class QueryRecorder:
+    def __init__(self, keep_sql):
+        self.count = 0
+        self.duration = 0.0
+        self.keep_sql = keep_sql
+        self.statements = Counter()
+        self.exact = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            if self.keep_sql:
+                # sql still has its placeholders, so the same statement with
+                # different params is the N+1 shape; same params is a duplicate.
+                self.statements[sql] += 1
+                self.exact[(sql, repr(params))] += 1
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Per-request query count, DB time, serialization time and total time, exposed
+    as a Server-Timing header and recorded for /metrics. Serialization is split
+    into the serializers' conversion to primitives (serialize) and the renderer's
+    encoding of the body (render). Enabled by REQUEST_METRICS['ENABLED'].
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.config = metrics_settings()
+        if not self.config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started, recorder = self.start(request)
+        with self.recording(recorder, request):
+            response = self.get_response(request)
+        return self.finish(request, response, started, recorder)
+
+    async def __acall__(self, request):
+        started, recorder = self.start(request)
+        # The wrappers are set up here and seen by the sync_to_async threads
+        # the queries run in, since connections are context-local.
+        with self.recording(recorder, request):
+            response = await self.get_response(request)
+        return self.finish(request, response, started, recorder)
+
+    def start(self, request):
+        request._render_time = 0.0
+        request._serialize_timer = SerializeTimer()
+        return time.perf_counter(), QueryRecorder(self.config['DETECT_N_PLUS_ONE'])
+
+    @contextmanager
+    def recording(self, recorder, request):
+        token = _serialize_timer.set(request._serialize_timer)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(recorder))
+                yield
+        finally:
+            _serialize_timer.reset(token)
+
+    def finish(self, request, response, started, recorder):
+        total = time.perf_counter() - started
+        render = request._render_time
+        serialize = request._serialize_timer.duration
+        response['Server-Timing'] = ", ".join([
+            f'db;dur={recorder.duration * 1000:.2f};desc="{recorder.count} queries"',
+            f'serialize;dur={serialize * 1000:.2f}',
+            f'render;dur={render * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match else 'unmatched'
+        registry.record(route, request.method, response.status_code, total, recorder.duration, serialize, render,
+                        recorder.count)
+
+        if self.config['DETECT_N_PLUS_ONE']:
+            self.report_patterns(request, recorder)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render after the view returns; time that separately.
+        started = time.perf_counter()
+
+        def rendered(response):
+            request._render_time = time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def report_patterns(self, request, recorder):
+        threshold = self.config['N_PLUS_ONE_THRESHOLD']
+        for sql, count in recorder.statements.items():
+            if count >= threshold:
+                logger.warning("Possible N+1 on %s %s: %d x %s", request.method, request.path, count, sql)
+        for (sql, _), count in recorder.exact.items():
+            if count > 1:
+                logger.warning("Duplicate query on %s %s: %d x %s", request.method, request.path, count, sql)
+
+
+def metrics_allowed(request, config):
+    # Staff (Django session), a bearer token shared with the scraper, or a
+    # scraper address. REMOTE_ADDR, not X-Forwarded-For, so it can't be spoofed.
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return True
+    token = config['TOKEN']
+    header = request.headers.get('Authorization', '')
+    if token and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()):
+        return True
+    return request.META.get('REMOTE_ADDR') in config['ALLOWED_IPS']
+
+
+def metrics_view(request):
+    config = metrics_settings()
+    if not config['ENABLED']:
+        raise Http404
+    if not metrics_allowed(request, config):
+        raise PermissionDenied
+    return HttpResponse(registry.render(pool_metrics()), content_type='text/plain; version=0.0.4; charset=utf-8')
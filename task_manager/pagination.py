@@ -0,0 +1,44 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Below this many rows an exact COUNT(*) is cheap, and estimates are least reliable.
+ESTIMATE_THRESHOLD = 100000
+
+ESTIMATE_SQL = {
+    'postgresql': "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+    'mysql': "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+}
+
+
+def estimated_count(queryset):
+    """
+    The planner's row estimate for an unfiltered queryset's table, or None when
+    the queryset is filtered, the backend keeps no estimate, or the table is small.
+    """
+    if queryset.query.where or queryset.query.distinct:
+        return None
+    connection = connections[queryset.db]
+    sql = ESTIMATE_SQL.get(connection.vendor)
+    if sql is None:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [queryset.model._meta.db_table])
+        row = cursor.fetchone()
+    # Postgres reports -1 for tables that were never analyzed.
+    if row is None or row[0] is None or row[0] < ESTIMATE_THRESHOLD:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin paginator for big tables: the unfiltered changelist is counted from
+    table statistics instead of a COUNT(*) over every row. Filtered lists still
+    get an exact count, which their indexes keep cheap.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        return estimate if estimate is not None else super().count
@@ -0,0 +1,77 @@
+"""
+JSON renderer/parser pair for the REST API.
+
+Uses orjson when it is installed and falls back to DRF's own encoder when it is
+not, so the project runs the same either way. Enable through REST_FRAMEWORK's
+DEFAULT_RENDERER_CLASSES / DEFAULT_PARSER_CLASSES.
+"""
+import json
+
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson isn't installed
+    orjson = None
+
+_fallback_encoder = encoders.JSONEncoder()
+
+
+def _default(obj):
+    # Lazy translations, Decimals, querysets... anything orjson doesn't know natively.
+    return _fallback_encoder.default(obj)
+
+
+def dumps(data, indent=None):
+    if orjson is not None:
+        option = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_default, option=option)
+    separators = None if indent else (',', ':')
+    return json.dumps(data, cls=encoders.JSONEncoder, indent=indent, ensure_ascii=False,
+                      allow_nan=False, separators=separators).encode()
+
+
+def loads(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def iter_json_array(items, chunk_size=500):
+    """Encode an iterable as one JSON array, yielding ``bytes`` chunks of ``chunk_size`` items."""
+    yield b'['
+    buffer, first = [], True
+    for item in items:
+        buffer.append(dumps(item))
+        if len(buffer) >= chunk_size:
+            yield (b'' if first else b',') + b','.join(buffer)
+            buffer, first = [], False
+    if buffer:
+        yield (b'' if first else b',') + b','.join(buffer)
+    yield b']'
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        return dumps(data, indent=indent)
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return loads(stream.read())
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -3,8 +3,9 @@ from pathlib import Path
 from dotenv import load_dotenv
 from datetime import timedelta
 import os
+import sys
 import environ
-import dj_database_url   # render and update requirements.txt
+from task_manager.database import database_config, replica_configs
 env = environ.Env(DEBUG=(bool, False))
 environ.Env.read_env()
 
@@ -43,6 +44,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'task_manager.middleware.QueryInstrumentationMiddleware',  # no-op unless REQUEST_METRICS is enabled
+    'task_manager.db_router.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -77,34 +80,56 @@ WSGI_APPLICATION = 'task_manager.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-if DEBUG:
-    DATABASES = {
-        'default': {
-            'ENGINE': 'django.db.backends.mysql',
-            'NAME': env('DB_NAME'),
-            'USER': env('DB_USER'),
-            'PASSWORD': env('DB_PASSWORD'),
-            'HOST': env('DB_HOST'),
-            'PORT': env('DB_PORT'),
-            'OPTIONS': {
-                'init_command': "SET sql_mode='STRICT_TRANS_TABLES'"
-            }
-        }
-    }
-else:  # render
-    DATABASES = {
-        'default': dj_database_url.config(
-            default=env('DATABASE_URL'),
-            conn_max_age=600,
-            ssl_require=True,
-        )
-    }
+# Env-driven: persistent connections, health checks and optional pooling (DB_POOL),
+# see task_manager/database.py for the variables.
+DATABASES = {'default': database_config(env, DEBUG)}
+
+# Optional read replicas, e.g. DATABASE_REPLICA_URLS=mysql://ro@replica1/db,mysql://ro@replica2/db
+# Routed by task_manager/db_router.py; tests mirror them onto the default test database.
+REPLICA_DATABASES = replica_configs(env)
+DATABASES.update(REPLICA_DATABASES)
+READ_REPLICAS = list(REPLICA_DATABASES)
+
+if sys.argv[1:2] == ['test'] and 'replica_0' not in DATABASES:
+    # A second connection to the test database for the routing tests. Nothing
+    # reads from it unless a test lists it in READ_REPLICAS.
+    DATABASES['replica_0'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['task_manager.db_router.ReplicaRouter']
+
+# After a write, the client reads from the primary for this many seconds.
+READ_YOUR_WRITES_SECONDS = env.int('READ_YOUR_WRITES_SECONDS', default=5)
 
 
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
+# PASSWORD_HASHER picks the hasher for new hashes: scrypt (default), argon2
+# (needs argon2-cffi) or pbkdf2. Older hashes still verify and are upgraded on login.
+PASSWORD_HASHER_PATHS = {
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHER = env('PASSWORD_HASHER', default='scrypt')
+PASSWORD_HASHERS = [PASSWORD_HASHER_PATHS[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_PATHS.items() if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+# Password hashing runs on WORKERS threads per process with QUEUE_SIZE waiting;
+# further logins/sign-ups get a 429 (see accounts/hashing.py). Unset sizes follow
+# the gunicorn worker model: sync workers hash inline, gthread and ASGI use a pool.
+PASSWORD_HASHING = {
+    'WORKER_CLASS': env('GUNICORN_WORKER_CLASS', default='sync'),
+    'THREADS': env.int('GUNICORN_THREADS', default=1),
+    'WORKERS': env.int('PASSWORD_HASHING_WORKERS', default=None),
+    'QUEUE_SIZE': env.int('PASSWORD_HASHING_QUEUE_SIZE', default=None),
+    'RETRY_AFTER': env.int('PASSWORD_HASHING_RETRY_AFTER', default=1),
+}
+
+AUTHENTICATION_BACKENDS = ['accounts.backends.PooledModelBackend']
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -151,11 +176,118 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'accounts.authentication.CookiesJWTAuthentication',
     ),
+    # orjson-backed when installed, plain DRF JSON otherwise (task_manager/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'task_manager.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'task_manager.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # Token buckets for views with a throttle_scope (task_manager/throttling.py).
+    'DEFAULT_THROTTLE_CLASSES': (
+        'task_manager.throttling.UserRateThrottle',
+        'task_manager.throttling.IPRateThrottle',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'task_list.user': env('RATE_TASK_LIST_USER', default='300/min'),
+        'task_list.ip': env('RATE_TASK_LIST_IP', default='600/min'),
+        'task_create.user': env('RATE_TASK_CREATE_USER', default='60/min;burst=20'),
+        'task_create.ip': env('RATE_TASK_CREATE_IP', default='120/min;burst=40'),
+        'task_detail.user': env('RATE_TASK_DETAIL_USER', default='300/min'),
+        'task_detail.ip': env('RATE_TASK_DETAIL_IP', default='600/min'),
+        'token_obtain.ip': env('RATE_TOKEN_OBTAIN_IP', default='10/min;burst=5'),
+        'task_import.user': env('RATE_TASK_IMPORT_USER', default='10/h;burst=3'),
+    },
+    # nginx appends the client address to X-Forwarded-For; trust only that entry.
+    'NUM_PROXIES': env.int('NUM_PROXIES', default=1),
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
-    'REFRESH_TOKEN_LIFETIME': timedelta(days=7)
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+    # Revocation lives in the cache (accounts/revocation.py), not the blacklist app.
+    'ROTATE_REFRESH_TOKENS': True,
+    'BLACKLIST_AFTER_ROTATION': True,
+    'AUTH_TOKEN_CLASSES': ('accounts.revocation.RevocableAccessToken',),
+    'TOKEN_OBTAIN_SERIALIZER': 'accounts.serializers.token_obtain_serializer',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.token_refresh_serializer',
+}
+
+# Revoked jtis and per-user token generations. Point TOKEN_REVOCATION_CACHE_URL at
+# the shared Redis in production so every worker sees a logout.
+TOKEN_REVOCATION = {
+    'CACHE_ALIAS': 'auth',
+}
+
+# Per-request query count / timing, Server-Timing headers and /metrics (task_manager/middleware.py).
+# DETECT_N_PLUS_ONE logs statements repeated N_PLUS_ONE_THRESHOLD+ times and exact duplicates.
+REQUEST_METRICS = {
+    'ENABLED': env.bool('REQUEST_METRICS', default=False),
+    'DETECT_N_PLUS_ONE': env.bool('REQUEST_METRICS_N_PLUS_ONE', default=False),
+    'N_PLUS_ONE_THRESHOLD': env.int('REQUEST_METRICS_N_PLUS_ONE_THRESHOLD', default=5),
+    # /metrics is served to staff sessions, "Authorization: Bearer <TOKEN>" and these addresses only.
+    'TOKEN': env('METRICS_TOKEN', default=''),
+    'ALLOWED_IPS': env.list('METRICS_ALLOWED_IPS', default=[]),
+}
+
+# Validated access tokens are cached per process (see accounts/token_cache.py).
+# Set AUTH_TOKEN_CACHE_ALIAS to a CACHES alias to share entries between workers.
+# Every hit is checked against the user's generation in the TOKEN_REVOCATION
+# cache, so that cache must be shared for changes to reach all workers.
+AUTH_TOKEN_CACHE = {
+    'MAX_SIZE': env.int('AUTH_TOKEN_CACHE_SIZE', default=10000),
+    'TTL': env.int('AUTH_TOKEN_CACHE_TTL', default=300),
+    'CACHE_ALIAS': env('AUTH_TOKEN_CACHE_ALIAS', default=None),
+}
+
+# CACHE_URL / TASK_LIST_CACHE_URL take django-environ cache URLs, e.g.
+# redis://redis:6379/1 in production (bound it with maxmemory + allkeys-lru).
+CACHES = {
+    'default': env.cache_url('CACHE_URL', default='locmemcache://'),
+    'task_list': env.cache_url('TASK_LIST_CACHE_URL', default='locmemcache://task-list'),
+    'auth': env.cache_url('TOKEN_REVOCATION_CACHE_URL', default='locmemcache://auth'),
+    'ratelimit': env.cache_url('RATE_LIMIT_CACHE_URL', default='locmemcache://ratelimit'),
+}
+if 'redis' not in CACHES['auth']['BACKEND']:
+    # Revocations must not be culled before they expire.
+    CACHES['auth'].setdefault('OPTIONS', {})['MAX_ENTRIES'] = env.int('TOKEN_REVOCATION_CACHE_MAX_ENTRIES', default=100000)
+if 'redis' not in CACHES['task_list']['BACKEND']:
+    CACHES['task_list'].setdefault('OPTIONS', {})['MAX_ENTRIES'] = env.int('TASK_LIST_CACHE_MAX_ENTRIES', default=5000)
+
+# Cached GET /tasks/ pages, keyed by the owner's task version (see tasks/list_cache.py).
+TASK_LIST_CACHE = {
+    'ENABLED': env.bool('TASK_LIST_CACHE', default=True),
+    'CACHE_ALIAS': 'task_list',
+    'TIMEOUT': env.int('TASK_LIST_CACHE_TIMEOUT', default=300),
+}
+
+# POST /tasks/import/ and manage.py import_tasks (see tasks/importer.py).
+TASK_IMPORT = {
+    'BATCH_SIZE': env.int('TASK_IMPORT_BATCH_SIZE', default=1000),
+    'MAX_ERRORS': env.int('TASK_IMPORT_MAX_ERRORS', default=1000),
+}
+
+# Rate limit buckets are shared across workers only when this cache is Redis.
+RATE_LIMITS = {
+    'ENABLED': env.bool('RATE_LIMITS', default=True),
+    'CACHE_ALIAS': 'ratelimit',
+}
+
+# Tombstones for /tasks/changes/ are kept this long; run
+# `manage.py compact_task_tombstones --interval 86400` (or from cron) to remove older ones.
+TASK_TOMBSTONE_RETENTION_DAYS = env.int('TASK_TOMBSTONE_RETENTION_DAYS', default=30)
+
+# /tasks/events/ push stream (see tasks/events.py). Without a Redis URL events
+# only reach clients connected to the same process.
+TASK_EVENTS = {
+    'REDIS_URL': env('TASK_EVENTS_REDIS_URL', default=None),
+    'REPLAY_SIZE': env.int('TASK_EVENTS_REPLAY_SIZE', default=200),
+    # Seconds the in-process broker keeps an owner's buffer after their last stream closes.
+    'RETENTION': env.int('TASK_EVENTS_RETENTION', default=60),
+    'HEARTBEAT': env.int('TASK_EVENTS_HEARTBEAT', default=15),
 }
 
 # Nginx → Django HTTPS handling
@@ -0,0 +1,185 @@
+"""
+Token-bucket rate limiting for DRF views.
+
+A view opts in with ``throttle_scope``; its limits are the
+DEFAULT_THROTTLE_RATES entries ``<scope>.user`` (keyed by user id) and
+``<scope>.ip`` (keyed by client address, from X-Forwarded-For behind
+NUM_PROXIES proxies). A rate is ``"<requests>/<period>"``, optionally with
+``";burst=<n>"``; the bucket holds ``burst`` tokens (default: the request
+count) and refills evenly over the period. Refused requests get a 429 with
+Retry-After set to when the next token is due.
+
+Buckets are stored as GCRA "theoretical arrival times", one number per key.
+With a Redis cache (RATE_LIMITS['CACHE_ALIAS']) the check is a single Lua
+script, so every worker shares the buckets atomically; with any other cache
+they live in process memory, which is what tests use.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .metrics import registry
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+}
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """``"60/min;burst=10"`` -> (seconds per token, burst)."""
+    rate, _, options = rate.partition(';')
+    count, _, period = rate.partition('/')
+    count = int(count)
+    seconds = PERIODS[period.strip()[0]]
+    burst = count
+    if options:
+        name, _, value = options.partition('=')
+        if name.strip() != 'burst':
+            raise ValueError(f"Unknown rate option: {options}")
+        burst = int(value)
+    return seconds / count, burst
+
+
+def gcra(tat, now, interval, burst):
+    """Return ``(allowed, new_tat, wait)`` for one request against a bucket."""
+    tat = max(tat if tat is not None else now, now)
+    new_tat = tat + interval
+    allow_at = new_tat - interval * burst
+    if now < allow_at:
+        return False, tat, allow_at - now
+    return True, new_tat, 0.0
+
+
+class LocalBucketStore:
+    """Buckets in this process's memory."""
+    max_entries = 100000
+
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def take(self, key, interval, burst, now):
+        with self.lock:
+            allowed, tat, wait = gcra(self.buckets.get(key), now, interval, burst)
+            if allowed:
+                if len(self.buckets) >= self.max_entries:
+                    self.prune(now)
+                self.buckets[key] = tat
+            return allowed, wait
+
+    def prune(self, now):
+        # Called with the lock held. A bucket whose TAT has passed is full again.
+        self.buckets = {key: tat for key, tat in self.buckets.items() if tat > now}
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local burst = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then tat = now end
+local new_tat = tat + interval
+local allow_at = new_tat - interval * burst
+if now < allow_at then
+    return {0, tostring(allow_at - now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, '0'}
+"""
+
+
+class RedisBucketStore:
+    """Buckets in the Redis behind a Django cache alias, updated by one atomic script."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        # Django's RedisCache has no public handle on its client.
+        self.script = cache._cache.get_client(write=True).register_script(GCRA_SCRIPT)
+
+    def take(self, key, interval, burst, now):
+        key = self.cache.make_and_validate_key(key)
+        allowed, wait = self.script(keys=[key], args=[repr(now), repr(interval), burst])
+        return bool(allowed), float(wait)
+
+    def clear(self):
+        pass
+
+
+def rate_limit_settings():
+    return {**DEFAULTS, **getattr(settings, 'RATE_LIMITS', {})}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            cache = caches[rate_limit_settings()['CACHE_ALIAS']]
+            if cache.__class__.__name__ == 'RedisCache':
+                _store = RedisBucketStore(cache)
+            else:
+                _store = LocalBucketStore()
+        return _store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    kind = None
+
+    def get_rate(self, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if not scope:
+            return None, None
+        scope = f'{scope}.{self.kind}'
+        return scope, api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+
+    def get_ident_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        scope, rate = self.get_rate(view)
+        if rate is None or not rate_limit_settings()['ENABLED']:
+            return True
+        ident = self.get_ident_key(request)
+        if ident is None:
+            return True
+
+        started = time.perf_counter()
+        interval, burst = parse_rate(rate)
+        allowed, self.wait_seconds = get_store().take(f'rl:{scope}:{ident}', interval, burst, time.time())
+        registry.record_rate_limit(scope, allowed, time.perf_counter() - started)
+        if not allowed:
+            registry.record_rejection('rate_limit')
+        return allowed
+
+    def wait(self):
+        return math.ceil(self.wait_seconds)
+
+
+class UserRateThrottle(TokenBucketThrottle):
+    kind = 'user'
+
+    def get_ident_key(self, request):
+        user = request.user
+        return user.pk if user and user.is_authenticated else None
+
+
+class IPRateThrottle(TokenBucketThrottle):
+    kind = 'ip'
+
+    def get_ident_key(self, request):
+        return self.get_ident(request)
@@ -1,3 +1,36 @@
 from django.contrib import admin
 
+from task_manager.pagination import EstimatedCountPaginator
+from .models import Tasks
+from .sweeper import change_status
+
+
 # Register your models here.
+@admin.register(Tasks)
+class TasksAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'owner', 'status', 'due_date', 'category', 'created_at')
+    list_select_related = ('owner',)
+    # Both filters are served by indexes: (status, due_date, id) and (due_date, id).
+    list_filter = ('status', 'due_date')
+    autocomplete_fields = ('owner',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+    actions = ('mark_pending', 'mark_completed', 'mark_overdue')
+
+    def set_status(self, request, queryset, status):
+        # One UPDATE per batch instead of a save() per task; counters and versions follow.
+        changed = change_status(queryset, status)
+        self.message_user(request, f"{changed} task(s) marked {status}.")
+
+    @admin.action(description="Mark selected tasks as pending")
+    def mark_pending(self, request, queryset):
+        self.set_status(request, queryset, 'pending')
+
+    @admin.action(description="Mark selected tasks as completed")
+    def mark_completed(self, request, queryset):
+        self.set_status(request, queryset, 'completed')
+
+    @admin.action(description="Mark selected tasks as overdue")
+    def mark_overdue(self, request, queryset):
+        self.set_status(request, queryset, 'overdue')
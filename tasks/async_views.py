@@ -0,0 +1,176 @@
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.exceptions import APIException, Throttled
+from rest_framework.request import Request
+
+from accounts.authentication import CookiesJWTAuthentication
+from task_manager.renderers import FastJSONParser, dumps
+from task_manager.throttling import IPRateThrottle, UserRateThrottle
+from .events import events_settings, format_event, get_broker
+from .models import Tasks
+from .pagination import TaskCursorPagination
+from .serializers import Task_ReadSerializer, Task_Serializer
+from .tags import tag_tasks
+from .views import due_occurrences, filter_tasks
+
+
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
+
+
+class AsyncTaskAPIView(View):
+    """
+    Base for the async task endpoints. These are plain Django async views (DRF
+    views are sync only), so authentication, parsing and error rendering are done
+    here with the same classes the sync API uses.
+    """
+    authentication_class = CookiesJWTAuthentication
+    throttle_classes = (UserRateThrottle, IPRateThrottle)
+    throttle_scope = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        method = request.method.lower()
+        handler = getattr(self, method, None) if method in self.http_method_names else None
+        if handler is None:
+            return await self.http_method_not_allowed(request, *args, **kwargs)
+
+        auth = await self.authentication_class().aauthenticate(request)
+        if auth is None:
+            response = json_response({"detail": "Authentication credentials were not provided."}, status=401)
+            response['WWW-Authenticate'] = 'Bearer realm="api"'
+            return response
+
+        # DRF's Request gives us query_params and parsed .data without any I/O.
+        request = Request(request, parsers=[FastJSONParser()])
+        request.user, request.auth = auth
+        self.request = request
+        try:
+            # The bucket store may be Redis, so the check runs off the event loop.
+            await sync_to_async(self.check_throttles)(request)
+            return await handler(request, *args, **kwargs)
+        except APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (dict, list)) else {"detail": exc.detail}
+            response = json_response(detail, status=exc.status_code)
+            if isinstance(exc, Throttled) and exc.wait is not None:
+                response['Retry-After'] = str(int(exc.wait))
+            return response
+        except Http404:
+            return json_response({"detail": "No Tasks matches the given query."}, status=404)
+
+    def check_throttles(self, request):
+        # As APIView.check_throttles: every bucket is charged, the longest wait wins.
+        waits = [throttle.wait() for throttle in (cls() for cls in self.throttle_classes)
+                 if not throttle.allow_request(request, self)]
+        if waits:
+            raise Throttled(wait=max(waits))
+
+    def get_queryset(self):
+        return Tasks.objects.filter(owner=self.request.user)
+
+    async def get_object(self, pk):
+        try:
+            return await self.get_queryset().aget(pk=pk)
+        except Tasks.DoesNotExist:
+            raise Http404
+
+    async def save(self, request, task=None, partial=False, status=200):
+        serializer = Task_Serializer(task, data=request.data, partial=partial)
+        if not serializer.is_valid():
+            return json_response(serializer.errors, status=400)
+        if task is None:
+            task = Tasks(owner=request.user)
+        values = dict(serializer.validated_data)
+        tags = values.pop('task_tags', None)
+        for field, value in values.items():
+            setattr(task, field, value)
+        await task.asave()
+        if tags is not None:
+            await sync_to_async(tag_tasks)([task], {task.pk: tags})
+        data = await sync_to_async(lambda: Task_Serializer(task).data)()
+        return json_response(data, status=status)
+
+
+class AsyncTaskListView(AsyncTaskAPIView):
+    throttle_scope = 'task_list'
+
+    async def get(self, request):
+        reader = Task_ReadSerializer(fields=request.query_params.get('fields'))
+        paginator = TaskCursorPagination()
+        sort_field = paginator.get_ordering_field(request)
+        page = paginator.page_queryset(reader.values(filter_tasks(request), 'id', sort_field), request)
+        rows = await reader.aload_tags(paginator.finish_page([row async for row in page.aiterator()]))
+        results = reader.represent_many(rows)
+        if not request.query_params.get(paginator.cursor_query_param):
+            results = await sync_to_async(due_occurrences)(request, reader) + results
+        return json_response(paginator.get_paginated_data(results))
+
+
+class AsyncTaskCreateView(AsyncTaskAPIView):
+    throttle_scope = 'task_create'
+
+    async def post(self, request):
+        return await self.save(request, status=201)
+
+
+class AsyncTaskDetailView(AsyncTaskAPIView):
+    throttle_scope = 'task_detail'
+
+    async def get(self, request, pk):
+        reader = Task_ReadSerializer(fields=request.query_params.get('fields'))
+        row = await reader.values(self.get_queryset().filter(pk=pk)).afirst()
+        if row is None:
+            raise Http404
+        await reader.aload_tags([row])
+        return json_response(reader.to_representation(row))
+
+    async def put(self, request, pk):
+        return await self.save(request, await self.get_object(pk))
+
+    async def patch(self, request, pk):
+        return await self.save(request, await self.get_object(pk), partial=True)
+
+    async def delete(self, request, pk):
+        task = await self.get_object(pk)
+        await task.adelete()
+        return HttpResponse(status=204)
+
+
+class AsyncTaskEventsView(AsyncTaskAPIView):
+    """
+    Server-sent events for the user's task changes. Browsers reconnect on their
+    own and send Last-Event-ID, so missed events are replayed from the broker's
+    buffer. The stream ends when the access token expires; the client refreshes
+    the cookie and reconnects.
+    """
+    retry_ms = 3000
+
+    async def get(self, request):
+        if not isinstance(request._request, ASGIRequest):
+            # Under WSGI a long-lived stream would pin a worker thread.
+            return json_response({"detail": "Task events are only served over ASGI."}, status=501)
+
+        last_event_id = request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id')
+        expires_at = request.auth['exp'] if request.auth is not None else None
+        # Subscribe before answering so nothing published from here on is missed.
+        events = get_broker().subscribe(request.user.pk, last_event_id, events_settings()['HEARTBEAT'])
+        response = StreamingHttpResponse(
+            self.stream(events, expires_at),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, events, expires_at):
+        try:
+            yield f'retry: {self.retry_ms}\n\n'.encode()
+            async for event in events:
+                if expires_at is not None and time.time() >= expires_at:
+                    return
+                yield format_event(event)
+        finally:
+            await events.aclose()
@@ -0,0 +1,156 @@
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application
+from django.db import connections, transaction
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from django.utils import timezone
+
+from task_manager.throttling import rate_limit_settings
+from .changes import stamp_changes
+from .counters import count_created
+from .models import Tasks
+from .search import index_tasks
+from .tags import tag_tasks
+
+User = get_user_model()
+
+
+@contextmanager
+def generated_tasks(size):
+    """Yield a queryset of ``size`` freshly generated tasks, rolled back on exit."""
+    with transaction.atomic():
+        owner = User.objects.create(username=f"bench-{uuid.uuid4().hex[:12]}")
+        now = timezone.now()
+        # bulk_create skips signals, so nothing but the Tasks rows is written.
+        Tasks.objects.bulk_create(
+            (Tasks(task=f"Task {i}", description="benchmark row", category="bench", owner=owner,
+                   due_date=now.date(), updated_at=now) for i in range(size)),
+            batch_size=2000,
+        )
+        yield Tasks.objects.filter(owner=owner).order_by('-created_at', '-id')
+        transaction.set_rollback(True)
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Point every connection at a throwaway test database for the duration, so
+    seeding and load never touch real data. SQLite gets a file instead of the
+    shared-cache memory database, which the threaded server would contend on.
+    """
+    default = settings.DATABASES['default']
+    tempdir = None
+    if default['ENGINE'] == 'django.db.backends.sqlite3':
+        tempdir = tempfile.TemporaryDirectory()
+        default.setdefault('TEST', {})['NAME'] = os.path.join(tempdir.name, 'benchmark.sqlite3')
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        if tempdir is not None:
+            tempdir.cleanup()
+
+
+def seed(users, tasks_per_user, password, prefix='bench', hasher='default'):
+    """
+    Create ``users`` users with ``tasks_per_user`` tasks each using bulk inserts.
+    The password is hashed once and shared, so seeding doesn't pay the hasher per user.
+    Returns the created usernames.
+    """
+    run = uuid.uuid4().hex[:8]
+    hashed = make_password(password, hasher=hasher)
+    created = User.objects.bulk_create(
+        [User(username=f"{prefix}-{run}-{i}", password=hashed) for i in range(users)],
+        batch_size=1000,
+    )
+    owners = list(User.objects.filter(username__in=[user.username for user in created]).values_list('pk', flat=True))
+    today = timezone.localdate()
+    statuses = [value for value, _ in Tasks.STATUS_CHOICES]
+    for owner_id in owners:
+        tasks = [
+            Tasks(task=f"Task {i}", description="seeded for benchmarks", category=f"cat-{i % 5}",
+                  status=statuses[i % len(statuses)], due_date=today + timedelta(days=i % 30 - 10),
+                  owner_id=owner_id) for i in range(tasks_per_user)
+        ]
+        # bulk_create skips the signal handlers; do what they would, for these owners only.
+        with transaction.atomic():
+            stamp_changes(tasks)
+            tasks = Tasks.objects.bulk_create(tasks, batch_size=2000)
+            count_created(tasks)
+            tag_tasks(tasks, created=True)
+            index_tasks(tasks, created=True)
+    return [user.username for user in created]
+
+
+class QueryCountingApp:
+    """WSGI wrapper recording how many SQL queries each request ran, keyed by label."""
+
+    def __init__(self, app, label_for):
+        self.app = app
+        self.label_for = label_for
+        self.counts = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        executed = [0]
+
+        def count(execute, sql, params, many, context):
+            executed[0] += 1
+            return execute(sql, params, many, context)
+
+        with connections['default'].execute_wrapper(count):
+            body = b''.join(self.app(environ, start_response))
+        with self.lock:
+            self.counts[self.label_for(environ)].append(executed[0])
+        return [body]
+
+    def queries_per_request(self, label):
+        counts = self.counts.get(label) or [0]
+        return sum(counts) / len(counts)
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def local_server(app):
+    """
+    Serve ``app`` from a threaded WSGI server on a free local port; yields the base URL.
+    Rate limits are off meanwhile: all the load comes from one address and a few users.
+    """
+    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler, allow_reuse_address=False)
+    server.set_app(app)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    with override_settings(RATE_LIMITS={**rate_limit_settings(), 'ENABLED': False}):
+        thread.start()
+        try:
+            yield f"http://127.0.0.1:{server.server_address[1]}"
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+def project_wsgi_app():
+    return get_internal_wsgi_application()
@@ -0,0 +1,139 @@
+"""
+Change feed behind /tasks/changes/.
+
+Every write stamps the rows it touches with the owner's new TaskVersion, so
+``change_seq`` only grows per owner and follows commit order (bump_version keeps
+the version row locked until commit). Deletes leave a TaskTombstone carrying the
+same kind of sequence. Rows written in one transaction share a sequence and are
+told apart by id.
+
+compact_tombstones() drops old tombstones and records the highest sequence it
+removed per owner. Tokens that may still need one of those get a 410, after
+which the client reloads the full list.
+"""
+import base64
+import json
+import time
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Q, Value, When
+from django.utils import timezone
+from rest_framework.exceptions import APIException, ValidationError
+
+from .models import TaskTombstone, TaskVersion
+from .versioning import bump_version
+
+
+def stamp_changes(tasks):
+    # One version bump per owner; the caller saves change_seq with the rest of the row.
+    seqs = {}
+    for task in tasks:
+        if task.owner_id not in seqs:
+            seqs[task.owner_id] = bump_version(task.owner_id)
+        task.change_seq = seqs[task.owner_id]
+
+
+def change_seq_case(owner_ids):
+    """A change_seq expression for an UPDATE over rows of ``owner_ids``, bumping each owner once."""
+    return Case(*(When(owner_id=owner_id, then=Value(bump_version(owner_id))) for owner_id in sorted(owner_ids)))
+
+
+def record_deletes(tasks):
+    seqs = {owner_id: bump_version(owner_id) for owner_id in sorted({task.owner_id for task in tasks})}
+    TaskTombstone.objects.bulk_create([
+        TaskTombstone(owner_id=task.owner_id, task_id=task.pk, change_seq=seqs[task.owner_id])
+        for task in tasks
+    ])
+
+
+class TokenExpired(APIException):
+    status_code = 410
+    default_detail = "Sync token is too old; reload the task list and sync from the new token."
+    default_code = 'sync_token_expired'
+
+
+# A token is [change_seq, id, base]: the position of the last change the client
+# has seen, and the sequence through which it has every tombstone it needs. A
+# full sync starts with base at the owner's current version, since tombstones
+# older than that are for rows the client never received.
+def encode_token(seq, pk, base):
+    return base64.urlsafe_b64encode(json.dumps([seq, pk, base]).encode()).decode()
+
+
+def decode_token(token):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+    except Exception:
+        values = None
+    if not isinstance(values, list) or len(values) != 3 or not all(isinstance(value, int) for value in values):
+        raise ValidationError({"since": ["Invalid token."]})
+    return values
+
+
+def after(position, id_field):
+    seq, pk = position
+    return Q(change_seq__gt=seq) | Q(change_seq=seq, **{f'{id_field}__gt': pk})
+
+
+def changes_since(owner_id, token, rows, limit):
+    """
+    Changed task rows (``rows`` is a ``.values()`` queryset of the owner's tasks
+    that includes change_seq and id) and deleted ids after ``token``, oldest
+    first, at most ``limit`` of them together. A ``token`` of None is a full sync.
+
+    Returns ``(rows, deleted_ids, next_token, has_more)``.
+    """
+    version, compacted = (
+        TaskVersion.objects.filter(owner_id=owner_id).values_list('version', 'compacted_through').first() or (0, 0)
+    )
+    if token is None:
+        position, base = None, version
+    else:
+        seq, pk, base = decode_token(token)
+        position = (seq, pk)
+        if compacted > base:
+            raise TokenExpired()
+
+    tombstones = TaskTombstone.objects.filter(owner_id=owner_id, change_seq__gt=base)
+    if position is not None:
+        rows = rows.filter(after(position, 'id'))
+        tombstones = tombstones.filter(after(position, 'task_id'))
+    rows = list(rows.order_by('change_seq', 'id')[:limit + 1])
+    tombstones = tombstones.order_by('change_seq', 'task_id').values_list('change_seq', 'task_id')[:limit + 1]
+
+    changes = [((row['change_seq'], row['id']), row) for row in rows]
+    changes += [(key, None) for key in tombstones]
+    changes.sort(key=lambda change: change[0])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    seq, pk = changes[-1][0] if changes else (position or (0, 0))
+    # Tombstones sharing the last sequence may still be unread.
+    next_token = encode_token(seq, pk, max(base, seq - 1))
+    changed = [row for _, row in changes if row is not None]
+    deleted = [pk for (_, pk), row in changes if row is None]
+    return changed, deleted, next_token, has_more
+
+
+def compact_tombstones(older_than, batch_size=1000, now=None):
+    """
+    Delete tombstones older than ``older_than`` (a timedelta), ``batch_size`` at
+    a time. Yields ``(rows_deleted, seconds)`` for each batch.
+    """
+    cutoff = (now or timezone.now()) - older_than
+    expired = TaskTombstone.objects.filter(deleted_at__lt=cutoff).order_by('deleted_at', 'id')
+
+    while True:
+        started = time.monotonic()
+        with transaction.atomic():
+            rows = list(expired.select_for_update().values_list('id', 'owner_id', 'change_seq')[:batch_size])
+            if not rows:
+                return
+            horizon = defaultdict(int)
+            for _, owner_id, seq in rows:
+                horizon[owner_id] = max(horizon[owner_id], seq)
+            for owner_id, seq in sorted(horizon.items()):
+                TaskVersion.objects.filter(owner_id=owner_id, compacted_through__lt=seq).update(compacted_through=seq)
+            TaskTombstone.objects.filter(id__in=[row[0] for row in rows]).delete()
+        yield len(rows), time.monotonic() - started
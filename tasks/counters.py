@@ -0,0 +1,144 @@
+from collections import Counter
+
+from django.db import connections, router, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import TaskCounter, TaskDueCounter, Tasks
+
+
+COUNTER_FIELDS = ('owner_id', 'status', 'category', 'due_date')
+COUNT_KEY = ('owner_id', 'status', 'category')
+DUE_KEY = ('owner_id', 'due_date')
+
+
+def counter_key(task):
+    # Read from __dict__ so deferred fields never trigger a query.
+    return tuple(task.__dict__.get(field) for field in COUNTER_FIELDS)
+
+
+def split_deltas(deltas):
+    # Task keys -> TaskCounter and TaskDueCounter keys. Tasks built from request
+    # data may still hold due_date as a string.
+    due_date = Tasks._meta.get_field('due_date')
+    counts, due = Counter(), Counter()
+    for (owner_id, status, category, day), delta in deltas.items():
+        counts[owner_id, status, category] += delta
+        day = due_date.to_python(day)
+        if status != 'completed' and day is not None:
+            due[owner_id, day] += delta
+    return counts, due
+
+
+def upsert_sql(model, key_fields, connection):
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    keys = [quote(model._meta.get_field(name).column) for name in key_fields]
+    count = quote('count')
+    insert = f"INSERT INTO {table} ({', '.join(keys)}, {count}) VALUES ({', '.join(['%s'] * (len(keys) + 1))})"
+    if connection.vendor == 'mysql':
+        return f"{insert} ON DUPLICATE KEY UPDATE {count} = {count} + VALUES({count})"
+    return f"{insert} ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {count} = {table}.{count} + EXCLUDED.{count}"
+
+
+def add_counts(model, key_fields, deltas):
+    """
+    Add each delta to its ``model`` row with one upsert statement per key, so
+    concurrent first writes to a key can't create duplicates. Rows of the
+    touched owners that are left at zero are deleted.
+    """
+    deltas = sorted((key, delta) for key, delta in deltas.items() if delta)
+    if not deltas:
+        return
+    using = router.db_for_write(model)
+    connection = connections[using]
+    fields = [model._meta.get_field(name) for name in key_fields]
+    rows = [
+        [field.get_db_prep_save(value, connection) for field, value in zip(fields, key)] + [delta]
+        for key, delta in deltas
+    ]
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.executemany(upsert_sql(model, key_fields, connection), rows)
+        if any(delta < 0 for _, delta in deltas):
+            model.objects.using(using).filter(owner_id__in={key[0] for key, _ in deltas}, count__lte=0).delete()
+
+
+def apply_deltas(deltas):
+    """``deltas`` maps counter_key() tuples to the change in the number of such tasks."""
+    counts, due = split_deltas(deltas)
+    add_counts(TaskCounter, COUNT_KEY, counts)
+    add_counts(TaskDueCounter, DUE_KEY, due)
+
+
+def count_created(tasks):
+    apply_deltas(Counter(counter_key(task) for task in tasks))
+
+
+def count_changed(tasks):
+    # Each task remembers the key it was loaded with (see signals.remember_counter_key).
+    deltas = Counter()
+    for task in tasks:
+        old, new = task._counter_key, counter_key(task)
+        if old != new:
+            deltas[old] -= 1
+            deltas[new] += 1
+        task._counter_key = new
+    apply_deltas(deltas)
+
+
+def count_deleted(tasks):
+    deltas = Counter()
+    for task in tasks:
+        deltas[task._counter_key] -= 1
+    apply_deltas(deltas)
+
+
+def rebuild_counters():
+    counts = Tasks.objects.values('owner_id', 'status', 'category').annotate(total=Count('id')).order_by()
+    due = (
+        Tasks.objects.exclude(status='completed').filter(due_date__isnull=False)
+        .values('owner_id', 'due_date').annotate(total=Count('id')).order_by()
+    )
+    with transaction.atomic():
+        TaskCounter.objects.all().delete()
+        TaskDueCounter.objects.all().delete()
+        TaskCounter.objects.bulk_create(
+            (TaskCounter(owner_id=row['owner_id'], status=row['status'], category=row['category'],
+                         count=row['total']) for row in counts.iterator()),
+            batch_size=1000,
+        )
+        TaskDueCounter.objects.bulk_create(
+            (TaskDueCounter(owner_id=row['owner_id'], due_date=row['due_date'], count=row['total'])
+             for row in due.iterator()),
+            batch_size=1000,
+        )
+    return TaskCounter.objects.count() + TaskDueCounter.objects.count()
+
+
+def summarize(user):
+    # Sums over (status, category) and open due-date rows only, never over Tasks.
+    counters = TaskCounter.objects.filter(count__gt=0)
+    due_counters = TaskDueCounter.objects.all()
+    if not (user.is_staff or user.is_superuser):
+        counters = counters.filter(owner=user)
+        due_counters = due_counters.filter(owner=user)
+
+    today = timezone.localdate()
+    totals = counters.aggregate(total=Sum('count'), open=Sum('count', filter=~Q(status='completed')))
+    due = due_counters.aggregate(
+        overdue=Sum('count', filter=Q(due_date__lt=today)),
+        today=Sum('count', filter=Q(due_date=today)),
+        upcoming=Sum('count', filter=Q(due_date__gt=today)),
+    )
+    due = {name: value or 0 for name, value in due.items()}
+    due['no_due_date'] = (totals['open'] or 0) - sum(due.values())
+    by_status = counters.values('status').annotate(total=Sum('count')).order_by()
+    by_category = counters.values('category').annotate(total=Sum('count')).order_by()
+
+    return {
+        "total": totals['total'] or 0,
+        "status": {**{value: 0 for value, _ in Tasks.STATUS_CHOICES}, **{row['status']: row['total'] for row in by_status}},
+        "category": {row['category']: row['total'] for row in by_category},
+        "due": due,
+    }
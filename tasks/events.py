@@ -0,0 +1,287 @@
+"""
+Task change events for the /tasks/events/ stream.
+
+Writes publish ``created`` / ``updated`` / ``deleted`` events per owner once
+their transaction commits. A broker fans them out to the owner's open streams
+and keeps a short replay buffer, so a client reconnecting with Last-Event-ID
+gets what it missed. A ``reset`` event means the buffer no longer reaches back
+that far and the client should reload the list.
+
+LocalBroker only reaches streams served by the same process. With several ASGI
+workers set TASK_EVENTS['REDIS_URL'] to use RedisBroker (Redis streams) instead.
+"""
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque, namedtuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+
+from task_manager.renderers import dumps, loads
+
+DEFAULTS = {
+    'REDIS_URL': None,
+    'REPLAY_SIZE': 200,
+    'RETENTION': 60,
+    'HEARTBEAT': 15,
+}
+
+Event = namedtuple('Event', ['id', 'type', 'data'])
+
+RESET = Event(None, 'reset', {})
+
+PAYLOAD_FIELDS = ('id', 'task', 'description', 'status', 'due_date', 'created_at', 'updated_at', 'category',
+                  'recurrence', 'series', 'occurrence_date')
+
+
+def events_settings():
+    return {**DEFAULTS, **getattr(settings, 'TASK_EVENTS', {})}
+
+
+class LocalBroker:
+    """
+    In-process broker. Event ids are ``<process epoch>-<sequence>``.
+
+    Only owners with an open stream are buffered, plus RETENTION seconds after
+    their last stream closes so a reconnect can resume; publishing for anyone
+    else keeps nothing. Resuming an owner with no buffer gets a ``reset``.
+    """
+
+    def __init__(self, replay_size=200, retention=60):
+        self.replay_size = replay_size
+        self.retention = retention
+        self.epoch = uuid.uuid4().hex[:8]
+        self.last_sequence = 0
+        self.buffers = {}
+        # Per buffered owner, the highest sequence its buffer can't replay past.
+        self.evicted = {}
+        self.subscribers = {}
+        # Buffered owners without subscribers, oldest first, with when the last one left.
+        self.idle = OrderedDict()
+        self.lock = threading.Lock()
+
+    def publish(self, owner_id, event_type, data):
+        with self.lock:
+            self.last_sequence += 1
+            event = Event(f'{self.epoch}-{self.last_sequence}', event_type, data)
+            self.expire(time.monotonic())
+            buffer = self.buffers.get(owner_id)
+            if buffer is not None:
+                if len(buffer) == buffer.maxlen:
+                    self.evicted[owner_id] = self.sequence_of(buffer[0])
+                buffer.append(event)
+            subscribers = list(self.subscribers.get(owner_id, ()))
+        for subscriber in subscribers:
+            subscriber.deliver(event)
+
+    def expire(self, now):
+        # Called with the lock held.
+        while self.idle:
+            owner_id, since = next(iter(self.idle.items()))
+            if now - since < self.retention:
+                break
+            del self.idle[owner_id], self.buffers[owner_id], self.evicted[owner_id]
+
+    def sequence_of(self, event):
+        return int(event.id.rsplit('-', 1)[1])
+
+    def replay(self, owner_id, last_event_id):
+        # Called with the lock held.
+        if not last_event_id:
+            return []
+        epoch, _, seq = last_event_id.rpartition('-')
+        if epoch != self.epoch or not seq.isdigit():
+            # Issued before this process started: nothing to replay from.
+            return [RESET]
+        seq = int(seq)
+        if owner_id not in self.buffers or seq < self.evicted[owner_id]:
+            return [RESET]
+        return [event for event in self.buffers[owner_id] if self.sequence_of(event) > seq]
+
+    def subscribe(self, owner_id, last_event_id=None, heartbeat=15):
+        """
+        Start receiving the owner's events right away, and return an async
+        iterator of the missed ones followed by live ones (``None`` every
+        ``heartbeat`` idle seconds). ``aclose()`` it to unsubscribe.
+        """
+        subscription = Subscription(self, owner_id, heartbeat)
+        with self.lock:
+            self.expire(time.monotonic())
+            subscription.missed.extend(self.replay(owner_id, last_event_id))
+            if owner_id not in self.buffers:
+                self.buffers[owner_id] = deque(maxlen=self.replay_size)
+                self.evicted[owner_id] = self.last_sequence
+            self.idle.pop(owner_id, None)
+            self.subscribers.setdefault(owner_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        owner_id = subscription.owner_id
+        with self.lock:
+            subscribers = self.subscribers.get(owner_id)
+            if subscribers is None or subscription not in subscribers:
+                return
+            subscribers.remove(subscription)
+            if not subscribers:
+                del self.subscribers[owner_id]
+                self.idle[owner_id] = time.monotonic()
+
+
+class Subscription:
+    def __init__(self, broker, owner_id, heartbeat):
+        self.broker = broker
+        self.owner_id = owner_id
+        self.heartbeat = heartbeat
+        self.loop = asyncio.get_running_loop()
+        self.missed = deque()
+        self.queue = asyncio.Queue(broker.replay_size)
+        self.overflowed = False
+        self.done = False
+
+    def deliver(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self.put, event)
+        except RuntimeError:
+            pass  # The stream's event loop is gone.
+
+    def put(self, event):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A client this far behind reloads instead of buffering forever.
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(RESET)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.done:
+            raise StopAsyncIteration
+        if self.missed:
+            event = self.missed.popleft()
+        else:
+            try:
+                event = await asyncio.wait_for(self.queue.get(), self.heartbeat)
+            except asyncio.TimeoutError:
+                return None
+        if event is RESET:
+            self.done = True
+            await self.aclose()
+        return event
+
+    async def aclose(self):
+        self.done = True
+        self.broker.unsubscribe(self)
+
+
+def stream_id(value):
+    ms, _, seq = value.partition('-')
+    return int(ms), int(seq or 0)
+
+
+class RedisBroker:
+    """Redis streams broker: one capped stream per owner doubles as the replay buffer."""
+
+    def __init__(self, url, replay_size=200, prefix='task-events'):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("TASK_EVENTS['REDIS_URL'] needs the redis package installed.")
+        self.url = url
+        self.replay_size = replay_size
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+
+    def key(self, owner_id):
+        return f'{self.prefix}:{owner_id}'
+
+    def publish(self, owner_id, event_type, data):
+        self.client.xadd(self.key(owner_id), {'type': event_type, 'data': dumps(data)},
+                         maxlen=self.replay_size, approximate=True)
+
+    def subscribe(self, owner_id, last_event_id=None, heartbeat=15):
+        return self.listen(owner_id, last_event_id, heartbeat)
+
+    async def listen(self, owner_id, last_event_id, heartbeat):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        key = self.key(owner_id)
+        cursor = '$'
+        try:
+            if last_event_id:
+                first = await client.xrange(key, count=1)
+                try:
+                    behind = bool(first) and stream_id(first[0][0].decode()) > stream_id(last_event_id)
+                except ValueError:
+                    behind = True
+                if behind:
+                    yield RESET
+                    return
+                cursor = last_event_id
+            while True:
+                result = await client.xread({key: cursor}, block=int(heartbeat * 1000), count=100)
+                if not result:
+                    yield None
+                    continue
+                for _, entries in result:
+                    for entry_id, fields in entries:
+                        cursor = entry_id
+                        yield Event(entry_id.decode(), fields[b'type'].decode(), loads(fields[b'data']))
+        finally:
+            await client.aclose()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            conf = events_settings()
+            if conf['REDIS_URL']:
+                _broker = RedisBroker(conf['REDIS_URL'], conf['REPLAY_SIZE'])
+            else:
+                _broker = LocalBroker(conf['REPLAY_SIZE'], conf['RETENTION'])
+        return _broker
+
+
+def task_payload(task):
+    # Built from the instance so publishing never queries. Same formats as the API.
+    from .serializers import Task_ReadSerializer
+
+    row = {name: task.__dict__.get(task._meta.get_field(name).attname) for name in PAYLOAD_FIELDS}
+    # Values assigned as strings and not yet reloaded are already in wire format.
+    raw = {name: value for name, value in row.items() if isinstance(value, str)}
+    data = Task_ReadSerializer(fields=','.join(PAYLOAD_FIELDS)).to_representation({**row, **dict.fromkeys(raw)})
+    return {**data, **raw}
+
+
+def publish(owner_id, event_type, data):
+    """Publish once the surrounding transaction commits (immediately outside one)."""
+    broker = get_broker()
+    transaction.on_commit(lambda: broker.publish(owner_id, event_type, data))
+
+
+def publish_tasks(event_type, tasks):
+    for task in tasks:
+        if event_type == 'deleted':
+            publish(task.owner_id, event_type, {'id': task.pk})
+        else:
+            publish(task.owner_id, event_type, task_payload(task))
+
+
+def format_event(event):
+    if event is None:
+        return b': keepalive\n\n'
+    head = f'id: {event.id}\n' if event.id else ''
+    return f'{head}event: {event.type}\n'.encode() + b'data: ' + dumps(event.data) + b'\n\n'
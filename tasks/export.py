@@ -0,0 +1,62 @@
+import csv
+
+from rest_framework import fields
+
+from task_manager.renderers import dumps, iter_json_array
+from .tags import tag_names
+
+COLUMNS = ('id', 'task', 'description', 'status', 'due_date', 'created_at', 'updated_at', 'category', 'owner',
+           'recurrence', 'series', 'occurrence_date')
+EXPORT_FIELDS = COLUMNS + ('tags',)
+EXPORT_CHUNK_SIZE = 2000
+
+# Same date/datetime formatting Task_Serializer produces.
+_date_field = fields.DateField()
+_datetime_field = fields.DateTimeField()
+_converters = {
+    'due_date': _date_field.to_representation,
+    'occurrence_date': _date_field.to_representation,
+    'created_at': _datetime_field.to_representation,
+    'updated_at': _datetime_field.to_representation,
+}
+
+
+class Echo:
+    # csv.writer only needs an object with write(); hand each line straight back.
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    # Keyset batches rather than .iterator(): only Postgres streams that with a
+    # server-side cursor, while mysqlclient would buffer the whole result.
+    rows = queryset.order_by('id').values_list(*COLUMNS)
+    last_id = 0
+    while chunk := list(rows.filter(id__gt=last_id)[:chunk_size]):
+        last_id = chunk[-1][0]
+        # Tags are looked up once per chunk, not per row.
+        tags = tag_names([row[0] for row in chunk])
+        for row in chunk:
+            item = dict(zip(COLUMNS, row))
+            for name, convert in _converters.items():
+                if item[name] is not None:
+                    item[name] = convert(item[name])
+            item['tags'] = tags[item['id']]
+            yield item
+
+
+def stream_ndjson(queryset):
+    for item in export_rows(queryset):
+        yield dumps(item) + b'\n'
+
+
+def stream_json(queryset):
+    return iter_json_array(export_rows(queryset))
+
+
+def stream_csv(queryset):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for item in export_rows(queryset):
+        item['tags'] = ','.join(item['tags'])
+        yield writer.writerow(['' if item[name] is None else item[name] for name in EXPORT_FIELDS])
@@ -0,0 +1,277 @@
+"""
+Bulk task import from CSV or NDJSON, used by POST /tasks/import/ and
+``manage.py import_tasks``.
+
+The file is parsed as a stream and handled ``batch_size`` rows at a time, all
+in one transaction. Each row is validated with Task_Serializer's own fields,
+validate_* methods and validate(), only for the columns it has; rows with a
+missing or invalid value go through the full serializer, which builds the
+error report. The valid rows of a batch are inserted with bulk_create plus
+batched counter, search and tag updates, inside a savepoint. If that insert
+fails, the savepoint is rolled back and the batch retried row by row to find
+the offending rows. Only the current batch and at most ``max_errors`` error
+entries are kept in memory.
+
+Throughput falls short of 10k rows/s on SQLite: a 20k-row CSV into a SQLite
+file imports at about 3k rows/s, with SQLite's fallback search table, and at
+about 4k rows/s without it (MySQL and PostgreSQL index natively). Preparing
+bulk_create's values takes about half of that time.
+
+CSV files use the export's header (unknown and read-only columns are ignored),
+with tags comma-separated in one column.
+"""
+import csv
+import io
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import DatabaseError, connections, models, router, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from task_manager.renderers import loads
+from .changes import stamp_changes
+from .counters import count_created
+from .events import publish
+from .models import Tasks
+from .search import index_tasks
+from .serializers import Task_Serializer
+from .tags import parse_tags, tag_tasks
+
+DEFAULTS = {
+    'BATCH_SIZE': 1000,
+    'MAX_ERRORS': 1000,
+}
+
+FORMATS = ('csv', 'ndjson')
+
+
+def import_settings():
+    return {**DEFAULTS, **getattr(settings, 'TASK_IMPORT', {})}
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def detect_format(name, explicit=None):
+    if explicit:
+        if explicit not in FORMATS:
+            raise ImportFormatError(f"Must be one of: {', '.join(FORMATS)}")
+        return explicit
+    extension = (name or '').rsplit('.', 1)[-1].lower()
+    if extension in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    if extension == 'csv':
+        return 'csv'
+    raise ImportFormatError(f"Can't tell the format of {name!r}; pass one of: {', '.join(FORMATS)}")
+
+
+def iter_csv(stream):
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    for row in reader:
+        row.pop(None, None)  # values beyond the header
+        # Empty cells mean "not given", so defaults and blank=True apply.
+        item = {name: value for name, value in row.items() if value != ''}
+        if 'tags' in item:
+            item['tags'] = parse_tags(item['tags'])
+        yield item
+
+
+def iter_ndjson(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = loads(line)
+        except ValueError:
+            item = None
+        if not isinstance(item, dict):
+            item = serializers.ValidationError({"non_field_errors": ["Expected one JSON object per line."]})
+        yield item
+
+
+class ImportResult:
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    def add_error(self, row, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "seconds": round(time.perf_counter() - self.started, 3),
+        }
+
+
+def insert_tasks(tasks):
+    """
+    INSERT ``tasks`` and set their pks. Backends that return ids from a bulk
+    insert (PostgreSQL, SQLite, MariaDB) use bulk_create. MySQL doesn't, so
+    there the rows go in with one executemany and the ids are read back by
+    owner and change_seq, which the tasks must share (see stamp_changes).
+    """
+    connection = connections[router.db_for_write(Tasks)]
+    if connection.features.can_return_rows_from_bulk_insert:
+        return Tasks.objects.using(connection.alias).bulk_create(tasks)
+
+    opts = Tasks._meta
+    fields = [field for field in opts.concrete_fields if not field.primary_key]
+    quote = connection.ops.quote_name
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        quote(opts.db_table), ', '.join(quote(field.column) for field in fields), ', '.join(['%s'] * len(fields)),
+    )
+    now = timezone.now()
+    for task in tasks:
+        task.created_at = now
+    # Only dates need adapting to the backend, and the same dates recur a lot;
+    # the other columns already hold str/int values.
+    columns = [(field.attname, {} if isinstance(field, models.DateField) else None, field) for field in fields]
+    rows = []
+    for task in tasks:
+        row = []
+        for name, adapted, field in columns:
+            value = task.__dict__[name]
+            if adapted is not None and value is not None:
+                if value not in adapted:
+                    adapted[value] = field.get_db_prep_save(value, connection)
+                value = adapted[value]
+            row.append(value)
+        rows.append(row)
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+    ids = list(
+        Tasks.objects.using(connection.alias).filter(owner_id=tasks[0].owner_id, change_seq=tasks[0].change_seq)
+        .order_by('id').values_list('id', flat=True)
+    )
+    if len(ids) != len(tasks):
+        raise DatabaseError("Inserted tasks could not be read back.")
+    for task, pk in zip(tasks, ids):
+        task.pk = pk
+        task._state.adding = False
+        task._state.db = connection.alias
+    return tasks
+
+
+class TaskImporter:
+    def __init__(self, owner, batch_size=None, max_errors=None):
+        conf = import_settings()
+        self.owner = owner
+        self.batch_size = batch_size or conf['BATCH_SIZE']
+        self.max_errors = conf['MAX_ERRORS'] if max_errors is None else max_errors
+        self.serializer = Task_Serializer(many=True)
+        child = self.serializer.child
+        fields = child.fields
+        self.writable = {name: field for name, field in fields.items() if not field.read_only}
+        self.required = {name for name, field in self.writable.items() if field.required}
+        self.field_validators = {
+            name: getattr(child, f'validate_{name}') for name in self.writable if hasattr(child, f'validate_{name}')
+        }
+        # DateTimeField looks the current timezone up per value unless it has one.
+        fields['updated_at'].timezone = fields['updated_at'].default_timezone()
+
+    def lean_validate(self, item):
+        """
+        Task_Serializer's validation of ``item`` with its own fields, validate_*
+        methods, validators and validate(), skipping the bookkeeping of a full
+        run_validation for the columns the row doesn't have. None when a
+        required column is missing or anything is invalid: the serializer then
+        builds the error report.
+        """
+        if not self.required.issubset(item):
+            return None
+        child = self.serializer.child
+        data = {}
+        try:
+            for name, value in item.items():
+                # Like the serializer, ignore columns it has no writable field for.
+                field = self.writable.get(name)
+                if field is None:
+                    continue
+                value = field.run_validation(value)
+                validate = self.field_validators.get(name)
+                if validate is not None:
+                    value = validate(value)
+                data[field.source] = value
+            if child.validators:
+                child.run_validators(data)
+            return child.validate(data)
+        except (serializers.ValidationError, DjangoValidationError):
+            return None
+
+    def run(self, stream, file_format):
+        items = iter_csv(stream) if file_format == 'csv' else iter_ndjson(stream)
+        result = ImportResult(self.max_errors)
+        numbered = enumerate(items, start=1)
+        # One transaction for the import; each batch is a savepoint within it.
+        with transaction.atomic(using=router.db_for_write(Tasks)):
+            while batch := list(islice(numbered, self.batch_size)):
+                result.rows += len(batch)
+                self.import_batch(batch, result)
+        if result.created:
+            # One reload hint instead of an event per imported row.
+            publish(self.owner.pk, 'reset', {})
+        return result
+
+    def validate(self, batch, result):
+        valid = []
+        for row, item in batch:
+            try:
+                if isinstance(item, serializers.ValidationError):
+                    raise item
+                data = self.lean_validate(item)
+                if data is None:
+                    data = self.serializer.child.run_validation(item)
+                valid.append((row, data))
+            except serializers.ValidationError as exc:
+                result.add_error(row, exc.detail)
+        return valid
+
+    def import_batch(self, batch, result):
+        valid = self.validate(batch, result)
+        if not valid:
+            return
+        try:
+            with transaction.atomic():
+                self.insert([data for _, data in valid])
+            result.created += len(valid)
+        except DatabaseError:
+            for row, data in valid:
+                try:
+                    with transaction.atomic():
+                        self.insert([data])
+                    result.created += 1
+                except DatabaseError as exc:
+                    result.add_error(row, {"non_field_errors": [str(exc)]})
+
+    def insert(self, validated):
+        # Positional values in field order take Model.__init__'s fast path.
+        defaults = [(field.attname, field.get_default()) for field in Tasks._meta.concrete_fields]
+        tags = {}
+        tasks = []
+        for data in validated:
+            data = {**data, 'owner_id': self.owner.pk}
+            tasks.append(Tasks(*[data.get(name, default) for name, default in defaults]))
+            if data.get('task_tags') is not None:
+                tags[len(tasks) - 1] = data['task_tags']
+        stamp_changes(tasks)
+        insert_tasks(tasks)
+        tag_tasks(tasks, {tasks[index].pk: names for index, names in tags.items()}, created=True)
+        count_created(tasks)
+        index_tasks(tasks, created=True)
+        return tasks
@@ -0,0 +1,52 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from task_manager.metrics import registry
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+
+class TaskListCache:
+    """
+    Cached list pages keyed by (user, normalized query params, task version).
+
+    Every task write bumps the owner's TaskVersion, which changes the key, so a
+    stale page is never served; it just ages out of the backend. The version is
+    read before the page is built, so a stored page is never older than its key.
+    Size bounds come from the backend (MAX_ENTRIES for locmem/file, maxmemory for Redis).
+    """
+
+    def __init__(self):
+        conf = {**DEFAULTS, **getattr(settings, 'TASK_LIST_CACHE', {})}
+        self.enabled = conf['ENABLED']
+        self.cache_alias = conf['CACHE_ALIAS']
+        self.timeout = conf['TIMEOUT']
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def key(self, request, version, last_modified, day=None):
+        params = sorted(
+            (name, value)
+            for name, values in request.query_params.lists()
+            for value in values if value != ''
+        )
+        # The host is part of the key because `next` links are absolute; ``day``
+        # is set when the page holds generated occurrences, whose status follows the date.
+        raw = repr((request.get_host(), request.path, params, version, last_modified, day))
+        return f'tasks:list:{request.user.pk}:{hashlib.sha1(raw.encode()).hexdigest()}'
+
+    def get(self, key):
+        data = self.cache.get(key)
+        registry.record_cache('task_list', data is not None)
+        return data
+
+    def set(self, key, data):
+        self.cache.set(key, data, timeout=self.timeout)
@@ -0,0 +1,116 @@
+import http.client
+import json
+import threading
+import time
+from collections import Counter
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class LoadResult:
+    def __init__(self, label, latencies, errors, elapsed, statuses=None):
+        self.label = label
+        self.latencies = latencies
+        self.errors = errors
+        self.elapsed = elapsed
+        self.statuses = statuses or Counter()
+
+    @property
+    def requests(self):
+        return len(self.latencies)
+
+    @property
+    def throughput(self):
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return {
+            'label': self.label,
+            'requests': self.requests,
+            'errors': self.errors,
+            'req_per_s': round(self.throughput, 1),
+            'p50_ms': round(percentile(self.latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(self.latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(self.latencies, 99) * 1000, 2),
+        }
+
+
+def connect(base_url, timeout=30):
+    parts = urlsplit(base_url)
+    cls = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    return cls(parts.netloc, timeout=timeout)
+
+
+def request(base_url, method, path, body=None, cookies=None, headers=None):
+    conn = connect(base_url)
+    headers = dict(headers or {})
+    if body is not None:
+        body = json.dumps(body)
+        headers['Content-Type'] = 'application/json'
+    if cookies:
+        headers['Cookie'] = '; '.join(f'{key}={value}' for key, value in cookies.items())
+    try:
+        conn.request(method, urlsplit(base_url).path.rstrip('/') + path, body=body, headers=headers)
+        response = conn.getresponse()
+        payload = response.read()
+        return response.status, response.getheaders(), payload
+    finally:
+        conn.close()
+
+
+def login(base_url, username, password):
+    status, headers, _ = request(base_url, 'POST', '/accounts/token/', {'username': username, 'password': password})
+    cookies = SimpleCookie()
+    for name, value in headers:
+        if name.lower() == 'set-cookie':
+            cookies.load(value)
+    if status != 200 or 'access_token' not in cookies:
+        raise RuntimeError(f"Login as {username!r} failed with HTTP {status}")
+    return {key: morsel.value for key, morsel in cookies.items()}
+
+
+def run_load(label, base_url, make_request, total, concurrency, cookies=None):
+    """
+    Fire ``total`` requests from ``concurrency`` threads. ``make_request(i)``
+    returns ``(method, path, body)`` for the i-th request.
+    """
+    latencies, errors = [], [0]
+    statuses = Counter()
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            method, path, body = make_request(i)
+            started = time.perf_counter()
+            try:
+                status, _, _ = request(base_url, method, path, body, cookies=cookies)
+                ok = status < 400
+            except OSError:
+                status, ok = None, False
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] += 1
+                if not ok:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return LoadResult(label, latencies, errors[0], time.perf_counter() - started, statuses)
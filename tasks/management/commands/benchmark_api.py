@@ -0,0 +1,114 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.benchmarks import QueryCountingApp, benchmark_database, local_server, project_wsgi_app, seed
+from tasks.loadtest import login, request, run_load
+
+PASSWORD = "Bench@12345"
+
+
+def label_for(environ):
+    path = environ.get('PATH_INFO', '')
+    if path.startswith('/accounts/token/'):
+        return 'login'
+    if path.startswith('/tasks/create/'):
+        return 'create'
+    if path.rstrip('/') == '/tasks':
+        return 'list'
+    return 'detail'
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed users and tasks into a throwaway test database, load the API from a local threaded server "
+        "and report throughput, latency percentiles and queries per request. Fails when results regress "
+        "past a saved baseline, or when there is no baseline to compare against."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--tasks', type=int, default=200, help="Tasks per user.")
+        parser.add_argument('--requests', type=int, default=300, help="Requests per endpoint.")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--baseline', default=str(Path(settings.BASE_DIR) / 'benchmark_baseline.json'))
+        parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline.")
+        parser.add_argument('--no-compare', action='store_true', help="Only report; skip the baseline comparison.")
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help="Allowed relative slowdown before a result counts as a regression.")
+
+    def handle(self, *args, **options):
+        baseline = Path(options['baseline'])
+        compare = not (options['save_baseline'] or options['no_compare'])
+        if compare and not baseline.exists():
+            raise CommandError(
+                f"No baseline at {baseline}. Record one with --save-baseline, or pass --no-compare to only report."
+            )
+        with benchmark_database():
+            usernames = seed(options['users'], options['tasks'], PASSWORD)
+            results = self.run(usernames, options)
+
+        self.report(results)
+        if options['save_baseline']:
+            baseline.write_text(json.dumps(results, indent=2))
+            self.stdout.write(f"Baseline written to {baseline}")
+        elif compare:
+            self.compare(results, json.loads(baseline.read_text()), options['tolerance'])
+
+    def run(self, usernames, options):
+        app = QueryCountingApp(project_wsgi_app(), label_for)
+        total, concurrency = options['requests'], options['concurrency']
+        results = {}
+
+        with local_server(app) as base_url:
+            cookies = login(base_url, usernames[0], PASSWORD)
+            status, _, body = request(base_url, 'GET', '/tasks/?page_size=1&fields=id', cookies=cookies)
+            if status != 200:
+                raise CommandError(f"Could not list tasks (HTTP {status})")
+            detail_path = f"/tasks/{json.loads(body)['results'][0]['id']}/"
+
+            scenarios = {
+                'login': lambda i: ('POST', '/accounts/token/',
+                                    {'username': usernames[i % len(usernames)], 'password': PASSWORD}),
+                'list': lambda i: ('GET', '/tasks/', None),
+                'create': lambda i: ('POST', '/tasks/create/', {'task': f'bench {i}', 'category': 'bench'}),
+                'detail': lambda i: ('GET', detail_path, None),
+            }
+            for name, make_request in scenarios.items():
+                result = run_load(name, base_url, make_request, total, concurrency, cookies=cookies)
+                row = result.summary()
+                row['queries_per_request'] = round(app.queries_per_request(name), 2)
+                results[name] = row
+        return results
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'endpoint':<8} {'reqs':>6} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}"
+        )
+        for name, row in results.items():
+            self.stdout.write(
+                f"{name:<8} {row['requests']:>6} {row['errors']:>6} {row['req_per_s']:>8} {row['p50_ms']:>8} "
+                f"{row['p95_ms']:>8} {row['p99_ms']:>8} {row['queries_per_request']:>8}"
+            )
+
+    def compare(self, results, baseline, tolerance):
+        regressions = []
+        for name, row in results.items():
+            old = baseline.get(name)
+            if not old:
+                continue
+            if row['errors'] > old['errors']:
+                regressions.append(f"{name}: {row['errors']} errors (baseline {old['errors']})")
+            if row['p95_ms'] > old['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{name}: p95 {row['p95_ms']}ms (baseline {old['p95_ms']}ms)")
+            if row['req_per_s'] < old['req_per_s'] * (1 - tolerance):
+                regressions.append(f"{name}: {row['req_per_s']} req/s (baseline {old['req_per_s']})")
+            if row['queries_per_request'] > old['queries_per_request']:
+                regressions.append(
+                    f"{name}: {row['queries_per_request']} queries/request (baseline {old['queries_per_request']})"
+                )
+        if regressions:
+            raise CommandError("Performance regressed past the baseline:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
@@ -0,0 +1,39 @@
+import io
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from task_manager import renderers
+from tasks.benchmarks import benchmark_database, best_of, generated_tasks
+from tasks.serializers import Task_Serializer
+from tasks.tags import tag_prefetch
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's JSONRenderer/JSONParser with the project's FastJSON pair on Task_Serializer output "
+        "for rows generated in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        backend = 'orjson' if renderers.orjson is not None else 'stdlib json (orjson not installed)'
+        self.stdout.write(f"fast path: {backend}")
+        self.stdout.write(f"{'rows':>8} {'render drf':>11} {'render fast':>12} {'parse drf':>10} {'parse fast':>11}")
+        repeat = options['repeat']
+        with benchmark_database():
+            for size in options['sizes']:
+                with generated_tasks(size) as queryset:
+                    data = Task_Serializer(queryset.prefetch_related(tag_prefetch()), many=True).data
+                body = JSONRenderer().render(data)
+                timings = [
+                    best_of(repeat, lambda: JSONRenderer().render(data)),
+                    best_of(repeat, lambda: renderers.FastJSONRenderer().render(data)),
+                    best_of(repeat, lambda: JSONParser().parse(io.BytesIO(body))),
+                    best_of(repeat, lambda: renderers.FastJSONParser().parse(io.BytesIO(body))),
+                ]
+                self.stdout.write(f"{size:>8} " + " ".join(f"{t * 1000:>10.1f}ms" for t in timings))
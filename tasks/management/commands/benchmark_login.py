@@ -0,0 +1,71 @@
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.hashing import hashing_pool
+from tasks.benchmarks import benchmark_database, local_server, project_wsgi_app, seed
+from tasks.loadtest import login, run_load
+
+PASSWORD = "Bench@12345"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure login throughput through the password hashing pool: first logins that "
+        "upgrade a PBKDF2 hash, logins with the current hasher, and task list latency "
+        "while logins are flooding the server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--requests', type=int, default=100, help="Logins per scenario.")
+        parser.add_argument('--list-requests', type=int, default=300)
+        parser.add_argument('--concurrency', type=int, default=16)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            legacy = seed(options['users'], 0, PASSWORD, prefix='bench-legacy', hasher='pbkdf2_sha256')
+            current = seed(options['users'], 5, PASSWORD, prefix='bench-login')
+            results = self.run(legacy, current, options)
+
+        # The local server is threaded; set GUNICORN_THREADS (or the pool sizes) to mirror production.
+        self.stdout.write(f"hasher: {settings.PASSWORD_HASHERS[0].rsplit('.', 1)[-1]}, "
+                          f"pool: {hashing_pool.workers} workers, queue {hashing_pool.queue_size}")
+        self.stdout.write(
+            f"{'scenario':<14} {'reqs':>6} {'429s':>6} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}"
+        )
+        for result in results:
+            row = result.summary()
+            self.stdout.write(
+                f"{row['label']:<14} {row['requests']:>6} {result.statuses[429]:>6} {row['errors']:>6} "
+                f"{row['req_per_s']:>8} {row['p50_ms']:>8} {row['p95_ms']:>8}"
+            )
+
+    def run(self, legacy, current, options):
+        concurrency = options['concurrency']
+
+        def logins(usernames):
+            return lambda i: ('POST', '/accounts/token/',
+                              {'username': usernames[i % len(usernames)], 'password': PASSWORD})
+
+        def list_tasks(i):
+            return ('GET', '/tasks/?page_size=20', None)
+
+        with local_server(project_wsgi_app()) as base_url:
+            cookies = login(base_url, current[0], PASSWORD)
+            results = [
+                run_load('list', base_url, list_tasks, options['list_requests'], concurrency, cookies=cookies),
+                # One login per legacy user: each verifies PBKDF2 and stores the new hash.
+                run_load('login-rehash', base_url, logins(legacy), len(legacy), concurrency),
+                run_load('login', base_url, logins(current), options['requests'], concurrency),
+            ]
+
+            flood = threading.Thread(target=run_load, args=(
+                'flood', base_url, logins(current), options['requests'] * 4, concurrency,
+            ))
+            flood.start()
+            results.append(run_load('list+logins', base_url, list_tasks, options['list_requests'],
+                                    concurrency, cookies=cookies))
+            flood.join()
+        return results
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from task_manager.throttling import LocalBucketStore, get_store, parse_rate
+from tasks.benchmarks import best_of
+
+
+class Command(BaseCommand):
+    help = "Measure the cost of one rate limit check against the in-memory and the configured bucket store."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=20000)
+        parser.add_argument('--keys', type=int, default=1000, help="Distinct users/addresses to spread checks over.")
+        parser.add_argument('--rate', default='600/min')
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        interval, burst = parse_rate(options['rate'])
+        checks, keys = options['checks'], options['keys']
+        stores = {'memory': LocalBucketStore()}
+        configured = get_store()
+        if not isinstance(configured, LocalBucketStore):
+            stores[type(configured).__name__] = configured
+
+        self.stdout.write(f"{'store':>18} {'per check':>10} {'checks/s':>10} {'limited':>8}")
+        for name, store in stores.items():
+            limited = 0
+
+            def run():
+                nonlocal limited
+                limited = 0
+                for n in range(checks):
+                    allowed, _ = store.take(f'rl:benchmark:{n % keys}', interval, burst, time.time())
+                    limited += not allowed
+
+            store.clear()
+            elapsed = best_of(options['repeat'], run)
+            self.stdout.write(
+                f"{name:>18} {elapsed / checks * 1e6:>8.1f}us {checks / elapsed:>10.0f} {limited:>8}"
+            )
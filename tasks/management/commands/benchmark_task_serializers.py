@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from tasks.benchmarks import benchmark_database, best_of, generated_tasks
+from tasks.serializers import Task_ReadSerializer, Task_Serializer
+from tasks.tags import tag_prefetch
+
+
+class Command(BaseCommand):
+    help = "Compare Task_Serializer against Task_ReadSerializer on generated rows in a throwaway test database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'rows':>8} {'model (s)':>10} {'values (s)':>11} {'speedup':>8}")
+        with benchmark_database():
+            for size in options['sizes']:
+                with generated_tasks(size) as queryset:
+                    reader = Task_ReadSerializer()
+                    # Both paths load tags the way the views do: one query, not one per row.
+                    model_path = best_of(options['repeat'], lambda: Task_Serializer(
+                        list(queryset.prefetch_related(tag_prefetch())), many=True).data)
+                    values_path = best_of(options['repeat'], lambda: reader.represent_many(
+                        reader.load_tags(list(reader.values(queryset)))))
+                self.stdout.write(f"{size:>8} {model_path:>10.3f} {values_path:>11.3f} {model_path / values_path:>7.1f}x")
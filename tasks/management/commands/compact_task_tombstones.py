@@ -0,0 +1,35 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks.changes import compact_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete task tombstones older than the retention period, in bounded batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.TASK_TOMBSTONE_RETENTION_DAYS,
+                            help="Keep tombstones this many days; older sync tokens get a 410.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--interval', type=int, default=0,
+                            help="Keep running and compact again every N seconds (0 runs once).")
+
+    def handle(self, *args, **options):
+        while True:
+            self.compact(timedelta(days=options['days']), options['batch_size'])
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def compact(self, older_than, batch_size):
+        total, batches, started = 0, 0, time.monotonic()
+        for deleted, elapsed in compact_tombstones(older_than, batch_size=batch_size):
+            total += deleted
+            batches += 1
+            self.stdout.write(f"batch {batches}: {deleted} rows in {elapsed * 1000:.1f} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {total} tombstones in {batches} batches ({time.monotonic() - started:.2f}s)."
+        ))
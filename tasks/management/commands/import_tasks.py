@@ -0,0 +1,57 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from task_manager.renderers import dumps
+from tasks.importer import FORMATS, ImportFormatError, TaskImporter, detect_format
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Import tasks for one user from a CSV or NDJSON file ('-' reads stdin)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--owner', required=True, help="Username the tasks are created for.")
+        parser.add_argument('--type', choices=FORMATS, help="File format; guessed from the extension by default.")
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--errors', help="Write every row error to this NDJSON file.")
+
+    def handle(self, *args, **options):
+        try:
+            owner = User.objects.get(username=options['owner'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['owner']!r}.")
+        try:
+            file_format = detect_format(options['path'], options['type'])
+        except ImportFormatError as exc:
+            raise CommandError(str(exc))
+
+        # No cap on kept errors when they go to a file.
+        importer = TaskImporter(owner, batch_size=options['batch_size'],
+                                max_errors=None if not options['errors'] else sys.maxsize)
+        if options['path'] == '-':
+            result = importer.run(sys.stdin.buffer, file_format)
+        else:
+            try:
+                stream = open(options['path'], 'rb')
+            except OSError as exc:
+                raise CommandError(str(exc))
+            with stream:
+                result = importer.run(stream, file_format)
+
+        report = result.as_dict()
+        if options['errors']:
+            with open(options['errors'], 'wb') as out:
+                for error in report['errors']:
+                    out.write(dumps(error) + b'\n')
+        else:
+            for error in report['errors']:
+                self.stderr.write(f"row {error['row']}: {dumps(error['errors']).decode()}")
+        rate = report['rows'] / report['seconds'] if report['seconds'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} of {report['rows']} rows ({report['failed']} failed) "
+            f"in {report['seconds']:.2f}s, {rate:.0f} rows/s."
+        ))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from tasks.loadtest import login, run_load
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the sync and async task list endpoints of running servers and "
+        "compare throughput and latency, e.g. gunicorn sync workers against uvicorn workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sync-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--async-url', default=None, help="Defaults to --sync-url.")
+        parser.add_argument('--username', required=True)
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=50)
+
+    def handle(self, *args, **options):
+        stacks = [
+            ('sync', options['sync_url'], '/tasks/'),
+            ('async', options['async_url'] or options['sync_url'], '/tasks/async/'),
+        ]
+        header = f"{'stack':<6} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        self.stdout.write(header)
+        for label, base_url, path in stacks:
+            cookies = login(base_url, options['username'], options['password'])
+            result = run_load(label, base_url, lambda i, path=path: ('GET', path, None),
+                              options['requests'], options['concurrency'], cookies=cookies)
+            row = result.summary()
+            self.stdout.write(
+                f"{label:<6} {row['requests']:>8} {row['errors']:>6} {row['req_per_s']:>8} "
+                f"{row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}"
+            )
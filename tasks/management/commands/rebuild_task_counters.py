@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tasks.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Rebuild the TaskCounter and TaskDueCounter tables used by /tasks/summary/ from the Tasks rows."
+
+    def handle(self, *args, **options):
+        rows = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} task counter rows."))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.sweeper import sweep_overdue
+
+
+class Command(BaseCommand):
+    help = "Mark pending tasks whose due date has passed as overdue, in bounded batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0,
+                            help="Seconds to sleep between batches to limit load on the database.")
+        parser.add_argument('--interval', type=int, default=0,
+                            help="Keep running and sweep again every N seconds (0 runs once).")
+
+    def handle(self, *args, **options):
+        while True:
+            self.sweep(options['batch_size'], options['pause'])
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def sweep(self, batch_size, pause):
+        total, batches, started = 0, 0, time.monotonic()
+        for changed, elapsed in sweep_overdue(batch_size=batch_size):
+            total += changed
+            batches += 1
+            self.stdout.write(f"batch {batches}: {changed} rows in {elapsed * 1000:.1f} ms")
+            if pause:
+                time.sleep(pause)
+        self.stdout.write(self.style.SUCCESS(
+            f"Marked {total} tasks overdue in {batches} batches ({time.monotonic() - started:.2f}s)."
+        ))
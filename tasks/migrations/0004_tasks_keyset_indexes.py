@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_tasks_due_date_tasks_owner_tasks_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tasks',
+            index=models.Index(fields=['owner', 'created_at', 'id'], name='tasks_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasks',
+            index=models.Index(fields=['owner', 'status', 'due_date'], name='tasks_owner_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasks',
+            index=models.Index(fields=['owner', 'due_date', 'id'], name='tasks_owner_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasks',
+            index=models.Index(fields=['created_at', 'id'], name='tasks_created_idx'),
+        ),
+    ]
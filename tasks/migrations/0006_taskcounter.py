@@ -0,0 +1,44 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_counters(apps, schema_editor):
+    Tasks = apps.get_model('tasks', 'Tasks')
+    TaskCounter = apps.get_model('tasks', 'TaskCounter')
+    rows = (
+        Tasks.objects.values('owner_id', 'status', 'category', 'due_date')
+        .annotate(total=models.Count('id'))
+        .order_by()
+    )
+    TaskCounter.objects.bulk_create(
+        (TaskCounter(owner_id=row['owner_id'], status=row['status'], category=row['category'],
+                     due_date=row['due_date'], count=row['total']) for row in rows.iterator() if row['owner_id']),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_taskversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=10)),
+                ('category', models.CharField(blank=True, max_length=100)),
+                ('due_date', models.DateField(blank=True, null=True)),
+                ('count', models.IntegerField(default=0)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', 'status', 'category', 'due_date'], name='taskcounter_key_idx')],
+            },
+        ),
+        migrations.RunPython(build_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_taskcounter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tasks',
+            index=models.Index(fields=['status', 'due_date', 'id'], name='tasks_status_due_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Kept in sync with tasks/search.py.
+PG_CREATE = (
+    "CREATE INDEX tasks_search_gin ON tasks_tasks USING GIN ("
+    "to_tsvector('english', coalesce(task, '') || ' ' || coalesce(description, '') || ' ' || coalesce(category, '')))"
+)
+PG_DROP = "DROP INDEX IF EXISTS tasks_search_gin"
+MYSQL_CREATE = "ALTER TABLE tasks_tasks ADD FULLTEXT INDEX tasks_search_ft (task, description, category)"
+MYSQL_DROP = "ALTER TABLE tasks_tasks DROP INDEX tasks_search_ft"
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(PG_CREATE)
+    elif vendor == 'mysql':
+        schema_editor.execute(MYSQL_CREATE)
+    else:
+        Tasks = apps.get_model('tasks', 'Tasks')
+        TaskSearchTerm = apps.get_model('tasks', 'TaskSearchTerm')
+        batch = []
+        for pk, task, description, category in Tasks.objects.values_list('pk', 'task', 'description', 'category').iterator():
+            text = ' '.join([task or '', description or '', category or '']).lower()
+            terms = {term[:64] for term in re.findall(r'\w+', text) if len(term) > 1}
+            batch.extend(TaskSearchTerm(task_id=pk, term=term) for term in terms)
+            if len(batch) >= 1000:
+                TaskSearchTerm.objects.bulk_create(batch)
+                batch = []
+        TaskSearchTerm.objects.bulk_create(batch)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(PG_DROP)
+    elif vendor == 'mysql':
+        schema_editor.execute(MYSQL_DROP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_tasks_status_due_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='tasks.tasks')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'task'], name='tasksearchterm_term_idx')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
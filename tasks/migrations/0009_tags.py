@@ -0,0 +1,37 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_tasksearchterm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_category', models.BooleanField(default=False)),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_tags', to='tasks.tag')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_tags', to='tasks.tasks')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tag', 'is_category', 'task'], name='tasktag_tag_idx')],
+                'constraints': [models.UniqueConstraint(fields=('task', 'tag', 'is_category'), name='tasktag_unique')],
+            },
+        ),
+        migrations.AddField(
+            model_name='tasks',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='tasks', through='tasks.TaskTag', to='tasks.tag'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations, transaction
+
+BATCH_SIZE = 2000
+
+
+def normalize(name):
+    # Same as tasks.tags.normalize_tag, frozen here for the migration.
+    return ' '.join(name.split()).lower()[:100]
+
+
+def backfill_category_tags(apps, schema_editor):
+    Tasks = apps.get_model('tasks', 'Tasks')
+    Tag = apps.get_model('tasks', 'Tag')
+    TaskTag = apps.get_model('tasks', 'TaskTag')
+    db = schema_editor.connection.alias
+
+    # Walk the table by primary key, one short transaction per batch, so
+    # no long-running transaction or table-wide lock is held.
+    last_pk = 0
+    while True:
+        rows = list(
+            Tasks.objects.using(db).filter(pk__gt=last_pk).exclude(category='')
+            .order_by('pk').values_list('pk', 'category')[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        categories = {pk: normalize(category) for pk, category in rows if normalize(category)}
+        with transaction.atomic(using=db):
+            names = set(categories.values())
+            Tag.objects.using(db).bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+            ids = dict(Tag.objects.using(db).filter(name__in=names).values_list('name', 'id'))
+            TaskTag.objects.using(db).bulk_create(
+                [TaskTag(task_id=pk, tag_id=ids[name], is_category=True) for pk, name in categories.items()],
+                ignore_conflicts=True,
+            )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0009_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_category_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_backfill_tags'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tasks',
+            index=models.Index(fields=['due_date', 'id'], name='tasks_due_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0011_tasks_due_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tasks',
+            name='change_seq',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='tasks',
+            index=models.Index(fields=['owner', 'change_seq', 'id'], name='tasks_owner_change_idx'),
+        ),
+        migrations.AddField(
+            model_name='taskversion',
+            name='compacted_through',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='TaskTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField()),
+                ('change_seq', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_tombstones', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['owner', 'change_seq', 'task_id'], name='tasktombstone_change_idx'),
+                    models.Index(fields=['deleted_at'], name='tasktombstone_deleted_idx'),
+                ],
+            },
+        ),
+    ]
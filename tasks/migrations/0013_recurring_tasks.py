@@ -0,0 +1,35 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0012_task_changes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tasks',
+            name='recurrence',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='tasks',
+            name='series',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='tasks.tasks'),
+        ),
+        migrations.AddField(
+            model_name='tasks',
+            name='occurrence_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='tasks',
+            index=models.Index(fields=['owner', 'recurrence'], name='tasks_owner_recurrence_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='tasks',
+            constraint=models.UniqueConstraint(fields=['series', 'occurrence_date'], name='tasks_occurrence_unique'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def clear_counters(apps, schema_editor):
+    # Rows merge once due_date leaves the key; they are rebuilt below.
+    apps.get_model('tasks', 'TaskCounter').objects.all().delete()
+
+
+def build_counters(apps, schema_editor):
+    Tasks = apps.get_model('tasks', 'Tasks')
+    TaskCounter = apps.get_model('tasks', 'TaskCounter')
+    TaskDueCounter = apps.get_model('tasks', 'TaskDueCounter')
+    rows = Tasks.objects.values('owner_id', 'status', 'category').annotate(total=models.Count('id')).order_by()
+    TaskCounter.objects.bulk_create(
+        (TaskCounter(owner_id=row['owner_id'], status=row['status'], category=row['category'], count=row['total'])
+         for row in rows.iterator() if row['owner_id']),
+        batch_size=1000,
+    )
+    rows = (
+        Tasks.objects.exclude(status='completed').filter(due_date__isnull=False)
+        .values('owner_id', 'due_date').annotate(total=models.Count('id')).order_by()
+    )
+    TaskDueCounter.objects.bulk_create(
+        (TaskDueCounter(owner_id=row['owner_id'], due_date=row['due_date'], count=row['total'])
+         for row in rows.iterator() if row['owner_id']),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0013_recurring_tasks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_counters, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='taskcounter',
+            name='taskcounter_key_idx',
+        ),
+        migrations.RemoveField(
+            model_name='taskcounter',
+            name='due_date',
+        ),
+        migrations.AddConstraint(
+            model_name='taskcounter',
+            constraint=models.UniqueConstraint(fields=('owner', 'status', 'category'), name='taskcounter_key_unique'),
+        ),
+        migrations.CreateModel(
+            name='TaskDueCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_due_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('owner', 'due_date'), name='taskduecounter_key_unique')],
+            },
+        ),
+        migrations.RunPython(build_counters, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -18,7 +18,146 @@ class Tasks(models.Model):
     updated_at = models.DateTimeField(blank=True, null=True)
     category = models.CharField(max_length=100,blank=True)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tasks')
+    tags = models.ManyToManyField('Tag', through='TaskTag', related_name='tasks', blank=True)
+    # The owner's TaskVersion at the write that last touched this row (see tasks/changes.py).
+    change_seq = models.BigIntegerField(default=0)
+    # A rule makes this a recurring template; series/occurrence_date mark a stored
+    # occurrence of one (see tasks/recurrence.py).
+    recurrence = models.CharField(max_length=255, blank=True, default='')
+    series = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='occurrences')
+    occurrence_date = models.DateField(blank=True, null=True)
+
+    class Meta:
+        # Composite indexes backing the keyset pagination in TaskListView,
+        # the overdue sweeper's (status, due_date) range scans and the admin filters.
+        indexes = [
+            models.Index(fields=['owner', 'created_at', 'id'], name='tasks_owner_created_idx'),
+            models.Index(fields=['owner', 'status', 'due_date'], name='tasks_owner_status_due_idx'),
+            models.Index(fields=['owner', 'due_date', 'id'], name='tasks_owner_due_idx'),
+            models.Index(fields=['created_at', 'id'], name='tasks_created_idx'),
+            models.Index(fields=['status', 'due_date', 'id'], name='tasks_status_due_idx'),
+            models.Index(fields=['due_date', 'id'], name='tasks_due_idx'),
+            models.Index(fields=['owner', 'change_seq', 'id'], name='tasks_owner_change_idx'),
+            models.Index(fields=['owner', 'recurrence'], name='tasks_owner_recurrence_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['series', 'occurrence_date'], name='tasks_occurrence_unique'),
+        ]
     
     def __str__(self):
         return f"{self.task} ({self.status})"
-    
+
+    # Signal handlers keep TaskVersion and TaskCounter in step with each write,
+    # running them inside the same transaction as the row itself.
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+
+# One row per owner, bumped on every write to their tasks. Cheap validator for
+# ETag / Last-Modified on the task endpoints (see tasks/versioning.py).
+class TaskVersion(models.Model):
+    owner = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='task_version')
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Highest change_seq of the owner's tombstones removed by compaction.
+    compacted_through = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.owner_id} v{self.version}"
+
+
+# Marks a deleted task for /tasks/changes/ until compact_tombstones() removes it.
+class TaskTombstone(models.Model):
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_tombstones')
+    task_id = models.BigIntegerField()
+    change_seq = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'change_seq', 'task_id'], name='tasktombstone_change_idx'),
+            models.Index(fields=['deleted_at'], name='tasktombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.owner_id}/{self.task_id} deleted at {self.change_seq}"
+
+
+# Denormalized task counts per (owner, status, category), kept up to date by
+# tasks/counters.py so /tasks/summary/ never has to count Tasks rows.
+class TaskCounter(models.Model):
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_counters')
+    status = models.CharField(max_length=10)
+    category = models.CharField(max_length=100, blank=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'status', 'category'], name='taskcounter_key_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.owner_id}/{self.status}/{self.category}: {self.count}"
+
+
+# Open (not completed) tasks per owner and due date, for the summary's
+# overdue / today / upcoming counts. Rows are removed once they reach zero.
+class TaskDueCounter(models.Model):
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_due_counters')
+    due_date = models.DateField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'due_date'], name='taskduecounter_key_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.owner_id}/{self.due_date}: {self.count}"
+
+
+# Inverted index used for ?q= search on databases without native full-text
+# search (SQLite in tests). MySQL and Postgres use FULLTEXT / GIN indexes instead.
+class TaskSearchTerm(models.Model):
+    task = models.ForeignKey(Tasks, on_delete=models.CASCADE, related_name='search_terms')
+    term = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'task'], name='tasksearchterm_term_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.task_id}"
+
+
+# Normalized tag names (see tasks/tags.py), shared by every owner's tasks.
+class Tag(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+# Links a task to its tags. Its category is stored here as well, with
+# is_category set, so ?category= and ?tags= are both index lookups.
+class TaskTag(models.Model):
+    task = models.ForeignKey(Tasks, on_delete=models.CASCADE, related_name='task_tags')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='task_tags')
+    is_category = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'tag', 'is_category'], name='tasktag_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'is_category', 'task'], name='tasktag_tag_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task_id} -> {self.tag_id}"
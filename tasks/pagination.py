@@ -0,0 +1,161 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import F, Q
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# Keyset pagination: the cursor carries the (sort value, id) of the last row on
+# the page, so the next page is a simple indexed range scan instead of an OFFSET.
+class TaskCursorPagination(BasePagination):
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    default_ordering = 'created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    # ordering name -> (field, descending, nullable)
+    orderings = {
+        'created_at': ('created_at', True, False),
+        'due_date': ('due_date', False, True),
+        'rank': ('rank', True, False),
+    }
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish_page(list(self.page_queryset(queryset, request)))
+
+    def page_queryset(self, queryset, request):
+        # Split from finish_page() so async views can evaluate the page themselves.
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+        field, descending, nullable = self.orderings[self.ordering]
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(self.keyset_filter(field, descending, nullable, *cursor))
+
+        # NULLS LAST and the isnull branch keep the (owner, field, id) index from
+        # being used, so they are only added for fields that can be NULL.
+        nulls_last = True if nullable else None
+        if descending:
+            queryset = queryset.order_by(F(field).desc(nulls_last=nulls_last), '-id')
+        else:
+            queryset = queryset.order_by(F(field).asc(nulls_last=nulls_last), 'id')
+
+        # Fetch one extra row to know whether there is a next page.
+        return queryset[:self.page_size + 1]
+
+    def finish_page(self, rows):
+        field = self.orderings[self.ordering][0]
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.last = self.row_key(rows[-1], field) if rows else None
+        return rows
+
+    def row_key(self, row, field):
+        # Rows are model instances, or dicts when the view reads with .values().
+        if isinstance(row, dict):
+            return row[field], row['id']
+        return getattr(row, field), row.pk
+
+    def get_ordering_field(self, request):
+        return self.orderings[self.get_ordering(request)][0]
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ])
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, request):
+        # Search results (?q=) carry a rank annotation and are ordered by it unless asked otherwise.
+        searching = bool(request.query_params.get('q', '').strip())
+        ordering = request.query_params.get(self.ordering_query_param)
+        if ordering in self.orderings and (ordering != 'rank' or searching):
+            return ordering
+        return 'rank' if searching else self.default_ordering
+
+    def keyset_filter(self, field, descending, nullable, value, pk):
+        # Rows with a NULL sort value are always ordered last.
+        if value is None:
+            return Q(**{f'{field}__isnull': True}) & (Q(id__lt=pk) if descending else Q(id__gt=pk))
+        op = 'lt' if descending else 'gt'
+        after = Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'id__{op}': pk})
+        if nullable:
+            after |= Q(**{f'{field}__isnull': True})
+        return after
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        value, pk = self.last
+        if value is not None and self.ordering != 'rank':
+            value = value.isoformat()
+        payload = {
+            'o': self.ordering,
+            'v': value,
+            'i': pk,
+        }
+        token = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.cursor_query_param, token)
+        if self.ordering == self.default_ordering:
+            return remove_query_param(url, self.ordering_query_param)
+        return replace_query_param(url, self.ordering_query_param, self.ordering)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            if payload['o'] != self.ordering:
+                raise ValueError
+            pk = int(payload['i'])
+            value = payload['v']
+            if value is not None:
+                value = self.parse_value(value)
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError, json.JSONDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+    def parse_value(self, value):
+        if self.ordering == 'rank':
+            return float(value)
+        if self.ordering == 'created_at':
+            parsed = parse_datetime(value)
+        else:
+            parsed = parse_date(value)
+        if parsed is None:
+            raise ValueError
+        return parsed
@@ -0,0 +1,244 @@
+"""
+Recurring tasks.
+
+A task with a ``recurrence`` rule is a template: its due_date is the first
+occurrence and the rule (an RFC 5545 RRULE subset) generates the rest. Those
+occurrences are computed on read and only stored as real Tasks rows, linked by
+``series`` / ``occurrence_date``, once someone edits or completes one.
+
+Supported: FREQ=DAILY|WEEKLY|MONTHLY|YEARLY with INTERVAL, COUNT, UNTIL, BYDAY
+(plain weekdays, no ordinals), BYMONTHDAY (negative counts from the month end)
+and BYMONTH, plus an optional ``EXDATE:`` line of dates to skip, e.g.
+
+    RRULE:FREQ=WEEKLY;BYDAY=MO,TH
+    EXDATE:20250609,20250612
+"""
+import calendar
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from django.utils import timezone
+
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+MAX_COUNT = 10000
+MAX_WINDOW_DAYS = 366
+
+
+class RecurrenceError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Rule:
+    freq: str
+    interval: int = 1
+    count: int = None
+    until: date = None
+    byday: frozenset = frozenset()
+    bymonthday: tuple = ()
+    bymonth: frozenset = frozenset()
+    exdates: frozenset = frozenset()
+
+
+def parse_date_value(value):
+    try:
+        return datetime.strptime(value[:8], '%Y%m%d').date()
+    except ValueError:
+        raise RecurrenceError(f"Invalid date: {value}")
+
+
+def parse_int(name, value, low, high):
+    try:
+        number = int(value)
+    except ValueError:
+        raise RecurrenceError(f"{name} must be a number.")
+    if not low <= abs(number) <= high:
+        raise RecurrenceError(f"{name} out of range: {value}")
+    return number
+
+
+def parse_rule(text):
+    """Parse a recurrence string into a Rule, raising RecurrenceError when it isn't valid."""
+    parts, exdates = None, set()
+    for line in text.strip().splitlines():
+        name, _, value = line.strip().partition(':')
+        if not value:
+            name, value = 'RRULE', name
+        name = name.upper()
+        if name == 'RRULE' and parts is None:
+            parts = value
+        elif name == 'EXDATE':
+            exdates.update(parse_date_value(item) for item in value.split(',') if item)
+        else:
+            raise RecurrenceError(f"Unexpected line: {line.strip()}")
+    if not parts:
+        raise RecurrenceError("RRULE is required.")
+
+    options = {}
+    for part in parts.split(';'):
+        key, _, value = part.partition('=')
+        if not value:
+            raise RecurrenceError(f"Invalid rule part: {part}")
+        options[key.upper()] = value.upper()
+
+    freq = options.pop('FREQ', None)
+    if freq not in FREQUENCIES:
+        raise RecurrenceError(f"FREQ must be one of: {', '.join(FREQUENCIES)}")
+    rule = {'freq': freq, 'exdates': frozenset(exdates)}
+    if 'INTERVAL' in options:
+        rule['interval'] = parse_int('INTERVAL', options.pop('INTERVAL'), 1, 1000)
+        if rule['interval'] < 1:
+            raise RecurrenceError("INTERVAL must be positive.")
+    if 'COUNT' in options:
+        rule['count'] = parse_int('COUNT', options.pop('COUNT'), 1, MAX_COUNT)
+        if rule['count'] < 1:
+            raise RecurrenceError("COUNT must be positive.")
+    if 'UNTIL' in options:
+        rule['until'] = parse_date_value(options.pop('UNTIL'))
+    if 'count' in rule and 'until' in rule:
+        raise RecurrenceError("COUNT and UNTIL can't be combined.")
+    if 'BYDAY' in options:
+        days = options.pop('BYDAY').split(',')
+        if any(day not in WEEKDAYS for day in days):
+            raise RecurrenceError("BYDAY takes weekdays like MO,WE,FR.")
+        rule['byday'] = frozenset(WEEKDAYS.index(day) for day in days)
+    if 'BYMONTHDAY' in options:
+        rule['bymonthday'] = tuple(sorted({
+            parse_int('BYMONTHDAY', day, 1, 31) for day in options.pop('BYMONTHDAY').split(',')
+        }))
+    if 'BYMONTH' in options:
+        rule['bymonth'] = frozenset(parse_int('BYMONTH', month, 1, 12) for month in options.pop('BYMONTH').split(','))
+        if min(rule['bymonth']) < 1:
+            raise RecurrenceError("BYMONTH must be positive.")
+    options.pop('WKST', None)
+    if options:
+        raise RecurrenceError(f"Unsupported rule parts: {', '.join(sorted(options))}")
+    return Rule(**rule)
+
+
+def month_days(year, month, days):
+    length = calendar.monthrange(year, month)[1]
+    for day in days:
+        day = day if day > 0 else length + day + 1
+        if 1 <= day <= length:
+            yield date(year, month, day)
+
+
+def add_months(year, month, months):
+    index = year * 12 + month - 1 + months
+    return index // 12, index % 12 + 1
+
+
+def period_dates(rule, start, period):
+    """Candidate dates of the ``period``-th interval after ``start``, in order."""
+    if rule.freq == 'DAILY':
+        yield start + timedelta(days=period * rule.interval)
+    elif rule.freq == 'WEEKLY':
+        monday = start - timedelta(days=start.weekday()) + timedelta(weeks=period * rule.interval)
+        for weekday in sorted(rule.byday or {start.weekday()}):
+            yield monday + timedelta(days=weekday)
+    elif rule.freq == 'MONTHLY':
+        year, month = add_months(start.year, start.month, period * rule.interval)
+        if rule.bymonthday:
+            days = sorted(month_days(year, month, rule.bymonthday))
+        elif rule.byday:
+            days = month_days(year, month, range(1, 32))
+        else:
+            days = month_days(year, month, [start.day])
+        yield from days
+    else:
+        year = start.year + period * rule.interval
+        for month in sorted(rule.bymonth or {start.month}):
+            yield from sorted(month_days(year, month, rule.bymonthday or [start.day]))
+
+
+def first_period(rule, start, window_start):
+    # The earliest period that can reach window_start; COUNT rules always start at 0.
+    if rule.count is not None or window_start <= start:
+        return 0
+    if rule.freq == 'DAILY':
+        days = (window_start - start).days
+    elif rule.freq == 'WEEKLY':
+        days = (window_start - start).days + start.weekday()
+        return days // (7 * rule.interval)
+    elif rule.freq == 'MONTHLY':
+        months = (window_start.year - start.year) * 12 + window_start.month - start.month
+        return months // rule.interval
+    else:
+        return (window_start.year - start.year) // rule.interval
+    return days // rule.interval
+
+
+def period_start(rule, start, period):
+    if rule.freq == 'DAILY':
+        return start + timedelta(days=period * rule.interval)
+    if rule.freq == 'WEEKLY':
+        return start - timedelta(days=start.weekday()) + timedelta(weeks=period * rule.interval)
+    if rule.freq == 'MONTHLY':
+        return date(*add_months(start.year, start.month, period * rule.interval), 1)
+    return date(start.year + period * rule.interval, 1, 1)
+
+
+def occurrences(rule, start, window_start, window_end):
+    """Yield the rule's occurrence dates from ``start`` that fall in [window_start, window_end]."""
+    end = min(window_end, rule.until) if rule.until else window_end
+    remaining = rule.count
+    period = first_period(rule, start, window_start)
+    while period_start(rule, start, period) <= end:
+        for day in period_dates(rule, start, period):
+            if day < start or day > end:
+                continue
+            if rule.byday and day.weekday() not in rule.byday:
+                continue
+            if rule.bymonth and rule.freq != 'YEARLY' and day.month not in rule.bymonth:
+                continue
+            if remaining is not None:
+                if remaining == 0:
+                    return
+                remaining -= 1
+            if day >= window_start and day not in rule.exdates:
+                yield day
+        period += 1
+
+
+def is_occurrence(rule, start, day):
+    return next(occurrences(rule, start, day, day), None) == day
+
+
+def occurrence_status(day, today=None):
+    # Matches what the overdue sweeper does to stored tasks.
+    return 'overdue' if day < (today or timezone.localdate()) else 'pending'
+
+
+def virtual_occurrences(templates, window_start, window_end, materialized=()):
+    """
+    ``templates`` are ``.values()`` rows including id, due_date and recurrence.
+    Yields ``(template, date)`` for every occurrence in the window that isn't
+    already stored (``materialized`` holds ``(series_id, occurrence_date)`` pairs).
+    """
+    materialized = set(materialized)
+    for template in templates:
+        if template['due_date'] is None:
+            continue
+        try:
+            rule = parse_rule(template['recurrence'])
+        except RecurrenceError:
+            continue
+        for day in occurrences(rule, template['due_date'], window_start, window_end):
+            if (template['id'], day) not in materialized:
+                yield template, day
+
+
+def occurrence_row(template, day, today=None):
+    """A generated occurrence shaped like a Task_ReadSerializer row of ``template``."""
+    return {
+        **template,
+        'id': None,
+        'status': occurrence_status(day, today),
+        'due_date': day,
+        'updated_at': None,
+        'recurrence': '',
+        'series': template['id'],
+        'occurrence_date': day,
+    }
@@ -0,0 +1,86 @@
+import re
+
+from django.db import connections, router
+from django.db.models import BooleanField, Count, FloatField, OuterRef, Subquery
+from django.db.models.expressions import RawSQL
+
+from .models import Tasks, TaskSearchTerm
+
+SEARCH_FIELDS = ('task', 'description', 'category')
+TERM_MAX_LENGTH = 64
+MAX_QUERY_TERMS = 16
+
+TABLE = Tasks._meta.db_table
+
+# Must stay identical to the expression indexed in migration 0008.
+PG_VECTOR = (
+    "to_tsvector('english', coalesce({t}.task, '') || ' ' || coalesce({t}.description, '') "
+    "|| ' ' || coalesce({t}.category, ''))"
+).format(t=f'"{TABLE}"')
+MYSQL_MATCH = "MATCH({t}.task, {t}.description, {t}.category) AGAINST (%s IN NATURAL LANGUAGE MODE)".format(
+    t=f'`{TABLE}`'
+)
+
+
+def tokenize(text):
+    return {term[:TERM_MAX_LENGTH] for term in re.findall(r'\w+', text.lower()) if len(term) > 1}
+
+
+def uses_native_index(using='default'):
+    return connections[using].vendor in ('postgresql', 'mysql')
+
+
+def search_tasks(queryset, q):
+    """Filter ``queryset`` to tasks matching ``q`` and annotate a ``rank`` (higher is better)."""
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'postgresql':
+        rank = RawSQL(f"ts_rank({PG_VECTOR}, websearch_to_tsquery('english', %s))", (q,), output_field=FloatField())
+        matches = RawSQL(f"{PG_VECTOR} @@ websearch_to_tsquery('english', %s)", (q,), output_field=BooleanField())
+        return queryset.alias(search_match=matches).filter(search_match=True).annotate(rank=rank)
+
+    if vendor == 'mysql':
+        rank = RawSQL(MYSQL_MATCH, (q,), output_field=FloatField())
+        return queryset.annotate(rank=rank).filter(rank__gt=0)
+
+    # Fallback for SQLite: rank by how many distinct query terms a task contains.
+    terms = sorted(tokenize(q))[:MAX_QUERY_TERMS]
+    if not terms:
+        return queryset.none()
+    hits = (
+        TaskSearchTerm.objects.filter(task=OuterRef('pk'), term__in=terms)
+        .order_by()
+        .values('task')
+        .annotate(hits=Count('term'))
+        .values('hits')
+    )
+    matching = TaskSearchTerm.objects.filter(term__in=terms).values('task')
+    return queryset.filter(pk__in=matching).annotate(
+        rank=Subquery(hits, output_field=FloatField())
+    )
+
+
+def index_tasks(tasks, created=False):
+    """
+    Rebuild the fallback inverted index rows for ``tasks`` (``created`` ones
+    have none yet). No-op on MySQL/Postgres.
+    """
+    tasks = [task for task in tasks if task.pk is not None]
+    if not tasks or uses_native_index():
+        return
+    if not created:
+        TaskSearchTerm.objects.filter(task__in=[task.pk for task in tasks]).delete()
+    rows = [
+        (task.pk, term)
+        for task in tasks
+        for term in tokenize(' '.join(getattr(task, field) or '' for field in SEARCH_FIELDS))
+    ]
+    # Several terms per task: building a model instance for each one cost more
+    # than the INSERT itself on large imports.
+    connection = connections[router.db_for_write(TaskSearchTerm)]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {quote(TaskSearchTerm._meta.db_table)} ({quote('task_id')}, {quote('term')}) VALUES (%s, %s)",
+            rows,
+        )
@@ -1,11 +1,173 @@
+from datetime import date
+
+from django.utils import timezone
 from rest_framework import serializers
+from task_manager.middleware import timed_serialization
+from .changes import stamp_changes
 from .models import Tasks
+from .recurrence import RecurrenceError, parse_rule
+from .tags import MAX_TAG_LENGTH, atag_names, normalize_tag, tag_names, tag_tasks
+
+
+class Task_ListSerializer(serializers.ListSerializer):
+    # many=True writes go through one bulk_create instead of one INSERT per item.
+    def create(self, validated_data):
+        tags = [item.pop('task_tags', None) for item in validated_data]
+        tasks = [Tasks(**item) for item in validated_data]
+        stamp_changes(tasks)
+        tasks = Tasks.objects.bulk_create(tasks)
+        tag_tasks(tasks, {task.pk: names for task, names in zip(tasks, tags) if names is not None}, created=True)
+        return tasks
+
+    def to_representation(self, data):
+        with timed_serialization():
+            return super().to_representation(data)
+
+
+class TagListField(serializers.ListField):
+    child = serializers.CharField(max_length=MAX_TAG_LENGTH)
+
+    def to_internal_value(self, data):
+        names = (normalize_tag(name) for name in super().to_internal_value(data))
+        return list(dict.fromkeys(name for name in names if name))
+
+    def to_representation(self, value):
+        # value is the task_tags manager; prefetch it with tags.tag_prefetch() for many tasks.
+        if 'task_tags' in getattr(value.instance, '_prefetched_objects_cache', {}):
+            return sorted(link.tag.name for link in value.all() if not link.is_category)
+        return list(value.filter(is_category=False).order_by('tag__name').values_list('tag__name', flat=True))
 
 
 class Task_Serializer(serializers.ModelSerializer):
+    tags = TagListField(source='task_tags', required=False)
+
     class Meta:
         model = Tasks
-        fields = "__all__"
-        read_only_fields = ("owner",)
-        
+        # change_seq is sync bookkeeping, served by /tasks/changes/ instead.
+        exclude = ("change_seq",)
+        read_only_fields = ("owner", "series", "occurrence_date")
+        list_serializer_class = Task_ListSerializer
+        # tasks_occurrence_unique only covers read-only fields the server sets, so
+        # the generated per-item lookup for it could never fail.
+        validators = []
+
+    def validate_recurrence(self, value):
+        value = value.strip()
+        if value:
+            try:
+                parse_rule(value)
+            except RecurrenceError as exc:
+                raise serializers.ValidationError(str(exc))
+        return value
+
+    def validate(self, attrs):
+        recurrence = attrs.get('recurrence', getattr(self.instance, 'recurrence', ''))
+        if recurrence:
+            # The template's due_date is the first occurrence.
+            if not attrs.get('due_date', getattr(self.instance, 'due_date', None)):
+                raise serializers.ValidationError({"due_date": ["Recurring tasks need a due date to start from."]})
+            if getattr(self.instance, 'series_id', None):
+                raise serializers.ValidationError({"recurrence": ["An occurrence can't recur itself."]})
+        return attrs
+
+    def to_representation(self, instance):
+        with timed_serialization():
+            return super().to_representation(instance)
+
+    def create(self, validated_data):
+        tags = validated_data.pop('task_tags', None)
+        task = super().create(validated_data)
+        if tags is not None:
+            tag_tasks([task], {task.pk: tags})
+        return task
+
+    def update(self, instance, validated_data):
+        tags = validated_data.pop('task_tags', None)
+        task = super().update(instance, validated_data)
+        if tags is not None:
+            tag_tasks([task], {task.pk: tags})
+        return task
+
+
+class Task_PatchSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    patch = serializers.DictField()
+
+
+def _datetime_converter(tz):
+    # Same output as DRF's DateTimeField with the default ISO 8601 format, with the
+    # timezone looked up once per serializer instead of once per value.
+    def convert(value):
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value, tz)
+        elif value.utcoffset() != tz.utcoffset(value):
+            value = value.astimezone(tz)
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+class Task_ReadSerializer:
+    """
+    Read-only counterpart of Task_Serializer for GET endpoints. Works on
+    ``.values()`` rows with one converter per field instead of DRF's per-field
+    ``to_representation`` on model instances, and supports sparse fieldsets.
+    """
+    # Same order as Task_Serializer's output, so both render identical JSON.
+    fields = ('id', 'tags', 'task', 'description', 'status', 'due_date', 'created_at', 'updated_at', 'category',
+              'recurrence', 'occurrence_date', 'owner', 'series')
+    datetime_fields = ('created_at', 'updated_at')
+
+    def __init__(self, fields=None):
+        if fields:
+            requested = [name.strip() for name in fields.split(',') if name.strip()]
+            unknown = [name for name in requested if name not in self.fields]
+            if unknown:
+                raise serializers.ValidationError({"fields": [f"Unknown field: {name}" for name in unknown]})
+            # Keep the usual field order regardless of how they were requested.
+            self.selected = tuple(name for name in self.fields if name in requested)
+        else:
+            self.selected = self.fields
+        to_datetime = _datetime_converter(timezone.get_current_timezone())
+        converters = {'due_date': date.isoformat, 'occurrence_date': date.isoformat, **{name: to_datetime for name in self.datetime_fields}}
+        self.plan = [(name, converters.get(name)) for name in self.selected]
+
+    def columns(self, *extra):
+        # Tags are not a column: load_tags() fetches them per page, keyed by id.
+        if 'tags' in self.selected:
+            extra += ('id',)
+        return tuple(name for name in dict.fromkeys(self.selected + extra) if name != 'tags')
+
+    def values(self, queryset, *extra):
+        return queryset.values(*self.columns(*extra))
+
+    def load_tags(self, rows):
+        if 'tags' in self.selected:
+            names = tag_names([row['id'] for row in rows])
+            for row in rows:
+                row['tags'] = names[row['id']]
+        return rows
+
+    async def aload_tags(self, rows):
+        if 'tags' in self.selected:
+            names = await atag_names([row['id'] for row in rows])
+            for row in rows:
+                row['tags'] = names[row['id']]
+        return rows
+
+    def to_representation(self, row):
+        with timed_serialization():
+            return self.represent(row)
+
+    def represent(self, row):
+        data = {}
+        for name, convert in self.plan:
+            value = row[name]
+            data[name] = convert(value) if convert is not None and value is not None else value
+        return data
 
+    def represent_many(self, rows):
+        with timed_serialization():
+            return [self.represent(row) for row in rows]
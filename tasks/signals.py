@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from .changes import record_deletes, stamp_changes
+from .counters import count_changed, count_created, count_deleted, counter_key
+from .events import publish_tasks
+from .models import Tasks
+from .search import index_tasks
+from .tags import tag_tasks
+
+User = get_user_model()
+
+
+@receiver(post_init, sender=Tasks)
+def remember_counter_key(sender, instance, **kwargs):
+    instance._counter_key = counter_key(instance)
+
+
+@receiver(pre_save, sender=Tasks)
+def stamp_change(sender, instance, **kwargs):
+    # Also bumps the owner's TaskVersion.
+    stamp_changes([instance])
+
+
+@receiver(post_save, sender=Tasks)
+def task_saved(sender, instance, created, **kwargs):
+    old_category = instance._counter_key[2]
+    if created:
+        count_created([instance])
+        instance._counter_key = counter_key(instance)
+    else:
+        count_changed([instance])
+    if created or old_category != instance.category:
+        tag_tasks([instance])
+    index_tasks([instance])
+    publish_tasks('created' if created else 'updated', [instance])
+
+
+def deleting_users(origin):
+    # origin is the instance or queryset delete() was called on.
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, User)
+
+
+@receiver(post_delete, sender=Tasks)
+def task_deleted(sender, instance, origin=None, **kwargs):
+    # Cascading from deleted users: their version and counter rows go too.
+    if deleting_users(origin):
+        return
+    count_deleted([instance])
+    record_deletes([instance])
+    publish_tasks('deleted', [instance])
@@ -0,0 +1,74 @@
+import logging
+import time
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from .changes import change_seq_case
+from .counters import apply_deltas
+from .events import publish
+from .models import Tasks
+
+logger = logging.getLogger(__name__)
+
+
+LOCKED_COLUMNS = ('id', 'owner_id', 'status', 'category', 'due_date')
+
+
+def flip_status(rows, status):
+    """
+    Set ``status`` on rows already locked by the caller (LOCKED_COLUMNS values)
+    with one UPDATE, stamping each owner's next change_seq, then apply the
+    matching counter deltas.
+    """
+    changed = Tasks.objects.filter(id__in=[row[0] for row in rows]).update(
+        status=status, change_seq=change_seq_case({row[1] for row in rows}),
+    )
+    deltas = Counter()
+    for _, owner_id, old_status, category, due_date in rows:
+        deltas[(owner_id, old_status, category, due_date)] -= 1
+        deltas[(owner_id, status, category, due_date)] += 1
+    apply_deltas(deltas)
+    for pk, owner_id, *_ in rows:
+        publish(owner_id, 'updated', {'id': pk, 'status': status})
+    return changed
+
+
+def change_status(queryset, status, batch_size=1000):
+    """Set ``status`` on every task in ``queryset``, ``batch_size`` rows per transaction."""
+    remaining = queryset.exclude(status=status).order_by('id')
+    total = 0
+    while True:
+        with transaction.atomic():
+            rows = list(remaining.select_for_update().values_list(*LOCKED_COLUMNS)[:batch_size])
+            if not rows:
+                return total
+            total += flip_status(rows, status)
+
+
+def sweep_overdue(batch_size=1000, today=None, max_batches=None):
+    """
+    Flip pending tasks whose due_date has passed to 'overdue', one bounded batch
+    at a time. Every batch walks the (status, due_date) index and updates rows by
+    primary key, so no statement touches more than ``batch_size`` rows.
+
+    Yields ``(rows_changed, seconds)`` for each batch.
+    """
+    today = today or timezone.localdate()
+    # Templates keep their first due date; their occurrences get a status on read.
+    due = Tasks.objects.filter(status='pending', due_date__lt=today, recurrence='').order_by('due_date', 'id')
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        started = time.monotonic()
+        with transaction.atomic():
+            rows = list(due.select_for_update().values_list(*LOCKED_COLUMNS)[:batch_size])
+            if not rows:
+                return
+            changed = flip_status(rows, 'overdue')
+
+        elapsed = time.monotonic() - started
+        batches += 1
+        logger.info("overdue sweep batch %d: %d rows in %.3fs", batches, changed, elapsed)
+        yield changed, elapsed
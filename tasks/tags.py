@@ -0,0 +1,100 @@
+from django.db import connections, router
+from django.db.models import Count, Prefetch, Q
+
+from .models import Tag, TaskTag
+
+MAX_TAG_LENGTH = 100
+
+
+def normalize_tag(name):
+    return ' '.join(str(name).split()).lower()[:MAX_TAG_LENGTH]
+
+
+def parse_tags(value):
+    # "a, B ,,c" -> ['a', 'b', 'c'], keeping the first occurrence of each.
+    return list(dict.fromkeys(tag for tag in map(normalize_tag, value.split(',')) if tag))
+
+
+def tag_ids(names):
+    """Map names to Tag ids, creating the missing tags. At most three queries."""
+    names = set(names)
+    if not names:
+        return {}
+    ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = names - ids.keys()
+    if missing:
+        Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        ids.update(Tag.objects.filter(name__in=missing).values_list('name', 'id'))
+    return ids
+
+
+def tag_tasks(tasks, tags=None, created=False):
+    """
+    Rewrite the TaskTag rows of ``tasks``: always their category row, plus the
+    plain tags of the tasks in ``tags`` ({task pk: [normalized names]}). Runs a
+    fixed number of queries however many tasks are passed; ``created`` tasks
+    have no rows to replace.
+    """
+    tasks = [task for task in tasks if task.pk is not None]
+    if not tasks:
+        return
+    tags = tags or {}
+    categories = {task.pk: normalize_tag(task.category or '') for task in tasks}
+    ids = tag_ids([name for name in categories.values() if name] + [name for names in tags.values() for name in names])
+
+    rows = []
+    for pk, category in categories.items():
+        if category:
+            rows.append((pk, ids[category], True))
+        rows.extend((pk, ids[name], False) for name in tags.get(pk, ()))
+
+    if not created:
+        stale = Q(task__in=list(categories), is_category=True)
+        if tags:
+            stale |= Q(task__in=list(tags), is_category=False)
+        TaskTag.objects.filter(stale).delete()
+    # Plain tuples, as in search.index_tasks: a model instance per link cost more than its INSERT.
+    connection = connections[router.db_for_write(TaskTag)]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {quote(TaskTag._meta.db_table)} ({quote('task_id')}, {quote('tag_id')}, {quote('is_category')}) "
+            "VALUES (%s, %s, %s)",
+            rows,
+        )
+
+
+def filter_by_tags(queryset, names, match_all=False, category=False):
+    """Tasks tagged with any (or, with ``match_all``, every) one of ``names``."""
+    names = set(names)
+    links = TaskTag.objects.filter(tag__name__in=names, is_category=category)
+    if match_all and len(names) > 1:
+        links = links.values('task').annotate(matched=Count('tag')).filter(matched=len(names))
+    return queryset.filter(id__in=links.values('task'))
+
+
+def tag_prefetch():
+    # For instances serialized by Task_Serializer: plain tags only, names in one query.
+    return Prefetch('task_tags', queryset=TaskTag.objects.filter(is_category=False).select_related('tag'))
+
+
+def tag_names(task_ids):
+    names = {pk: [] for pk in task_ids}
+    if not names:
+        return names
+    rows = (TaskTag.objects.filter(task_id__in=names, is_category=False)
+            .values_list('task_id', 'tag__name').order_by('tag__name'))
+    for pk, name in rows:
+        names[pk].append(name)
+    return names
+
+
+async def atag_names(task_ids):
+    names = {pk: [] for pk in task_ids}
+    if not names:
+        return names
+    rows = (TaskTag.objects.filter(task_id__in=names, is_category=False)
+            .values_list('task_id', 'tag__name').order_by('tag__name'))
+    async for pk, name in rows:
+        names[pk].append(name)
+    return names
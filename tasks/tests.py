@@ -1,9 +1,49 @@
-from rest_framework.test import APITestCase
+import importlib
+import json
+import os
+import tempfile
+import threading
+import time
+import environ
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta
+from io import BytesIO, StringIO
+from unittest.mock import patch
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+from django.utils.http import parse_http_date
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, connection, connections
+from django.db import router as django_router
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APITestCase
 from django.urls import reverse
 from tasks.views import TaskListView
 from django.contrib.auth import get_user_model
-from tasks.models import User, Tasks
-from rest_framework import status
+from tasks.models import User, Tasks, TaskCounter, TaskDueCounter, TaskTag, TaskTombstone, TaskVersion
+from tasks.serializers import Task_ReadSerializer, Task_Serializer
+from accounts.token_cache import token_cache
+from tasks.sweeper import sweep_overdue
+from tasks.counters import apply_deltas
+from tasks.events import RESET, LocalBroker
+from tasks.export import export_rows
+from tasks.recurrence import RecurrenceError, occurrences, parse_rule
+from task_manager.pagination import EstimatedCountPaginator
+from tasks.loadtest import percentile
+from tasks.management.commands.benchmark_api import Command as BenchmarkCommand
+from rest_framework import serializers, status
+from rest_framework.renderers import JSONRenderer
+from task_manager import renderers
+from task_manager.metrics import registry
+from task_manager.throttling import LocalBucketStore, get_store, gcra, parse_rate
+from task_manager.database import MYSQL_POOL_ENGINE, database_config
+from task_manager.db_pool import ConnectionPool, PoolTimeout
+from task_manager.db_router import PIN_COOKIE, ReplicaRouter, ReplicaRoutingMiddleware, replica_reads
 from rest_framework_simplejwt.tokens import RefreshToken
 
 
@@ -38,7 +78,7 @@ class TestTaskViews(APITestCase):
         self.authenticate(self.normal_user)
         response = self.client.get(self.url_get)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data[0]["task"], self.task_object.task)
+        self.assertEqual(response.data["results"][0]["task"], self.task_object.task)
 
     def test_post_object(self):
         self.authenticate(self.normal_user)
@@ -93,12 +133,1389 @@ class TestTaskViews(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class TestTaskPagination(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="page_user", password="Pass@122")
+        self.other = User.objects.create_user(username="other_user", password="Pass@122")
+        for i in range(7):
+            Tasks.objects.create(task=f"Task {i}", owner=self.user, due_date=f"2025-01-0{7 - i}")
+        Tasks.objects.create(task="No due date", owner=self.user)
+        Tasks.objects.create(task="Not mine", owner=self.other)
+        self.url = reverse("task_list")
+        self.client.force_authenticate(user=self.user)
+
+    def collect(self, url):
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(item["task"] for item in response.data["results"])
+            url = response.data["next"]
+        return seen
+
+    def test_pages_cover_all_rows_newest_first(self):
+        seen = self.collect(f"{self.url}?page_size=3")
+        expected = list(Tasks.objects.filter(owner=self.user).order_by("-created_at", "-id").values_list("task", flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_due_date_ordering_puts_nulls_last(self):
+        seen = self.collect(f"{self.url}?page_size=3&ordering=due_date")
+        self.assertEqual(seen[0], "Task 6")
+        self.assertEqual(seen[-1], "No due date")
+        self.assertEqual(len(seen), 8)
+
+    def test_created_at_pages_skip_null_handling(self):
+        first = self.client.get(f"{self.url}?page_size=3")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first.data["next"])
+        page_sql = next(q["sql"] for q in queries.captured_queries if "ORDER BY" in q["sql"] and "created_at" in q["sql"])
+        self.assertNotIn("IS NULL", page_sql)
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(f"{self.url}?page_size=100000")
+        self.assertEqual(len(response.data["results"]), 8)
+        self.assertIsNone(response.data["next"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f"{self.url}?cursor=garbage")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestTaskExport(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="export_user", password="Pass@122")
+        self.other = User.objects.create_user(username="other_user", password="Pass@122")
+        Tasks.objects.create(task="Pending task", owner=self.user, due_date="2025-03-01")
+        Tasks.objects.create(task="Done task", owner=self.user, status="completed")
+        Tasks.objects.create(task="Not mine", owner=self.other)
+        self.url = reverse("task_export")
+        self.client.force_authenticate(user=self.user)
+
+    def test_ndjson_matches_serializer(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        expected = Task_Serializer(Tasks.objects.filter(owner=self.user).order_by("id"), many=True).data
+        self.assertEqual(rows, [dict(item) for item in expected])
+
+    def test_csv_with_filters(self):
+        response = self.client.get(f"{self.url}?type=csv&status=completed")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:2], ["id", "task"])
+        self.assertEqual(len(lines), 2)
+        self.assertIn("Done task", lines[1])
+
+    def test_rows_are_read_in_keyset_batches(self):
+        Tasks.objects.bulk_create([Tasks(task=f"Extra {i}", owner=self.user) for i in range(3)])
+        queryset = Tasks.objects.filter(owner=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(export_rows(queryset, chunk_size=2))
+        self.assertEqual([row["id"] for row in rows], list(queryset.order_by("id").values_list("id", flat=True)))
+        # Three batches of rows and their tags, plus the empty batch that ends the walk.
+        self.assertEqual(len(queries), 7)
+
+    def test_unknown_type(self):
+        response = self.client.get(f"{self.url}?type=xml")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestTaskBulk(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="bulk_user", password="Pass@122")
+        self.other = User.objects.create_user(username="other_user", password="Pass@122")
+        self.mine = Tasks.objects.create(task="Mine", owner=self.user)
+        self.theirs = Tasks.objects.create(task="Theirs", owner=self.other)
+        self.url = reverse("task_bulk")
+        self.client.force_authenticate(user=self.user)
+
+    def test_bulk_create(self):
+        data = [{"task": f"Imported {i}", "category": "import"} for i in range(5)]
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(Tasks.objects.filter(owner=self.user, category="import").count(), 5)
+
+    def test_bulk_create_query_count_is_constant(self):
+        counts = []
+        for size in (2, 50):
+            data = [{"task": f"Imported {i}"} for i in range(size)]
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(self.url, data, format='json')
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_bulk_create_reports_item_errors(self):
+        data = [{"task": "Good"}, {"task": ""}]
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("task", response.data[1])
+        self.assertFalse(Tasks.objects.filter(task="Good").exists())
+
+    def test_bulk_update(self):
+        data = [{"id": self.mine.pk, "patch": {"status": "completed"}}]
+        response = self.client.patch(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.mine.refresh_from_db()
+        self.assertEqual(self.mine.status, "completed")
+
+    def test_bulk_update_other_users_task_fails(self):
+        data = [
+            {"id": self.mine.pk, "patch": {"status": "completed"}},
+            {"id": self.theirs.pk, "patch": {"status": "completed"}},
+        ]
+        response = self.client.patch(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("id", response.data[1])
+        self.mine.refresh_from_db()
+        self.assertEqual(self.mine.status, "pending")
+
+    def test_bulk_delete(self):
+        response = self.client.delete(self.url, {"ids": [self.mine.pk, self.theirs.pk]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{"id": self.mine.pk, "deleted": True}, {"id": self.theirs.pk, "deleted": False}])
+        self.assertTrue(Tasks.objects.filter(pk=self.theirs.pk).exists())
+
+    def test_empty_batch_rejected(self):
+        response = self.client.post(self.url, [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(RATE_LIMITS={"ENABLED": False})
+class TestTaskImport(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="import_user", password="Pass@122")
+        self.url = reverse("task_import")
+        self.client.force_authenticate(user=self.user)
+
+    def upload(self, name, content, query=""):
+        upload = SimpleUploadedFile(name, content.encode())
+        return self.client.post(f"{self.url}{query}", {"file": upload}, format="multipart")
+
+    def test_csv_import(self):
+        content = (
+            "id,task,status,due_date,category,owner,tags\n"
+            "99,First,pending,2025-03-01,work,123,\"a, B\"\n"
+            ",,pending,,,,\n"
+            ",Second,completed,,,,\n"
+            ",Third,nonsense,,,,\n"
+        )
+        response = self.upload("tasks.csv", content)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data["rows"], response.data["created"], response.data["failed"]), (4, 2, 2))
+        self.assertEqual([error["row"] for error in response.data["errors"]], [2, 4])
+        self.assertIn("task", response.data["errors"][0]["errors"])
+        self.assertIn("status", response.data["errors"][1]["errors"])
+
+        first = Tasks.objects.get(task="First")
+        self.assertEqual(first.owner, self.user)
+        self.assertNotEqual(first.pk, 99)
+        self.assertEqual(str(first.due_date), "2025-03-01")
+        tags = set(TaskTag.objects.filter(task=first, is_category=False).values_list("tag__name", flat=True))
+        self.assertEqual(tags, {"a", "b"})
+        self.assertEqual(sum(TaskCounter.objects.filter(owner=self.user).values_list("count", flat=True)), 2)
+
+    def test_ndjson_import_in_batches(self):
+        lines = [json.dumps({"task": f"Task {i}", "category": "bulk"}) for i in range(25)]
+        lines.insert(10, "not json")
+        lines.insert(20, json.dumps(["a list"]))
+        response = self.upload("tasks.ndjson", "\n".join(lines) + "\n\n")
+        self.assertEqual(response.data["created"], 25)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [11, 21])
+        self.assertEqual(Tasks.objects.filter(owner=self.user, category="bulk").count(), 25)
+
+        with self.settings(TASK_IMPORT={"BATCH_SIZE": 4, "MAX_ERRORS": 1}):
+            response = self.upload("more.jsonl", "\n".join(lines))
+        self.assertEqual((response.data["created"], response.data["failed"]), (25, 2))
+        self.assertEqual(len(response.data["errors"]), 1)
+        self.assertTrue(response.data["errors_truncated"])
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.post(self.url, {}, format="multipart").status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.upload("tasks.txt", "task\nx\n").status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.upload("tasks.txt", "task\nx\n", "?type=csv")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.upload("tasks.csv", "task\n\"\"\n")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["failed"], 1)
+
+    def test_batch_falls_back_to_rows(self):
+        from tasks.importer import TaskImporter
+        importer = TaskImporter(self.user, batch_size=10)
+        original = importer.insert
+
+        def insert(validated):
+            if any(data["task"] == "Broken" for data in validated):
+                raise DatabaseError("broken row")
+            return original(validated)
 
+        importer.insert = insert
+        content = "task\nOne\nBroken\nTwo\n"
+        result = importer.run(BytesIO(content.encode()), "csv")
+        self.assertEqual((result.created, result.failed), (2, 1))
+        self.assertEqual(result.errors[0]["row"], 2)
+        self.assertEqual(set(Tasks.objects.filter(owner=self.user).values_list("task", flat=True)), {"One", "Two"})
+
+    def test_lean_validation_matches_serializer(self):
+        from tasks.importer import TaskImporter
+        importer = TaskImporter(self.user)
+        rows = [
+            {"id": "7", "task": " Plain ", "status": "completed", "due_date": "2025-03-01", "tags": ["A ", "a", "b"]},
+            {"task": "Dated", "updated_at": "2025-03-01T10:00:00Z", "due_date": None, "recurrence": ""},
+            {"task": "Blank", "description": "", "category": "", "unknown": "1"},
+            {"task": "Repeats", "due_date": "2025-03-01", "recurrence": "RRULE:FREQ=DAILY;INTERVAL=2"},
+            {"task": 5},
+        ]
+        for item in rows:
+            data = importer.lean_validate(item)
+            self.assertIsNotNone(data)
+            self.assertEqual(data, dict(importer.serializer.child.run_validation(item)))
+
+        for item in [
+            {"task": "Repeats", "recurrence": "FREQ=DAILY"},
+            {"task": "Repeats", "due_date": "2025-03-01", "recurrence": "nonsense"},
+            {"task": ""},
+            {"task": "x" * 300},
+            {"task": "Odd", "status": "nonsense"},
+            {"task": "Odd", "due_date": "03/01/2025"},
+            {"task": "Odd", "tags": [""]},
+            {"task": "Odd\x00"},
+            {"description": "no task"},
+        ]:
+            self.assertIsNone(importer.lean_validate(item), item)
+
+    def test_serializer_rules_apply_to_every_row(self):
+        from tasks.importer import TaskImporter
+
+        def validate_task(serializer, value):
+            if value == "Forbidden":
+                raise serializers.ValidationError("Not allowed.")
+            return value
+
+        with patch.object(Task_Serializer, "validate_task", validate_task, create=True):
+            result = TaskImporter(self.user).run(BytesIO(b"task\nAllowed\nForbidden\n"), "csv")
+        self.assertEqual((result.created, result.failed), (1, 1))
+        self.assertEqual(result.errors[0]["errors"], {"task": ["Not allowed."]})
+
+    def test_executemany_insert_without_returning_ids(self):
+        from tasks.importer import TaskImporter
+        with patch.object(type(connection.features), "can_return_rows_from_bulk_insert", False):
+            result = TaskImporter(self.user).run(BytesIO(b"task,tags\nOne,a\nTwo,\n"), "csv")
+        self.assertEqual(result.created, 2)
+        one = Tasks.objects.get(owner=self.user, task="One")
+        self.assertIsNotNone(one.created_at)
+        self.assertEqual(list(TaskTag.objects.filter(task=one).values_list("tag__name", flat=True)), ["a"])
+
+    def test_import_matches_api_create(self):
+        self.client.post(reverse("task_create"), {"task": "Api", "tags": ["x"], "category": "c"}, format="json")
+        self.upload("tasks.csv", "task,tags,category\nCsv,x,c\n")
+        api, imported = Tasks.objects.filter(owner=self.user).order_by("id")
+        self.assertEqual(imported.change_seq, api.change_seq + 1)
+        self.assertIsNotNone(imported.created_at)
+        self.assertEqual(
+            list(TaskTag.objects.filter(task=imported).values_list("tag_id", "is_category")),
+            list(TaskTag.objects.filter(task=api).values_list("tag_id", "is_category")),
+        )
+        self.assertEqual(TaskCounter.objects.get(owner=self.user, category="c").count, 2)
+        response = self.client.get(reverse("task_list"), {"q": "csv"})
+        self.assertEqual([task["task"] for task in response.data["results"]], ["Csv"])
+
+    def test_command(self):
+        path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), "tasks.csv")
+        with open(path, "w") as f:
+            f.write("task,category\nFrom file,cli\n,cli\n")
+        out, err = StringIO(), StringIO()
+        call_command("import_tasks", path, owner="import_user", stdout=out, stderr=err)
+        self.assertIn("Imported 1 of 2 rows (1 failed)", out.getvalue())
+        self.assertIn("row 2:", err.getvalue())
+        self.assertTrue(Tasks.objects.filter(owner=self.user, task="From file", category="cli").exists())
+        with self.assertRaises(CommandError):
+            call_command("import_tasks", path, owner="nobody", stdout=out)
+
+
+class TestTaskConditionalRequests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="etag_user", password="Pass@122")
+        self.task = Tasks.objects.create(task="Cached", owner=self.user)
+        self.list_url = reverse("task_list")
+        self.detail_url = reverse("task_detail", kwargs={'pk': self.task.pk})
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_not_modified(self):
+        etag = self.client.get(self.list_url)["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_write_changes_etag(self):
+        etag = self.client.get(self.list_url)["ETag"]
+        Tasks.objects.create(task="Another", owner=self.user)
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_delete_changes_etag(self):
+        etag = self.client.get(self.list_url)["ETag"]
+        Tasks.objects.filter(pk=self.task.pk).delete()
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_cache(self):
+        caches["task_list"].clear()
+        hits = (("cache", "task_list"), ("result", "hit"))
+        before = registry.cache.series[hits]
+        first = self.client.get(self.list_url, {"status": "pending", "page_size": 10})
+        with self.assertNumQueries(1):
+            second = self.client.get(self.list_url, {"page_size": 10, "status": "pending"})
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(registry.cache.series[hits], before + 1)
+
+        Tasks.objects.create(task="Fresh", owner=self.user)
+        third = self.client.get(self.list_url, {"status": "pending", "page_size": 10})
+        self.assertEqual(len(third.data["results"]), 2)
+
+    def test_list_cache_is_per_user(self):
+        caches["task_list"].clear()
+        self.client.get(self.list_url)
+        other = User.objects.create_user(username="other_etag_user", password="Pass@122")
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(self.list_url).data["results"], [])
+
+    def test_detail_not_modified(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_match_rejects_stale_edit(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        first = self.client.patch(self.detail_url, {"status": "completed"}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        second = self.client.patch(self.detail_url, {"status": "pending"}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(second.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        third = self.client.patch(self.detail_url, {"status": "pending"}, format='json', HTTP_IF_MATCH=first["ETag"])
+        self.assertEqual(third.status_code, status.HTTP_200_OK)
+
+    def test_bulk_create_changes_etag(self):
+        etag = self.client.get(self.list_url)["ETag"]
+        self.client.post(reverse("task_bulk"), [{"task": "Bulk"}], format='json')
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TestTaskSummary(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="summary_user", password="Pass@122")
+        self.other = User.objects.create_user(username="other_user", password="Pass@122")
+        self.admin = User.objects.create_superuser(username="admin", password="Adminadmin@122")
+        today = timezone.localdate()
+        self.late = Tasks.objects.create(task="Late", owner=self.user, category="work", due_date=today - timedelta(days=2))
+        Tasks.objects.create(task="Today", owner=self.user, category="work", due_date=today)
+        Tasks.objects.create(task="Done", owner=self.user, status="completed", category="home")
+        Tasks.objects.create(task="Not mine", owner=self.other, category="work")
+        self.url = reverse("task_summary")
+
+    def summary(self, user):
+        self.client.force_authenticate(user=user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_owner_summary(self):
+        data = self.summary(self.user)
+        self.assertEqual(data["total"], 3)
+        self.assertEqual(data["status"], {"pending": 2, "completed": 1, "overdue": 0})
+        self.assertEqual(data["category"], {"work": 2, "home": 1})
+        self.assertEqual(data["due"], {"overdue": 1, "today": 1, "upcoming": 0, "no_due_date": 0})
+
+    def test_staff_sees_everyone(self):
+        self.assertEqual(self.summary(self.admin)["total"], 4)
+
+    def test_counters_follow_updates_and_deletes(self):
+        self.late.status = "completed"
+        self.late.save()
+        Tasks.objects.filter(task="Today").delete()
+        data = self.summary(self.user)
+        self.assertEqual(data["status"]["completed"], 2)
+        self.assertEqual(data["due"]["overdue"], 0)
+        self.assertEqual(data["total"], 2)
+
+    def test_counters_follow_bulk_endpoint(self):
+        self.client.force_authenticate(user=self.user)
+        self.client.post(reverse("task_bulk"), [{"task": "A", "category": "bulk"}, {"task": "B", "category": "bulk"}], format='json')
+        self.client.patch(reverse("task_bulk"), [{"id": self.late.pk, "patch": {"category": "bulk"}}], format='json')
+        data = self.summary(self.user)
+        self.assertEqual(data["category"]["bulk"], 3)
+        self.assertEqual(data["category"]["work"], 1)
+
+    def test_counter_rows_are_upserted_and_pruned(self):
+        today = timezone.localdate()
+        apply_deltas({(self.user.pk, "pending", "work", today): 1})
+        self.assertEqual(TaskCounter.objects.get(owner=self.user, status="pending", category="work").count, 3)
+        self.assertEqual(TaskDueCounter.objects.get(owner=self.user, due_date=today).count, 2)
+
+        apply_deltas({(self.user.pk, "pending", "work", today): -1})
+        Tasks.objects.filter(owner=self.user, category="work").delete()
+        self.assertFalse(TaskCounter.objects.filter(owner=self.user, category="work").exists())
+        self.assertFalse(TaskDueCounter.objects.filter(owner=self.user).exists())
+        self.assertEqual(self.summary(self.user)["total"], 1)
+
+    def test_rebuild_command(self):
+        expected = self.summary(self.user)
+        TaskCounter.objects.all().delete()
+        call_command("rebuild_task_counters", stdout=StringIO())
+        self.assertEqual(self.summary(self.user), expected)
+
+
+class TestOverdueSweeper(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="sweep_user", password="Pass@122")
+        today = timezone.localdate()
+        for i in range(5):
+            Tasks.objects.create(task=f"Late {i}", owner=self.user, due_date=today - timedelta(days=i + 1))
+        Tasks.objects.create(task="Done late", owner=self.user, status="completed", due_date=today - timedelta(days=1))
+        Tasks.objects.create(task="Future", owner=self.user, due_date=today + timedelta(days=1))
+        Tasks.objects.create(task="No due date", owner=self.user)
+
+    def test_sweep_in_batches(self):
+        batches = list(sweep_overdue(batch_size=2))
+        self.assertEqual([changed for changed, _ in batches], [2, 2, 1])
+        self.assertEqual(Tasks.objects.filter(status="overdue").count(), 5)
+        self.assertEqual(Tasks.objects.filter(status="pending").count(), 2)
+
+    def test_sweep_updates_counters(self):
+        list(sweep_overdue())
+        self.client.force_authenticate(user=self.user)
+        data = self.client.get(reverse("task_summary")).data
+        self.assertEqual(data["status"], {"pending": 2, "completed": 1, "overdue": 5})
+
+    def test_command(self):
+        out = StringIO()
+        call_command("sweep_overdue_tasks", "--batch-size", "3", stdout=out)
+        self.assertIn("Marked 5 tasks overdue in 2 batches", out.getvalue())
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse("task_list") + "?status=overdue")
+        self.assertEqual(len(response.data["results"]), 5)
+
+
+class TestTaskSearch(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="search_user", password="Pass@122")
+        self.other = User.objects.create_user(username="other_user", password="Pass@122")
+        Tasks.objects.create(task="Buy milk", description="and bread", category="shopping", owner=self.user)
+        Tasks.objects.create(task="Write report", description="quarterly report for the team", category="work", owner=self.user)
+        Tasks.objects.create(task="Report bug", description="milk carton icon is broken", category="work", owner=self.user)
+        Tasks.objects.create(task="Buy milk", owner=self.other)
+        self.url = reverse("task_list")
+        self.client.force_authenticate(user=self.user)
+
+    def titles(self, query):
+        response = self.client.get(self.url, {"q": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["task"] for item in response.data["results"]]
+
+    def test_search_matches_all_fields_for_owner_only(self):
+        self.assertEqual(sorted(self.titles("milk")), ["Buy milk", "Report bug"])
+        self.assertEqual(self.titles("shopping"), ["Buy milk"])
+
+    def test_results_ranked_by_matching_terms(self):
+        self.assertEqual(self.titles("report milk")[0], "Report bug")
+
+    def test_search_paginates(self):
+        response = self.client.get(self.url, {"q": "report milk", "page_size": 1})
+        seen = [response.data["results"][0]["task"]]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            seen.extend(item["task"] for item in response.data["results"])
+        self.assertEqual(len(seen), 3)
+        self.assertEqual(len(set(seen)), 3)
+
+    def test_index_follows_edits(self):
+        task = Tasks.objects.get(task="Write report")
+        task.description = "renamed"
+        task.task = "Something else"
+        task.save()
+        self.assertNotIn("Something else", self.titles("report"))
+        self.assertEqual(self.titles("renamed"), ["Something else"])
+
+    def test_bulk_created_tasks_are_searchable(self):
+        self.client.post(reverse("task_bulk"), [{"task": "Imported gadget"}], format='json')
+        self.assertEqual(self.titles("gadget"), ["Imported gadget"])
+
+
+class TestTaskReadSerializer(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="read_user", password="Pass@122")
+        self.task = Tasks.objects.create(task="Read me", description="details", category="c", owner=self.user,
+                                         due_date="2025-05-01", updated_at=timezone.now())
+        Tasks.objects.create(task="Plain", owner=self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_matches_model_serializer(self):
+        response = self.client.get(reverse("task_list"))
+        expected = Task_Serializer(Tasks.objects.order_by("-created_at", "-id"), many=True).data
+        self.assertEqual(json.dumps(json.loads(response.content)["results"]), json.dumps(expected))
+
+    def test_detail_matches_model_serializer(self):
+        response = self.client.get(reverse("task_detail", kwargs={'pk': self.task.pk}))
+        self.assertEqual(json.dumps(json.loads(response.content)), json.dumps(Task_Serializer(self.task).data))
+
+    def test_sparse_fieldsets(self):
+        response = self.client.get(reverse("task_list"), {"fields": "status,task"})
+        self.assertEqual(list(response.data["results"][0]), ["task", "status"])
+        response = self.client.get(reverse("task_detail", kwargs={'pk': self.task.pk}), {"fields": "id"})
+        self.assertEqual(response.data, {"id": self.task.pk})
+
+    def test_unknown_field(self):
+        response = self.client.get(reverse("task_list"), {"fields": "password"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_missing_detail(self):
+        response = self.client.get(reverse("task_detail", kwargs={'pk': 999999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        # The test database is already throwaway; don't create another one inside it.
+        with patch("tasks.management.commands.benchmark_task_serializers.benchmark_database", nullcontext):
+            call_command("benchmark_task_serializers", "--sizes", "10", "--repeat", "1", stdout=out)
+        self.assertEqual(out.getvalue().split("\n")[1].split()[0], "10")
+
+
+class TestFastJSON(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="json_user", password="Pass@122")
+        Tasks.objects.create(task="Unicode ✓", description="naïve", owner=self.user, due_date="2025-02-03")
+        self.client.force_authenticate(user=self.user)
+
+    def test_renders_same_document_as_drf(self):
+        data = Task_Serializer(Tasks.objects.all(), many=True).data
+        fast = renderers.FastJSONRenderer().render(data)
+        self.assertEqual(json.loads(fast), json.loads(JSONRenderer().render(data)))
+
+    def test_native_dates(self):
+        now = timezone.now().replace(microsecond=0)
+        body = renderers.dumps({"day": now.date(), "at": now})
+        self.assertEqual(json.loads(body), {"day": now.date().isoformat(), "at": now.isoformat().replace("+00:00", "Z")})
+
+    def test_fallback_without_orjson(self):
+        with patch.object(renderers, "orjson", None):
+            response = self.client.post(reverse("task_create"), {"task": "Fallback"}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(json.loads(response.content)["task"], "Fallback")
+            self.assertEqual(b"".join(renderers.iter_json_array(iter([1, 2, 3]), chunk_size=2)), b"[1,2,3]")
+
+    def test_invalid_body(self):
+        response = self.client.post(reverse("task_create"), b"{not json", content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_streamed_json_export(self):
+        response = self.client.get(reverse("task_export"), {"type": "json"})
+        rows = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([row["task"] for row in rows], ["Unicode ✓"])
+
+
+class TestAsyncTaskViews(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        get_store().clear()
+        self.user = User.objects.create_user(username="async_user", password="Pass@122")
+        self.other = User.objects.create_user(username="other_user", password="Pass@122")
+        self.task = Tasks.objects.create(task="Async task", owner=self.user, due_date="2025-04-01")
+        Tasks.objects.create(task="Not mine", owner=self.other)
+        self.client = AsyncClient()
+        self.client.cookies["access_token"] = str(RefreshToken.for_user(self.user).access_token)
+
+    async def test_list_matches_sync_view(self):
+        response = await self.client.get(reverse("async_task_list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = json.loads(response.content)["results"]
+        self.assertEqual([item["task"] for item in results], ["Async task"])
+        self.assertEqual(results[0]["due_date"], "2025-04-01")
+
+    async def test_create_update_delete(self):
+        response = await self.client.post(reverse("async_task_create"), {"task": "Created async"}, content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        pk = json.loads(response.content)["id"]
+        url = reverse("async_task_detail", kwargs={"pk": pk})
+
+        response = await self.client.patch(url, {"status": "completed"}, content_type="application/json")
+        self.assertEqual(json.loads(response.content)["status"], "completed")
+        response = await self.client.get(url)
+        self.assertEqual(json.loads(response.content)["status"], "completed")
+
+        response = await self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(await Tasks.objects.filter(pk=pk).aexists())
+
+    async def test_validation_errors(self):
+        response = await self.client.post(reverse("async_task_create"), {"task": ""}, content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("task", json.loads(response.content))
+
+    async def test_other_users_task_is_404(self):
+        other = await Tasks.objects.aget(task="Not mine")
+        response = await self.client.get(reverse("async_task_detail", kwargs={"pk": other.pk}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_requires_cookie(self):
+        self.client.cookies.clear()
+        response = await self.client.get(reverse("async_task_list"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(REST_FRAMEWORK={
+        "DEFAULT_THROTTLE_RATES": {"task_create.user": "2/h", "task_create.ip": "100/h", "task_detail.user": "1/h"},
+    })
+    async def test_rate_limited_like_sync_views(self):
+        url = reverse("async_task_create")
+        for _ in range(2):
+            response = await self.client.post(url, {"task": "Spam"}, content_type="application/json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = await self.client.post(url, {"task": "Spam"}, content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "1800")
+        self.assertIn("detail", json.loads(response.content))
+
+        detail = reverse("async_task_detail", kwargs={"pk": self.task.pk})
+        self.assertEqual((await self.client.get(detail)).status_code, status.HTTP_200_OK)
+        self.assertEqual((await self.client.get(detail)).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # The list has a bucket of its own, with no rate configured here.
+        self.assertEqual((await self.client.get(reverse("async_task_list"))).status_code, status.HTTP_200_OK)
+
+
+class TestTaskEvents(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username="events_user", password="Pass@122")
+        self.broker = LocalBroker(replay_size=3)
+        patcher = patch("tasks.events._broker", self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = AsyncClient()
+        self.client.cookies["access_token"] = str(RefreshToken.for_user(self.user).access_token)
 
+    async def next_chunk(self, response):
+        return (await anext(response.streaming_content)).decode()
 
+    async def collect(self, owner_id, last_event_id):
+        events = []
+        subscription = self.broker.subscribe(owner_id, last_event_id, heartbeat=0.01)
+        async for event in subscription:
+            if event is None:
+                break
+            events.append(event)
+        await subscription.aclose()
+        return events
+
+    async def test_replay_from_last_event_id(self):
+        subscription = self.broker.subscribe(1)
+        for n in range(3):
+            self.broker.publish(1, "created", {"id": n})
+        await subscription.aclose()
+        first = self.broker.buffers[1][0]
+        events = await self.collect(1, first.id)
+        self.assertEqual([event.data["id"] for event in events], [1, 2])
+        self.assertNotIn(1, self.broker.subscribers)
+        # Nothing was buffered for an owner without a stream, so it can't resume.
+        self.assertEqual(await self.collect(2, first.id), [RESET])
+
+    async def test_reset_when_replay_cannot_reach_back(self):
+        subscription = self.broker.subscribe(1)
+        for n in range(5):
+            self.broker.publish(1, "created", {"id": n})
+        await subscription.aclose()
+        self.assertEqual(await self.collect(1, f"{self.broker.epoch}-1"), [RESET])
+        # Ids from another process (e.g. before a restart) can't be resumed either.
+        self.assertEqual(await self.collect(1, "0000-4"), [RESET])
+
+    async def test_buffers_only_while_streams_are_open(self):
+        self.broker.retention = 0
+        self.broker.publish(1, "created", {"id": 1})
+        self.assertEqual(self.broker.buffers, {})
+
+        subscription = self.broker.subscribe(1)
+        self.broker.publish(1, "created", {"id": 2})
+        self.assertEqual(len(self.broker.buffers[1]), 1)
+        await subscription.aclose()
+        await subscription.aclose()
+        self.assertEqual(self.broker.subscribers, {})
+
+        # Past the retention the next publish drops the buffer.
+        self.broker.publish(1, "created", {"id": 3})
+        self.assertEqual((self.broker.buffers, self.broker.evicted, self.broker.idle), ({}, {}, {}))
+
+    async def test_stream_delivers_live_and_missed_events(self):
+        response = await self.client.get(reverse("task_events"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertTrue((await self.next_chunk(response)).startswith("retry:"))
+
+        self.broker.publish(self.user.pk, "updated", {"id": 7, "status": "completed"})
+        self.broker.publish(self.user.pk + 1, "updated", {"id": 8})
+        chunk = await self.next_chunk(response)
+        event_id = self.broker.buffers[self.user.pk][0].id
+        self.assertEqual(chunk, f'id: {event_id}\nevent: updated\ndata: {{"id":7,"status":"completed"}}\n\n')
+        await response.streaming_content.aclose()
+
+        self.broker.publish(self.user.pk, "deleted", {"id": 7})
+        response = await self.client.get(reverse("task_events"), headers={"Last-Event-ID": event_id})
+        await self.next_chunk(response)
+        self.assertIn("event: deleted", await self.next_chunk(response))
+        await response.streaming_content.aclose()
+
+    async def test_requires_cookie(self):
+        self.client.cookies.clear()
+        response = await self.client.get(reverse("task_events"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_writes_publish_after_commit(self):
+        async def listen():
+            # Only owners with a stream are buffered.
+            self.broker.subscribe(self.user.pk)
+
+        async_to_sync(listen)()
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Tasks.objects.create(task="Pushed", owner=self.user, due_date="2025-04-01")
+        with self.captureOnCommitCallbacks(execute=True):
+            task.status = "completed"
+            task.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            task.delete()
+        events = list(self.broker.buffers[self.user.pk])
+        self.assertEqual([event.type for event in events], ["created", "updated", "deleted"])
+        self.assertEqual(events[0].data["task"], "Pushed")
+        self.assertEqual(events[0].data["due_date"], "2025-04-01")
+        self.assertEqual(events[1].data["status"], "completed")
+        self.assertEqual(events[2].data, {"id": events[0].data["id"]})
+
+    def test_sync_server_is_501(self):
+        self.client = self.client_class()
+        self.client.cookies["access_token"] = str(RefreshToken.for_user(self.user).access_token)
+        response = self.client.get(reverse("task_events"))
+        self.assertEqual(response.status_code, 501)
+
+
+class TestTaskChanges(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="sync_user", password="Pass@122")
+        self.other = User.objects.create_user(username="other_user", password="Pass@122")
+        self.tasks = [Tasks.objects.create(task=f"Task {i}", owner=self.user) for i in range(3)]
+        Tasks.objects.create(task="Theirs", owner=self.other)
+        self.url = reverse("task_changes")
+        self.client.force_authenticate(user=self.user)
+
+    def sync(self, since=None, **params):
+        if since is not None:
+            params["since"] = since
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def sync_all(self, since=None, page_size=2):
+        results, deleted = [], []
+        while True:
+            data = self.sync(since, page_size=page_size)
+            results += data["results"]
+            deleted += data["deleted"]
+            since = data["token"]
+            if not data["has_more"]:
+                return results, deleted, since
+
+    def test_full_sync_then_deltas(self):
+        results, deleted, token = self.sync_all()
+        self.assertEqual([item["task"] for item in results], ["Task 0", "Task 1", "Task 2"])
+        self.assertEqual(deleted, [])
+        self.assertEqual(self.sync(token)["results"], [])
+
+        self.client.patch(reverse("task_detail", kwargs={"pk": self.tasks[0].pk}), {"status": "completed"}, format="json")
+        self.client.delete(reverse("task_detail", kwargs={"pk": self.tasks[1].pk}))
+        self.client.post(reverse("task_bulk"), [{"task": "New 1"}, {"task": "New 2"}], format="json")
+        Tasks.objects.create(task="Theirs too", owner=self.other)
+
+        results, deleted, token = self.sync_all(token)
+        self.assertEqual([(item["task"], item["status"]) for item in results],
+                         [("Task 0", "completed"), ("New 1", "pending"), ("New 2", "pending")])
+        self.assertEqual(deleted, [self.tasks[1].pk])
+        self.assertEqual(self.sync(token), {"results": [], "deleted": [], "token": token, "has_more": False})
+
+    def test_bulk_and_sweeper_writes_are_stamped(self):
+        token = self.sync()["token"]
+        self.client.patch(reverse("task_bulk"), [{"id": self.tasks[2].pk, "patch": {"tags": ["x"]}}], format="json")
+        Tasks.objects.filter(pk=self.tasks[0].pk).update(status="pending", due_date=timezone.localdate() - timedelta(days=1))
+        list(sweep_overdue())
+        results, _, _ = self.sync_all(token)
+        self.assertEqual([(item["task"], item["status"], item["tags"]) for item in results],
+                         [("Task 2", "pending", ["x"]), ("Task 0", "overdue", [])])
+
+    def test_compaction_expires_old_tokens(self):
+        token = self.sync()["token"]
+        self.tasks[0].delete()
+        fresh = self.sync(token)["token"]
+        self.tasks[1].delete()
+
+        out = StringIO()
+        call_command("compact_task_tombstones", "--days", "0", stdout=out)
+        self.assertIn("Deleted 2 tombstones", out.getvalue())
+        self.assertFalse(TaskTombstone.objects.exists())
+
+        self.assertEqual(self.client.get(self.url, {"since": token}).status_code, status.HTTP_410_GONE)
+        self.assertEqual(self.client.get(self.url, {"since": fresh}).status_code, status.HTTP_410_GONE)
+        # A new full sync is not affected by what was compacted before it.
+        results, deleted, token = self.sync_all(page_size=1)
+        self.assertEqual([item["task"] for item in results], ["Task 2"])
+        self.assertEqual(self.sync(token)["deleted"], [])
+
+    def test_invalid_token(self):
+        response = self.client.get(self.url, {"since": "nope"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestRecurrenceRules(TestCase):
+    def dates(self, rule, start, window_start, window_end):
+        return [day.isoformat() for day in occurrences(parse_rule(rule), date.fromisoformat(start),
+                                                      date.fromisoformat(window_start), date.fromisoformat(window_end))]
+
+    def test_frequencies(self):
+        self.assertEqual(self.dates("RRULE:FREQ=DAILY;INTERVAL=3", "2025-01-01", "2025-03-01", "2025-03-07"),
+                         ["2025-03-02", "2025-03-05"])
+        self.assertEqual(self.dates("FREQ=WEEKLY;BYDAY=MO,TH", "2025-06-04", "2025-06-01", "2025-06-16"),
+                         ["2025-06-05", "2025-06-09", "2025-06-12", "2025-06-16"])
+        self.assertEqual(self.dates("FREQ=MONTHLY;BYMONTHDAY=-1", "2025-01-31", "2025-02-01", "2025-04-30"),
+                         ["2025-02-28", "2025-03-31", "2025-04-30"])
+        # Months without a 31st are skipped, as in RFC 5545.
+        self.assertEqual(self.dates("FREQ=MONTHLY", "2025-01-31", "2025-01-01", "2025-05-31"),
+                         ["2025-01-31", "2025-03-31", "2025-05-31"])
+        self.assertEqual(self.dates("FREQ=YEARLY", "2024-02-29", "2024-01-01", "2028-12-31"),
+                         ["2024-02-29", "2028-02-29"])
+
+    def test_count_until_and_exdate(self):
+        rule = "RRULE:FREQ=DAILY;COUNT=5\nEXDATE:20250103"
+        self.assertEqual(self.dates(rule, "2025-01-01", "2025-01-02", "2025-12-31"),
+                         ["2025-01-02", "2025-01-04", "2025-01-05"])
+        self.assertEqual(self.dates("FREQ=WEEKLY;UNTIL=20250115", "2025-01-01", "2025-01-01", "2025-12-31"),
+                         ["2025-01-01", "2025-01-08", "2025-01-15"])
+
+    def test_invalid_rules(self):
+        for rule in ("", "FREQ=HOURLY", "FREQ=DAILY;BYDAY=XX", "FREQ=DAILY;COUNT=2;UNTIL=20250101",
+                     "FREQ=DAILY;BYSETPOS=1", "FREQ=DAILY;INTERVAL=0"):
+            with self.assertRaises(RecurrenceError, msg=rule):
+                parse_rule(rule)
+
+
+class TestRecurringTasks(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="recurring_user", password="Pass@122")
+        self.client.force_authenticate(user=self.user)
+        self.today = timezone.localdate()
+        response = self.client.post(reverse("task_create"), {
+            "task": "Water plants", "category": "home", "tags": ["garden"],
+            "due_date": self.today.isoformat(), "recurrence": "RRULE:FREQ=DAILY;INTERVAL=2",
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.template = Tasks.objects.get(pk=response.data["id"])
+        Tasks.objects.create(task="One-off", owner=self.user, due_date=self.today + timedelta(days=2))
+
+    def due_on(self, day, **params):
+        response = self.client.get(reverse("task_list"), {"due_date": day.isoformat(), **params})
+        return [(item["task"], item["id"], item["series"]) for item in response.data["results"]]
+
+    def test_due_date_filter_generates_occurrences(self):
+        day = self.today + timedelta(days=2)
+        self.assertEqual(self.due_on(day), [("Water plants", None, self.template.pk), ("One-off", self.tasks_id("One-off"), None)])
+        self.assertEqual(self.due_on(self.today + timedelta(days=1)), [])
+        self.assertEqual(self.due_on(day, category="work"), [])
+        self.assertEqual(self.due_on(day, status="completed"), [])
+        # Nothing but the template and the one-off task is stored.
+        self.assertEqual(Tasks.objects.count(), 2)
+
+    def tasks_id(self, name):
+        return Tasks.objects.get(task=name).pk
+
+    def test_completing_an_occurrence_stores_it(self):
+        day = self.today + timedelta(days=4)
+        url = reverse("task_occurrence", kwargs={"pk": self.template.pk, "date": day.isoformat()})
+        response = self.client.patch(url, {"status": "completed"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data["status"], response.data["tags"]), ("completed", ["garden"]))
+        self.assertEqual(self.client.patch(url, {"task": "Water plants well"}, format="json").status_code, status.HTTP_200_OK)
+
+        stored = Tasks.objects.get(series=self.template)
+        self.assertEqual((stored.due_date, stored.occurrence_date, stored.category), (day, day, "home"))
+        results = self.client.get(reverse("task_list"), {"due_date": day.isoformat()}).data["results"]
+        self.assertEqual([(item["id"], item["task"]) for item in results], [(stored.pk, "Water plants well")])
+
+        response = self.client.get(reverse("task_occurrences", kwargs={"pk": self.template.pk}),
+                                   {"from": self.today.isoformat(), "to": day.isoformat()})
+        self.assertEqual([(item["due_date"], item["id"]) for item in response.data], [
+            (self.today.isoformat(), None), ((self.today + timedelta(days=2)).isoformat(), None), (day.isoformat(), stored.pk),
+        ])
+
+    def test_occurrence_must_be_on_the_rule(self):
+        url = reverse("task_occurrence", kwargs={"pk": self.template.pk, "date": (self.today + timedelta(days=1)).isoformat()})
+        self.assertEqual(self.client.patch(url, {"status": "completed"}, format="json").status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_past_occurrences_are_overdue_and_templates_are_not_swept(self):
+        self.template.due_date = self.today - timedelta(days=4)
+        self.template.save()
+        list(sweep_overdue())
+        self.template.refresh_from_db()
+        self.assertEqual(self.template.status, "pending")
+        results = self.client.get(reverse("task_list"), {"due_date": (self.today - timedelta(days=2)).isoformat()}).data["results"]
+        self.assertEqual([item["status"] for item in results], ["overdue"])
+
+    def test_occurrence_pages_change_with_the_date(self):
+        params = {"due_date": (self.today + timedelta(days=2)).isoformat()}
+        response = self.client.get(reverse("task_list"), params)
+        self.assertEqual(response.data["results"][0]["status"], "pending")
+        etag = response["ETag"]
+
+        later = self.today + timedelta(days=3)
+        with patch("django.utils.timezone.localdate", return_value=later):
+            response = self.client.get(reverse("task_list"), params, HTTP_IF_NONE_MATCH=etag)
+        # Neither the ETag nor the list cache may hand back yesterday's page.
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["status"], "overdue")
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertGreaterEqual(parse_http_date(response["Last-Modified"]),
+                                timezone.make_aware(datetime.combine(later, datetime.min.time())).timestamp())
+
+    def test_validation(self):
+        response = self.client.post(reverse("task_create"), {"task": "Bad", "recurrence": "FREQ=DAILY"}, format="json")
+        self.assertIn("due_date", response.data)
+        response = self.client.post(reverse("task_create"), {"task": "Bad", "due_date": "2025-01-01",
+                                                               "recurrence": "FREQ=SOMETIMES"}, format="json")
+        self.assertIn("recurrence", response.data)
+
+
+class TestRateLimits(APITestCase):
+    def setUp(self):
+        get_store().clear()
+        self.user = User.objects.create_user(username="limited_user", password="Pass@122")
+        self.other = User.objects.create_user(username="other_user", password="Pass@122")
+        self.client.force_authenticate(user=self.user)
+
+    def test_token_bucket(self):
+        self.assertEqual(parse_rate("60/min"), (1.0, 60))
+        self.assertEqual(parse_rate("10/s;burst=3"), (0.1, 3))
+        store = LocalBucketStore()
+        interval, burst = parse_rate("1/s;burst=2")
+        self.assertEqual([store.take("k", interval, burst, 100.0)[0] for _ in range(3)], [True, True, False])
+        self.assertEqual(store.take("k", interval, burst, 100.25), (False, 0.75))
+        # One token refills per interval.
+        self.assertEqual(store.take("k", interval, burst, 101.0), (True, 0.0))
+        self.assertFalse(store.take("k", interval, burst, 101.0)[0])
+        self.assertEqual(gcra(None, 5.0, 1.0, 1), (True, 6.0, 0.0))
+
+    @override_settings(REST_FRAMEWORK={
+        "DEFAULT_THROTTLE_CLASSES": ("task_manager.throttling.UserRateThrottle", "task_manager.throttling.IPRateThrottle"),
+        "DEFAULT_THROTTLE_RATES": {"task_create.user": "2/h", "task_create.ip": "100/h"},
+    })
+    def test_create_is_limited_per_user(self):
+        url = reverse("task_create")
+        for _ in range(2):
+            self.assertEqual(self.client.post(url, {"task": "Spam"}).status_code, status.HTTP_201_CREATED)
+        response = self.client.post(url, {"task": "Spam"})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "1800")
+        # Other views and other users have their own buckets.
+        self.assertEqual(self.client.get(reverse("task_list")).status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(user=self.other)
+        self.assertEqual(self.client.post(url, {"task": "Fine"}).status_code, status.HTTP_201_CREATED)
+
+        metrics = registry.render()
+        self.assertIn('rate_limit_checks_total{scope="task_create.user",result="limited"}', metrics)
+        self.assertIn('rate_limit_check_seconds_count{scope="task_create.user"}', metrics)
+
+    @override_settings(RATE_LIMITS={"ENABLED": False}, REST_FRAMEWORK={
+        "DEFAULT_THROTTLE_CLASSES": ("task_manager.throttling.UserRateThrottle",),
+        "DEFAULT_THROTTLE_RATES": {"task_create.user": "1/h"},
+    })
+    def test_can_be_disabled(self):
+        for _ in range(3):
+            self.assertEqual(self.client.post(reverse("task_create"), {"task": "Ok"}).status_code, status.HTTP_201_CREATED)
+
+
+class TestUserDeletion(APITestCase):
+    def test_deleting_users_cascades_cleanly(self):
+        users = [User.objects.create_user(username=f"gone{i}", password="Pass@122") for i in range(2)]
+        for user in users:
+            Tasks.objects.create(task="Soon gone", owner=user)
+        users[0].delete()
+        User.objects.filter(pk=users[1].pk).delete()
+        self.assertFalse(Tasks.objects.exists())
+        self.assertFalse(TaskCounter.objects.exists())
+
+
+class TestBenchmarkBaseline(TestCase):
+    def row(self, **overrides):
+        return {"requests": 100, "errors": 0, "req_per_s": 100.0, "p50_ms": 10.0, "p95_ms": 20.0,
+                "p99_ms": 30.0, "queries_per_request": 2.0, **overrides}
+
+    def test_percentile(self):
+        self.assertEqual(percentile([0.1 * i for i in range(1, 101)], 99), 0.1 * 99)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_regressions_fail(self):
+        command = BenchmarkCommand(stdout=StringIO())
+        command.compare({"list": self.row(p95_ms=21.0)}, {"list": self.row()}, tolerance=0.25)
+        with self.assertRaisesMessage(CommandError, "queries/request"):
+            command.compare({"list": self.row(queries_per_request=3.0)}, {"list": self.row()}, tolerance=0.25)
+        with self.assertRaisesMessage(CommandError, "req/s"):
+            command.compare({"list": self.row(req_per_s=50.0)}, {"list": self.row()}, tolerance=0.25)
+
+    def test_missing_baseline_fails(self):
+        missing = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), "baseline.json")
+        with self.assertRaisesMessage(CommandError, "No baseline"):
+            call_command("benchmark_api", "--baseline", missing, stdout=StringIO())
+
+
+@override_settings(REQUEST_METRICS={"ENABLED": True, "DETECT_N_PLUS_ONE": True, "N_PLUS_ONE_THRESHOLD": 3})
+class TestRequestMetrics(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="metrics_user", password="Pass@122")
+        self.tasks = [Tasks.objects.create(task=f"Measured {i}", owner=self.user) for i in range(3)]
+        self.client.force_authenticate(user=self.user)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse("task_list"))
+        timing = response["Server-Timing"]
+        # Version check, page, tags for the page.
+        self.assertIn('desc="3 queries"', timing)
+        self.assertIn("render;dur=", timing)
+        self.assertIn("total;dur=", timing)
+
+    def test_serializer_time_is_measured(self):
+        represent = Task_ReadSerializer.represent
+
+        def slow(reader, row):
+            time.sleep(0.01)
+            return represent(reader, row)
+
+        with patch.object(Task_ReadSerializer, "represent", slow):
+            timing = self.client.get(reverse("task_list"))["Server-Timing"]
+        durations = dict(part.split(";")[:2] for part in timing.split(", "))
+        self.assertGreaterEqual(float(durations["serialize"].removeprefix("dur=")), 30)
+        detail = self.client.get(reverse("task_detail", kwargs={"pk": self.tasks[0].pk}))
+        self.assertIn("serialize;dur=", detail["Server-Timing"])
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse("task_list"))
+        self.client.force_login(User.objects.create_user(username="staff", password="Pass@122", is_staff=True))
+        body = self.client.get(reverse("metrics")).content.decode()
+        self.assertIn('http_requests_total{route="tasks/",method="GET",status="200"}', body)
+        self.assertIn('http_request_queries_bucket{route="tasks/",method="GET",le="2"}', body)
+        self.assertIn('http_request_serialize_seconds_count{route="tasks/",method="GET"} 1', body)
+
+    def test_metrics_need_staff_token_or_allowed_ip(self):
+        url = reverse("metrics")
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        config = {"ENABLED": True, "TOKEN": "scrape-secret", "ALLOWED_IPS": ["10.0.0.5"]}
+        with self.settings(REQUEST_METRICS=config):
+            self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION="Bearer wrong").status_code, status.HTTP_403_FORBIDDEN)
+            self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION="Bearer scrape-secret").status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get(url, REMOTE_ADDR="10.0.0.5").status_code, status.HTTP_200_OK)
+
+    async def test_async_requests_are_measured(self):
+        token_cache.clear()
+        client = AsyncClient()
+        client.cookies["access_token"] = str(RefreshToken.for_user(self.user).access_token)
+        response = await client.get(reverse("async_task_list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('desc="0 queries"', response["Server-Timing"])
+
+    def test_logs_repeated_queries(self):
+        with self.assertLogs("task_manager.middleware", level="WARNING") as logs:
+            self.client.delete(reverse("task_bulk"), {"ids": [task.pk for task in self.tasks]}, format='json')
+        self.assertTrue(any("Possible N+1" in line for line in logs.output))
+
+    @override_settings(REQUEST_METRICS={"ENABLED": False})
+    def test_disabled(self):
+        self.assertNotIn("Server-Timing", self.client.get(reverse("task_list")))
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestReplicaRouting(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter(replicas=["replica_0", "replica_1"])
+        patcher = patch.object(django_router, "routers", [self.router])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = RequestFactory()
+
+    def read_alias(self, request):
+        seen = []
+
+        def view(request):
+            seen.append(Tasks.objects.all().db)
+            seen.append(TaskVersion.objects.all().db)
+            if request.method == "POST":
+                django_router.db_for_write(Tasks)
+                seen.append(Tasks.objects.all().db)
+            return HttpResponse()
+
+        with patch("task_manager.db_router.replica_aliases", return_value=self.router.replicas):
+            response = ReplicaRoutingMiddleware(view)(request)
+        return seen, response
+
+    def test_each_request_stays_on_one_replica(self):
+        with patch("task_manager.db_router.replica_aliases", return_value=self.router.replicas):
+            middleware = ReplicaRoutingMiddleware(None)
+        requests = []
+        for _ in range(4):
+            seen = []
+
+            def view(request):
+                seen.extend([Tasks.objects.all().db, TaskVersion.objects.all().db, Tasks.objects.all().db])
+                return HttpResponse()
+
+            middleware.get_response = view
+            response = middleware(self.factory.get("/tasks/"))
+            self.assertEqual(len(set(seen)), 1)
+            self.assertNotIn(PIN_COOKIE, response.cookies)
+            requests.append(seen[0])
+        # Successive requests still spread over the replicas.
+        self.assertEqual(requests, ["replica_0", "replica_1", "replica_0", "replica_1"])
+
+    async def test_async_requests_are_routed(self):
+        seen = []
+
+        async def view(request):
+            seen.append(Tasks.objects.all().db)
+            return HttpResponse()
+
+        with patch("task_manager.db_router.replica_aliases", return_value=self.router.replicas):
+            middleware = ReplicaRoutingMiddleware(view)
+        await middleware(self.factory.get("/tasks/"))
+        self.assertEqual(seen, ["replica_0"])
+
+    def test_writes_stay_on_primary_and_pin_client(self):
+        seen, response = self.read_alias(self.factory.post("/tasks/create/"))
+        self.assertEqual(seen, ["default", "default", "default"])
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        request = self.factory.get("/tasks/")
+        request.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+        seen, _ = self.read_alias(request)
+        self.assertEqual(seen, ["default", "default"])
+
+    def test_reads_after_write_in_request_use_primary(self):
+        with replica_reads("replica_1"):
+            self.assertEqual(Tasks.objects.all().db, "replica_1")
+            django_router.db_for_write(Tasks)
+            self.assertEqual(Tasks.objects.all().db, "default")
+
+    def test_other_apps_and_commands_use_primary(self):
+        from django.contrib.contenttypes.models import ContentType
+        with replica_reads("replica_0"):
+            self.assertEqual(ContentType.objects.all().db, "default")
+        self.assertEqual(Tasks.objects.all().db, "default")
+        self.assertFalse(self.router.allow_migrate("replica_0", "tasks"))
+
+
+@override_settings(READ_REPLICAS=["replica_0"])
+class TestReplicaQueries(TransactionTestCase):
+    # replica_0 is a second connection to the test database (TEST MIRROR), the
+    # way replica_configs() sets replicas up; rows are committed so it sees them.
+    databases = {"default", "replica_0"}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="replica_user", password="Pass@122")
+        self.task = Tasks.objects.create(task="Replicated", owner=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def queries(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as primary, \
+                CaptureQueriesContext(connections["replica_0"]) as replica:
+            response = getattr(self.client, method)(url, data, format="json")
+        return response, *([q["sql"] for q in captured if "tasks_tasks" in q["sql"]] for captured in (primary, replica))
+
+    def test_reads_use_replica_and_writes_pin_to_primary(self):
+        for url in (reverse("task_list"), reverse("task_detail", kwargs={"pk": self.task.pk})):
+            response, primary, replica = self.queries("get", url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(primary, [])
+            self.assertTrue(replica)
+
+        response, primary, replica = self.queries("post", reverse("task_create"), {"task": "Written"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(any(sql.startswith("INSERT") for sql in primary))
+        self.assertEqual(replica, [])
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        # The pin cookie sends the read-after-write to the primary.
+        response, primary, replica = self.queries("get", reverse("task_list"))
+        self.assertEqual([task["task"] for task in response.data["results"]], ["Written", "Replicated"])
+        self.assertTrue(primary)
+        self.assertEqual(replica, [])
+
+
+class TestDatabaseConfig(TestCase):
+    mysql_env = {"DB_NAME": "db", "DB_USER": "u", "DB_PASSWORD": "p", "DB_HOST": "h", "DB_PORT": "3306"}
+
+    def config(self, debug=True, **values):
+        with patch.dict(os.environ, {**self.mysql_env, **values}, clear=True):
+            return database_config(environ.Env(), debug)
+
+    def test_debug_mysql_keeps_connections(self):
+        config = self.config()
+        self.assertEqual(config["ENGINE"], "django.db.backends.mysql")
+        self.assertEqual(config["CONN_MAX_AGE"], 600)
+        self.assertTrue(config["CONN_HEALTH_CHECKS"])
+
+    def test_mysql_pool(self):
+        config = self.config(DB_POOL="true", DB_POOL_MAX_SIZE="8")
+        self.assertEqual(config["ENGINE"], MYSQL_POOL_ENGINE)
+        self.assertEqual(config["CONN_MAX_AGE"], 0)
+        self.assertEqual(config["POOL"]["max_size"], 8)
+
+    def test_database_url(self):
+        config = self.config(debug=False, DATABASE_URL="postgres://u:p@h/db", DB_CONN_MAX_AGE="60")
+        self.assertEqual(config["ENGINE"], "django.db.backends.postgresql")
+        self.assertEqual(config["CONN_MAX_AGE"], 60)
+        self.assertEqual(config["OPTIONS"]["sslmode"], "require")
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestConnectionPool(TestCase):
+    def test_reuses_released_connections(self):
+        pool = ConnectionPool("default", max_size=2)
+        first = pool.acquire(FakeConnection)
+        pool.release(first)
+        self.assertIs(pool.acquire(FakeConnection), first)
+        self.assertEqual(pool.stats()["in_use"], 1)
+
+    def test_replaces_unusable_connections(self):
+        pool = ConnectionPool("default", max_size=1, is_usable=lambda conn: False)
+        first = pool.acquire(FakeConnection)
+        pool.release(first)
+        second = pool.acquire(FakeConnection)
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+
+    def test_waits_for_release_then_times_out(self):
+        pool = ConnectionPool("default", max_size=1, timeout=2)
+        first = pool.acquire(FakeConnection)
+        threading.Timer(0.05, pool.release, [first]).start()
+        self.assertIs(pool.acquire(FakeConnection), first)
+
+        pool.timeout = 0.01
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(FakeConnection)
+        stats = pool.stats()
+        self.assertEqual((stats["waits"], stats["timeouts"], stats["in_use"]), (2, 1, 1))
+        self.assertGreater(stats["wait_seconds"], 0)
+
+
+class TestTaskTags(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tag_user", password="Pass@122")
+        self.client.force_authenticate(user=self.user)
+        self.list_url = reverse("task_list")
+
+    def create(self, **data):
+        response = self.client.post(reverse("task_create"), {"task": "Tagged", **data}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    def listed(self, **params):
+        return [row["task"] for row in self.client.get(self.list_url, params).data["results"]]
+
+    def test_tags_are_normalized(self):
+        data = self.create(tags=["Work", " urgent ", "work"])
+        self.assertEqual(data["tags"], ["urgent", "work"])
+        detail = self.client.get(reverse("task_detail", kwargs={"pk": data["id"]})).data
+        self.assertEqual(detail["tags"], ["urgent", "work"])
+
+    def test_category_and_tag_filters(self):
+        self.create(task="a", category="Home", tags=["x", "y"])
+        self.create(task="b", category="Work", tags=["x"])
+        self.create(task="c", tags=["home"])
+        self.assertEqual(self.listed(category="home"), ["a"])
+        self.assertEqual(sorted(self.listed(tags="x,y")), ["a", "b"])
+        self.assertEqual(self.listed(tags="x,y", tags_match="all"), ["a"])
+        self.assertEqual(self.listed(tags="nope"), [])
+
+    def test_category_change_moves_tag(self):
+        data = self.create(category="Home")
+        self.client.patch(reverse("task_detail", kwargs={"pk": data["id"]}), {"category": "Garden"}, format="json")
+        self.assertEqual(self.listed(category="home"), [])
+        self.assertEqual(self.listed(category="garden"), ["Tagged"])
+
+    def test_bulk_tags(self):
+        created = self.client.post(reverse("task_bulk"), [
+            {"task": "one", "category": "Bulk", "tags": ["a"]}, {"task": "two"},
+        ], format="json").data
+        self.assertEqual([item["tags"] for item in created], [["a"], []])
+        response = self.client.patch(reverse("task_bulk"), [{"id": created[1]["id"], "patch": {"tags": ["b"]}}],
+                                     format="json")
+        self.assertEqual(response.data[0]["tags"], ["b"])
+        self.assertEqual(self.listed(category="bulk"), ["one"])
+        self.assertEqual(self.listed(tags="b"), ["two"])
+
+    def test_list_queries_do_not_grow_with_tags(self):
+        self.create(tags=["a", "b"])
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.list_url, {"page_size": 100, "tags": "a"})
+        for i in range(5):
+            self.create(tags=["a", f"t{i}"])
+        caches["task_list"].clear()
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(self.list_url, {"page_size": 100, "tags": "a"})
+        self.assertEqual(len(response.data["results"]), 6)
+        self.assertEqual(len(many), len(few))
+
+    def test_backfill_migration(self):
+        from django.apps import apps
+        migration = importlib.import_module("tasks.migrations.0010_backfill_tags")
+        Tasks.objects.bulk_create([Tasks(task=f"old {i}", category=f"Cat {i % 3}", owner=self.user) for i in range(7)])
+        with patch.object(migration, "BATCH_SIZE", 3):
+            migration.backfill_category_tags(apps, type("Editor", (), {"connection": connection})())
+        self.assertEqual(TaskTag.objects.filter(is_category=True).count(), 7)
+        self.assertEqual(len(self.listed(category="cat 1")), 2)
+
+
+class TestTaskAdmin(TestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(username="admin_user", password="Adminadmin@122")
+        self.owner = User.objects.create_user(username="task_owner", password="Pass@122")
+        self.tasks = [Tasks.objects.create(task=f"Admin {i}", category="ops", owner=self.owner) for i in range(4)]
+        self.client.force_login(self.admin_user)
+        self.url = reverse("admin:tasks_tasks_changelist")
 
+    def test_changelist_queries_do_not_grow(self):
+        with CaptureQueriesContext(connection) as few:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        for i in range(10):
+            Tasks.objects.create(task=f"More {i}", owner=User.objects.create_user(username=f"owner{i}"))
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(self.url, {"status__exact": "pending"})
+        self.assertContains(response, "More 9")
+        self.assertEqual(len(many), len(few))
 
-        
+    def test_bulk_action_keeps_counters(self):
+        self.client.post(self.url, {
+            "action": "mark_completed",
+            "_selected_action": [task.pk for task in self.tasks[:3]],
+        })
+        self.assertEqual(Tasks.objects.filter(status="completed").count(), 3)
+        counts = dict(TaskCounter.objects.filter(owner=self.owner).values_list("status", "count"))
+        self.assertEqual(counts, {"pending": 1, "completed": 3})
 
+    def test_owner_autocomplete(self):
+        response = self.client.get(reverse("admin:autocomplete"), {
+            "term": "task_", "app_label": "tasks", "model_name": "tasks", "field_name": "owner",
+        })
+        self.assertEqual([item["text"] for item in response.json()["results"]], ["task_owner"])
 
-    
\ No newline at end of file
+    def test_paginator_counts_small_tables_exactly(self):
+        self.assertEqual(EstimatedCountPaginator(Tasks.objects.order_by("id"), 2).count, 4)
@@ -1,11 +1,26 @@
-from .views import TaskListView, TaskCreateView, TaskUpdateDeleteView
+from .views import TaskListView, TaskCreateView, TaskUpdateDeleteView, TaskExportView, TaskBulkView, TaskSummaryView, TaskChangesView
+from .views import TaskOccurrenceListView, TaskOccurrenceView, TaskImportView
+from .async_views import AsyncTaskListView, AsyncTaskCreateView, AsyncTaskDetailView, AsyncTaskEventsView
 from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 urlpatterns = [
     path('', TaskListView.as_view(), name='task_list'),
     path('create/', TaskCreateView.as_view(), name='task_create'),
+    path('bulk/', TaskBulkView.as_view(), name='task_bulk'),
+    path('summary/', TaskSummaryView.as_view(), name='task_summary'),
+    path('export/', TaskExportView.as_view(), name='task_export'),
+    path('import/', TaskImportView.as_view(), name='task_import'),
+    path('changes/', TaskChangesView.as_view(), name='task_changes'),
     path('<int:pk>/', TaskUpdateDeleteView.as_view(), name='task_detail'),
+    path('<int:pk>/occurrences/', TaskOccurrenceListView.as_view(), name='task_occurrences'),
+    path('<int:pk>/occurrences/<str:date>/', TaskOccurrenceView.as_view(), name='task_occurrence'),
+    # Async twins of the list/create/detail endpoints, for ASGI deployments.
+    path('async/', csrf_exempt(AsyncTaskListView.as_view()), name='async_task_list'),
+    path('async/create/', csrf_exempt(AsyncTaskCreateView.as_view()), name='async_task_create'),
+    path('async/<int:pk>/', csrf_exempt(AsyncTaskDetailView.as_view()), name='async_task_detail'),
+    path('events/', csrf_exempt(AsyncTaskEventsView.as_view()), name='task_events'),
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 ]
\ No newline at end of file
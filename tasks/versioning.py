@@ -0,0 +1,86 @@
+import hashlib
+from datetime import datetime, time
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Sum
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from .models import TaskVersion
+
+
+def bump_version(owner_id):
+    """
+    Increment the owner's version and return the new value. The UPDATE keeps the
+    row locked until commit, so versions are handed out in commit order.
+    """
+    now = timezone.now()
+    versions = TaskVersion.objects.filter(owner_id=owner_id)
+    if not versions.update(version=F('version') + 1, updated_at=now):
+        try:
+            with transaction.atomic():
+                TaskVersion.objects.create(owner_id=owner_id, version=1)
+            return 1
+        except IntegrityError:
+            versions.update(version=F('version') + 1, updated_at=now)
+    return versions.values_list('version', flat=True).get()
+
+
+def get_version(owner_id, lock=False):
+    queryset = TaskVersion.objects.filter(owner_id=owner_id)
+    if lock:
+        queryset = queryset.select_for_update()
+    row = queryset.values_list('version', 'updated_at').first()
+    return row if row else (0, None)
+
+
+def get_global_version():
+    # Staff see every owner's tasks. Versions only ever grow, so the sum and the
+    # row count together change whenever any owner's tasks change.
+    row = TaskVersion.objects.aggregate(total=Sum('version'), owners=Count('owner'), last=Max('updated_at'))
+    return f"{row['total'] or 0}.{row['owners']}", row['last']
+
+
+class ConditionalTaskMixin:
+    """
+    ETag / Last-Modified for task views, derived from TaskVersion instead of the
+    rows themselves, so a matching If-None-Match is answered without touching Tasks.
+    """
+    everyone_for_staff = False
+    day = None
+
+    def get_version(self, lock=False):
+        user = self.request.user
+        if self.everyone_for_staff and (user.is_staff or user.is_superuser):
+            return get_global_version()
+        return get_version(user.pk, lock=lock)
+
+    def get_day(self):
+        """The local date, for responses that also change when it does."""
+        return None
+
+    def get_etag(self, version):
+        raw = f"{self.request.user.pk}:{version}:{self.day}:{self.request.get_full_path()}"
+        return quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+
+    def load_validators(self, lock=False):
+        self.version, self.last_modified = self.get_version(lock=lock)
+        self.day = self.get_day()
+        if self.day is not None:
+            # Such a response changes at local midnight without any write.
+            midnight = timezone.make_aware(datetime.combine(self.day, time.min))
+            self.last_modified = max(self.last_modified, midnight) if self.last_modified else midnight
+        self.etag = self.get_etag(self.version)
+
+    def conditional_response(self, request, lock=False):
+        self.load_validators(lock=lock)
+        timestamp = int(self.last_modified.timestamp()) if self.last_modified else None
+        return get_conditional_response(request, etag=self.etag, last_modified=timestamp)
+
+    def set_validators(self, response):
+        if response.status_code < 300:
+            response['ETag'] = self.etag
+            if self.last_modified:
+                response['Last-Modified'] = http_date(self.last_modified.timestamp())
+        return response
@@ -1,36 +1,303 @@
 from rest_framework import generics
-from .serializers import Task_Serializer
+from .serializers import Task_Serializer, Task_PatchSerializer, Task_ReadSerializer
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework import status as http_status
+from datetime import timedelta
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
 from django.utils.dateparse import parse_date
 from .models import Tasks
+from .pagination import TaskCursorPagination
+from .export import stream_csv, stream_json, stream_ndjson
+from .importer import ImportFormatError, TaskImporter, detect_format
+from .versioning import ConditionalTaskMixin
+from .changes import changes_since, stamp_changes
+from .counters import count_changed, count_created, summarize
+from .events import publish_tasks
+from .search import SEARCH_FIELDS, index_tasks, search_tasks
+from .list_cache import TaskListCache
+from .tags import filter_by_tags, normalize_tag, parse_tags, tag_names, tag_prefetch, tag_tasks
+from .recurrence import (
+    MAX_WINDOW_DAYS, is_occurrence, occurrence_row, occurrence_status, occurrences, parse_rule, virtual_occurrences,
+)
+from django.db.models import prefetch_related_objects
 
 
-class TaskListView(generics.ListAPIView):
+def filter_tasks(request, templates=False):
+    # templates=True gives the recurring templates matching everything but
+    # ?status= and ?due_date=, which apply to their occurrences instead.
+    user = request.user
+    if user.is_staff or user.is_superuser:
+        query_set = Tasks.objects.all()
+    else:
+        query_set = Tasks.objects.filter(owner=user)
+    status = request.query_params.get('status')
+    date = parse_date(request.query_params.get('due_date') or '')
+
+    if templates:
+        query_set = query_set.exclude(recurrence='')
+    else:
+        if status:
+            query_set = query_set.filter(status=status)
+        if date:
+            # The occurrences of templates due that day are generated (see due_occurrences).
+            query_set = query_set.filter(due_date=date, recurrence='')
+
+    # ?category=work, ?tags=a,b (any of them) or ?tags=a,b&tags_match=all (every one).
+    category = normalize_tag(request.query_params.get('category', ''))
+    if category:
+        query_set = filter_by_tags(query_set, [category], category=True)
+
+    tags = parse_tags(request.query_params.get('tags', ''))
+    if tags:
+        match_all = request.query_params.get('tags_match') == 'all'
+        query_set = filter_by_tags(query_set, tags, match_all=match_all)
+
+    q = request.query_params.get('q', '').strip()
+    if q:
+        query_set = search_tasks(query_set, q)
+    return query_set
+
+
+def due_occurrences(request, reader, today=None):
+    """
+    Represented occurrences of recurring templates due on ?due_date= that
+    haven't been stored yet, filtered like the stored rows. Their status is
+    relative to ``today`` (default: the local date).
+    """
+    date = parse_date(request.query_params.get('due_date') or '')
+    if not date:
+        return []
+    templates = filter_tasks(request, templates=True).filter(due_date__lte=date)
+    rows = reader.load_tags(list(reader.values(templates, 'id', 'due_date', 'recurrence').order_by('id')))
+    stored = Tasks.objects.filter(series__in=[row['id'] for row in rows], occurrence_date=date)
+    occurrences = [
+        occurrence_row(template, day, today)
+        for template, day in virtual_occurrences(rows, date, date, stored.values_list('series', 'occurrence_date'))
+    ]
+    status = request.query_params.get('status')
+    if status:
+        occurrences = [row for row in occurrences if row['status'] == status]
+    return reader.represent_many(occurrences)
+
+
+class TaskListView(ConditionalTaskMixin, generics.ListAPIView):
     serializer_class = Task_Serializer
     permission_classes = [IsAuthenticated]
+    pagination_class = TaskCursorPagination
+    everyone_for_staff = True
+    throttle_scope = 'task_list'
 
     def get_queryset(self):
-        user = self.request.user
-        if user.is_staff or user.is_superuser:
-            query_set = Tasks.objects.all()
-        else:
-            query_set = Tasks.objects.filter(owner=user)
-        status = self.request.query_params.get('status')
-        due_date = self.request.query_params.get('due_date')
+        return filter_tasks(self.request)
 
-        if status:
-            query_set = query_set.filter(status=status)
+    def get_day(self):
+        # Generated occurrences (first page of ?due_date=) turn overdue at midnight.
+        params = self.request.query_params
+        if params.get('due_date') and not params.get(self.paginator.cursor_query_param):
+            return timezone.localdate()
+        return None
+
+    def list(self, request, *args, **kwargs):
+        not_modified = self.conditional_response(request)
+        if not_modified is not None:
+            return not_modified
+
+        cache = TaskListCache()
+        if cache.enabled:
+            key = cache.key(request, self.version, self.last_modified, self.day)
+            data = cache.get(key)
+            if data is not None:
+                return self.set_validators(Response(data))
 
-        if due_date:
-            date = parse_date(due_date)
-            if date:
-                query_set = query_set.filter(due_date=date)
-        return query_set
+        # Read path: .values() rows through Task_ReadSerializer, not model instances.
+        reader = Task_ReadSerializer(fields=request.query_params.get('fields'))
+        sort_field = self.paginator.get_ordering_field(request)
+        rows = reader.load_tags(self.paginate_queryset(reader.values(self.get_queryset(), 'id', sort_field)))
+        results = reader.represent_many(rows)
+        # Generated occurrences have no id to page by; they all come with the first page.
+        if not request.query_params.get(self.paginator.cursor_query_param):
+            results = due_occurrences(request, reader, self.day) + results
+        data = self.paginator.get_paginated_data(results)
+        if cache.enabled:
+            cache.set(key, data)
+        return self.set_validators(Response(data))
     
 
+class TaskSummaryView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        return Response(summarize(request.user))
+
+
+class TaskChangesView(APIView):
+    """
+    Delta sync: GET without ``since`` pages through every task; each response
+    carries a ``token`` to pass as ``?since=`` next time, which returns only the
+    tasks changed and the ids deleted after it. A 410 means the token predates
+    tombstone compaction and the client should start over without ``since``.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        reader = Task_ReadSerializer()
+        limit = TaskCursorPagination().get_page_size(request)
+        rows = reader.values(Tasks.objects.filter(owner=request.user), 'change_seq', 'id')
+        rows, deleted, token, has_more = changes_since(request.user.pk, request.query_params.get('since'), rows, limit)
+        return Response({
+            "results": reader.represent_many(reader.load_tags(rows)),
+            "deleted": deleted,
+            "token": token,
+            "has_more": has_more,
+        })
+
+
+class TaskOccurrenceMixin:
+    permission_classes = [IsAuthenticated]
+
+    def get_template(self, pk):
+        try:
+            template = Tasks.objects.exclude(recurrence='').get(owner=self.request.user, pk=pk)
+        except Tasks.DoesNotExist:
+            raise Http404
+        return template, parse_rule(template.recurrence)
+
+    def template_row(self, reader, template):
+        rows = reader.values(Tasks.objects.filter(pk=template.pk), 'id', 'due_date', 'recurrence')
+        return reader.load_tags(list(rows))[0]
+
+
+class TaskOccurrenceListView(TaskOccurrenceMixin, APIView):
+    """
+    GET /tasks/<pk>/occurrences/?from=&to= lists a recurring task's occurrences in
+    a window of at most MAX_WINDOW_DAYS: stored ones as they are, the rest generated.
+    """
+
+    def get(self, request, pk):
+        template, rule = self.get_template(pk)
+        today = timezone.localdate()
+        start = parse_date(request.query_params.get('from') or '') or today
+        end = parse_date(request.query_params.get('to') or '') or start + timedelta(days=30)
+        if end < start or (end - start).days > MAX_WINDOW_DAYS:
+            return Response({"detail": f"Use a window of 0 to {MAX_WINDOW_DAYS} days."}, status=http_status.HTTP_400_BAD_REQUEST)
+
+        reader = Task_ReadSerializer(fields=request.query_params.get('fields'))
+        stored = reader.load_tags(list(reader.values(
+            template.occurrences.filter(occurrence_date__range=(start, end)), 'id', 'occurrence_date',
+        )))
+        by_date = {row['occurrence_date']: row for row in stored}
+        row = self.template_row(reader, template)
+        results = [
+            by_date.get(day) or occurrence_row(row, day, today)
+            for day in occurrences(rule, template.due_date, start, end)
+        ]
+        return Response(reader.represent_many(results))
+
+
+class TaskOccurrenceView(TaskOccurrenceMixin, APIView):
+    """
+    /tasks/<pk>/occurrences/<date>/: GET one occurrence; PUT or PATCH stores it as
+    a real task (copied from the template) and applies the edit to that row.
+    """
+
+    def get_occurrence_date(self, rule, template, value):
+        day = parse_date(value)
+        if day is None or not is_occurrence(rule, template.due_date, day):
+            raise Http404
+        return day
+
+    def get(self, request, pk, date):
+        template, rule = self.get_template(pk)
+        day = self.get_occurrence_date(rule, template, date)
+        stored = template.occurrences.filter(occurrence_date=day).first()
+        if stored is not None:
+            return Response(Task_Serializer(stored).data)
+        reader = Task_ReadSerializer()
+        return Response(reader.to_representation(occurrence_row(self.template_row(reader, template), day)))
+
+    def put(self, request, pk, date):
+        return self.save(request, pk, date, partial=False)
+
+    def patch(self, request, pk, date):
+        return self.save(request, pk, date, partial=True)
+
+    def save(self, request, pk, date, partial):
+        with transaction.atomic():
+            template, rule = self.get_template(pk)
+            day = self.get_occurrence_date(rule, template, date)
+            task, created = Tasks.objects.get_or_create(series=template, occurrence_date=day, defaults={
+                'owner': template.owner, 'task': template.task, 'description': template.description,
+                'category': template.category, 'due_date': day, 'status': occurrence_status(day),
+            })
+            if created:
+                template_tags = tag_names([template.pk])[template.pk]
+                if template_tags:
+                    tag_tasks([task], {task.pk: template_tags})
+            serializer = Task_Serializer(task, data=request.data, partial=partial)
+            if not serializer.is_valid():
+                transaction.set_rollback(True)
+                return Response(serializer.errors, status=http_status.HTTP_400_BAD_REQUEST)
+            serializer.save()
+        return Response(serializer.data, status=http_status.HTTP_201_CREATED if created else http_status.HTTP_200_OK)
+
+
+class TaskImportView(APIView):
+    """
+    POST a multipart ``file`` of CSV or NDJSON (by extension, or ?type=) to
+    create its rows as the user's tasks. Valid rows are created even when
+    others fail; the response lists the failures by row number.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+    throttle_scope = 'task_import'
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"file": ["No file was submitted."]}, status=http_status.HTTP_400_BAD_REQUEST)
+        try:
+            file_format = detect_format(upload.name, request.query_params.get('type'))
+        except ImportFormatError as exc:
+            return Response({"type": [str(exc)]}, status=http_status.HTTP_400_BAD_REQUEST)
+
+        result = TaskImporter(request.user).run(upload, file_format)
+        status = http_status.HTTP_201_CREATED if result.created else http_status.HTTP_400_BAD_REQUEST
+        return Response(result.as_dict(), status=status)
+
+
+class TaskExportView(APIView):
+    permission_classes = [IsAuthenticated]
+    # ?format= is taken by DRF's content negotiation, so the file type is ?type=
+    formats = {
+        'ndjson': (stream_ndjson, 'application/x-ndjson', 'tasks.ndjson'),
+        'csv': (stream_csv, 'text/csv', 'tasks.csv'),
+        'json': (stream_json, 'application/json', 'tasks.json'),
+    }
+
+    def get(self, request, *args, **kwargs):
+        export_type = request.query_params.get('type', 'ndjson')
+        if export_type not in self.formats:
+            return Response({"type": f"Must be one of: {', '.join(self.formats)}"}, status=400)
+
+        stream, content_type, filename = self.formats[export_type]
+        # The stream is consumed after the view returns, so pick the database
+        # (possibly a replica) now while this request's routing still applies.
+        query_set = filter_tasks(request)
+        query_set = query_set.using(query_set.db)
+        response = StreamingHttpResponse(stream(query_set), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
 class TaskCreateView(generics.CreateAPIView):
     serializer_class = Task_Serializer
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'task_create'
 
     def get_queryset(self):
         return Tasks.objects.filter(owner=self.request.user)
@@ -38,10 +305,136 @@ class TaskCreateView(generics.CreateAPIView):
     def perform_create(self, serializer):
         return serializer.save(owner=self.request.user)
 
-class TaskUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
+class TaskUpdateDeleteView(ConditionalTaskMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = Task_Serializer
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'task_detail'
 
     def get_queryset(self):
         return Tasks.objects.filter(owner=self.request.user)
 
+    def retrieve(self, request, *args, **kwargs):
+        not_modified = self.conditional_response(request)
+        if not_modified is not None:
+            return not_modified
+
+        reader = Task_ReadSerializer(fields=request.query_params.get('fields'))
+        row = reader.values(self.get_queryset().filter(pk=kwargs['pk'])).first()
+        if row is None:
+            raise Http404
+        reader.load_tags([row])
+        return self.set_validators(Response(reader.to_representation(row)))
+
+    # Writes lock the owner's version row so If-Match can't race another edit.
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            failed = self.conditional_response(request, lock=True)
+            if failed is not None:
+                return failed
+            response = super().update(request, *args, **kwargs)
+        self.load_validators()
+        return self.set_validators(response)
+
+    def destroy(self, request, *args, **kwargs):
+        with transaction.atomic():
+            failed = self.conditional_response(request, lock=True)
+            if failed is not None:
+                return failed
+            return super().destroy(request, *args, **kwargs)
+
+
+class TaskBulkView(generics.GenericAPIView):
+    serializer_class = Task_Serializer
+    permission_classes = [IsAuthenticated]
+    max_batch_size = 500
+
+    def get_queryset(self):
+        return Tasks.objects.filter(owner=self.request.user)
+
+    def check_batch(self, items):
+        if not isinstance(items, list) or not items:
+            return Response({"detail": "Expected a non-empty list."}, status=http_status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_batch_size:
+            return Response({"detail": f"At most {self.max_batch_size} items per request."},
+                            status=http_status.HTTP_400_BAD_REQUEST)
+        return None
+
+    def post(self, request, *args, **kwargs):
+        error = self.check_batch(request.data)
+        if error:
+            return error
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=http_status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            created = serializer.save(owner=request.user)
+            count_created(created)
+            index_tasks(created, created=True)
+            publish_tasks('created', created)
+        prefetch_related_objects(created, tag_prefetch())
+        return Response(serializer.data, status=http_status.HTTP_201_CREATED)
+
+    def patch(self, request, *args, **kwargs):
+        error = self.check_batch(request.data)
+        if error:
+            return error
+
+        items = Task_PatchSerializer(data=request.data, many=True)
+        if not items.is_valid():
+            return Response(items.errors, status=http_status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            ids = [item['id'] for item in items.validated_data]
+            tasks = self.get_queryset().select_for_update().in_bulk(ids)
+
+            errors, changed, fields, tags = [], [], set(), {}
+            for item in items.validated_data:
+                task = tasks.get(item['id'])
+                if task is None:
+                    errors.append({"id": ["Not found."]})
+                    continue
+                serializer = self.get_serializer(task, data=item['patch'], partial=True)
+                if not serializer.is_valid():
+                    errors.append(serializer.errors)
+                    continue
+                values = dict(serializer.validated_data)
+                if 'task_tags' in values:
+                    tags[task.pk] = values.pop('task_tags')
+                for field, value in values.items():
+                    setattr(task, field, value)
+                fields.update(values)
+                changed.append(task)
+                errors.append({})
+
+            if any(errors):
+                return Response(errors, status=http_status.HTTP_400_BAD_REQUEST)
+            if fields or tags:
+                stamp_changes(changed)
+                Tasks.objects.bulk_update(changed, [*fields, 'change_seq'])
+            if fields:
+                count_changed(changed)
+                if fields.intersection(SEARCH_FIELDS):
+                    index_tasks(changed)
+            if 'category' in fields or tags:
+                tag_tasks(changed, tags)
+            if fields or tags:
+                publish_tasks('updated', changed)
+
+        prefetch_related_objects(changed, tag_prefetch())
+        return Response(self.get_serializer(changed, many=True).data)
+
+    def delete(self, request, *args, **kwargs):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        error = self.check_batch(ids)
+        if error:
+            return error
+        if not all(isinstance(pk, int) for pk in ids):
+            return Response({"ids": ["Expected a list of integers."]}, status=http_status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            queryset = self.get_queryset().filter(id__in=ids)
+            found = set(queryset.values_list('id', flat=True))
+            queryset.delete()
+
+        return Response([{"id": pk, "deleted": pk in found} for pk in ids])